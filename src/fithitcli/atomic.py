@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import os
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Any
+
+import typer
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, writers are not serialized.
+    fcntl = None  # type: ignore[assignment]
+
+LOCK_SUFFIX = ".lock"
+
+
+def lock_path_for(db_path: Path) -> Path:
+    return db_path.with_name(db_path.name + LOCK_SUFFIX)
+
+
+def _tmp_path(path: Path) -> Path:
+    return path.with_name(f".{path.name}.{os.getpid()}.tmp")
+
+
+def fsync_dir(directory: Path) -> None:
+    """Persist renames in `directory` (no-op where directories can't be opened)."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def atomic_open(path: Path, mode: str = "w", **kwargs: Any) -> Iterator[IO[Any]]:
+    """Open a temp file that replaces `path` once the block succeeds.
+
+    The data is fsynced before the rename and the directory after it, so a
+    crash leaves either the old or the new file, never a torn one.
+    """
+    tmp_path = _tmp_path(path)
+    try:
+        with tmp_path.open(mode, **kwargs) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    fsync_dir(path.parent)
+
+
+class Generation:
+    """Files of one DB write, published by `commit()`.
+
+    Each file is written to a temp file next to its target; `commit()`
+    fsyncs them all, renames the companions and then `primary` (the DB),
+    and syncs the directory. Only each rename is atomic, not the set: the
+    DB rename is the commit point. A reader that sees the new DB also sees
+    its companions, but between the renames (or after a crash there) it may
+    see new companions next to the old DB; `summary.json` records the
+    fingerprint of the DB it belongs to.
+    """
+
+    def __init__(self, primary: Path) -> None:
+        self.primary = primary
+        self._staged: list[tuple[Path, Path]] = []
+
+    def open(self, path: Path, mode: str = "w", **kwargs: Any) -> IO[Any]:
+        tmp_path = _tmp_path(path)
+        self._staged.append((tmp_path, path))
+        return tmp_path.open(mode, **kwargs)
+
+    def reserve(self, path: Path) -> Path:
+        """Temp path for `path`, for writers that open files themselves."""
+        tmp_path = _tmp_path(path)
+        self._staged.append((tmp_path, path))
+        return tmp_path
+
+    def commit(self) -> None:
+        for tmp_path, _ in self._staged:
+            with tmp_path.open("rb+") as f:
+                os.fsync(f.fileno())
+        directories = set()
+        for tmp_path, path in sorted(self._staged, key=lambda p: p[1] == self.primary):
+            os.replace(tmp_path, path)
+            directories.add(path.parent)
+        for directory in directories:
+            fsync_dir(directory)
+        self._staged.clear()
+
+    def discard(self) -> None:
+        for tmp_path, _ in self._staged:
+            tmp_path.unlink(missing_ok=True)
+        self._staged.clear()
+
+
+@contextmanager
+def generation(primary: Path) -> Iterator[Generation]:
+    """A `Generation` that is committed on success and discarded on error."""
+    gen = Generation(primary)
+    try:
+        yield gen
+    except BaseException:
+        gen.discard()
+        raise
+    gen.commit()
+
+
+@contextmanager
+def writer_lock(db_path: Path, *, companions: Sequence[str] = ()) -> Iterator[None]:
+    """Hold the advisory single-writer lock of `db_path` (`<db>.lock`).
+
+    Fails right away if another process holds it, so an overlapping cron
+    run exits instead of queueing behind the running one. Readers never
+    take the lock; they rely on the atomic renames. The holder removes
+    temp files of `db_path`, its `<db>.*` sidecars and the `companions`
+    (file names in the same directory) left by writers that died.
+    """
+    if fcntl is None:
+        yield
+        return
+    lock_path = lock_path_for(db_path)
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with lock_path.open("a+") as f:
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError as exc:
+            f.seek(0)
+            holder = f.read().strip() or "?"
+            raise typer.BadParameter(
+                f"{db_path} wird gerade von einem anderen Prozess geschrieben "
+                f"(PID {holder}, Lock: {lock_path})."
+            ) from exc
+        try:
+            f.seek(0)
+            f.truncate()
+            f.write(str(os.getpid()))
+            f.flush()
+            _remove_stale_tmp(db_path, companions)
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        # EPERM: the process exists but belongs to someone else.
+        return True
+    return True
+
+
+def _remove_stale_tmp(db_path: Path, companions: Sequence[str] = ()) -> None:
+    """Drop temp files crashed writers left for the DB and its companions.
+
+    Temp files carry their writer's PID; those of live processes (such as a
+    fetch spooling next to a running parse) are left alone.
+    """
+    prefixes = (f".{db_path.name}.", *(f".{name}." for name in companions))
+    try:
+        with os.scandir(db_path.parent) as it:
+            for entry in it:
+                name = entry.name
+                if name.startswith(prefixes) and name.endswith(".tmp"):
+                    pid = name[: -len(".tmp")].rpartition(".")[2]
+                    if pid.isdigit() and not _pid_alive(int(pid)):
+                        try:
+                            os.unlink(entry.path)
+                        except OSError:
+                            pass
+    except OSError:
+        pass
@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+from bisect import bisect_right
+from collections.abc import Iterable, Sequence
+from typing import TYPE_CHECKING, Any
+
+from .filters import norm
+from .index import SCALAR_FIELDS
+
+if TYPE_CHECKING:
+    from .search import SearchArgs
+
+# Separator between per-row haystacks in the text blob.
+_SEP = "\x00"
+_MULTI_FILTERS = ("trainer", "body_focus", "flow_style")
+_BYTE_BITS = [tuple(i for i in range(8) if b >> i & 1) for b in range(256)]
+
+
+class _PythonBits:
+    """Row masks as Python ints (bit i = row i); & and | run in C."""
+
+    name = "python"
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+
+    def full(self) -> int:
+        return (1 << self.size) - 1
+
+    def empty(self) -> int:
+        return 0
+
+    def from_positions(self, positions: Iterable[int]) -> int:
+        buf = bytearray((self.size + 7) // 8)
+        for pos in positions:
+            buf[pos >> 3] |= 1 << (pos & 7)
+        return int.from_bytes(buf, "little")
+
+    def any(self, mask: int) -> bool:
+        return mask != 0
+
+    def count(self, mask: int) -> int:
+        return mask.bit_count()
+
+    def positions(self, mask: int) -> list[int]:
+        out: list[int] = []
+        for byte_pos, byte in enumerate(mask.to_bytes((self.size + 7) // 8, "little")):
+            if byte:
+                base = byte_pos << 3
+                out.extend(base + bit for bit in _BYTE_BITS[byte])
+        return out
+
+
+class _NumpyBits:
+    """Row masks as NumPy bool arrays."""
+
+    name = "numpy"
+
+    def __init__(self, size: int) -> None:
+        import numpy
+
+        self.np = numpy
+        self.size = size
+
+    def full(self) -> Any:
+        return self.np.ones(self.size, dtype=bool)
+
+    def empty(self) -> Any:
+        return self.np.zeros(self.size, dtype=bool)
+
+    def from_positions(self, positions: Iterable[int]) -> Any:
+        mask = self.empty()
+        mask[self.np.fromiter(positions, dtype=self.np.intp)] = True
+        return mask
+
+    def any(self, mask: Any) -> bool:
+        return bool(mask.any())
+
+    def count(self, mask: Any) -> int:
+        return int(self.np.count_nonzero(mask))
+
+    def positions(self, mask: Any) -> list[int]:
+        return self.np.flatnonzero(mask).tolist()
+
+
+def _make_bits(size: int, backend: str | None) -> _PythonBits | _NumpyBits:
+    if backend == "python":
+        return _PythonBits(size)
+    try:
+        return _NumpyBits(size)
+    except ImportError:
+        if backend == "numpy":
+            raise
+        return _PythonBits(size)
+
+
+class BatchFilter:
+    """`matches()` for a whole catalog at once, as mask operations.
+
+    Every filter value maps to a precomputed row mask (category/duration keys,
+    trainer/body focus/flow style values, prefix masks over parsed minutes,
+    the equipment-free flag), so a query is a handful of ANDs and ORs instead
+    of Python branches per workout. `--search` scans one lowercased text blob.
+    Masks are NumPy bool arrays when NumPy is installed, Python int bitsets
+    otherwise; results are identical either way.
+    """
+
+    def __init__(
+        self,
+        bits: _PythonBits | _NumpyBits,
+        keys: dict[str, dict[str, Any]],
+        minute_keys: list[int],
+        minute_prefix: list[Any],
+        equipment_free: Any,
+        text: str,
+        text_starts: list[int],
+    ) -> None:
+        self.bits = bits
+        self.size = bits.size
+        self.keys = keys
+        self.minute_keys = minute_keys
+        self.minute_prefix = minute_prefix
+        self.equipment_free = equipment_free
+        self.text = text
+        self.text_starts = text_starts
+
+    @property
+    def backend(self) -> str:
+        return self.bits.name
+
+    @classmethod
+    def build(
+        cls, workouts: Sequence[dict[str, Any]], *, backend: str | None = None
+    ) -> BatchFilter:
+        """`backend` is "numpy", "python" or None (NumPy if available)."""
+        bits = _make_bits(len(workouts), backend)
+        rows: dict[str, dict[str, list[int]]] = {
+            field: {} for field in SCALAR_FIELDS + _MULTI_FILTERS
+        }
+        minutes: dict[int, list[int]] = {}
+        equipment_free: list[int] = []
+        haystacks: list[str] = []
+
+        for pos, workout in enumerate(workouts):
+            for field in SCALAR_FIELDS:
+                key = norm(workout, f"_{field}_key")
+                rows[field].setdefault(key, []).append(pos)
+            for field in _MULTI_FILTERS:
+                for key in set(norm(workout, f"_{field}_keys")):
+                    rows[field].setdefault(key, []).append(pos)
+            dur_min = norm(workout, "_duration_minutes")
+            if dur_min is not None:
+                minutes.setdefault(dur_min, []).append(pos)
+            if norm(workout, "_is_equipment_free"):
+                equipment_free.append(pos)
+            haystacks.append(
+                (
+                    str(workout.get("description", ""))
+                    + " "
+                    + str(workout.get("name", ""))
+                ).lower()
+            )
+
+        keys = {
+            field: {key: bits.from_positions(p) for key, p in values.items()}
+            for field, values in rows.items()
+        }
+        minute_keys = sorted(minutes)
+        minute_prefix = [bits.empty()]
+        for minute in minute_keys:
+            minute_prefix.append(
+                minute_prefix[-1] | bits.from_positions(minutes[minute])
+            )
+
+        text_starts: list[int] = []
+        offset = 0
+        for haystack in haystacks:
+            text_starts.append(offset)
+            offset += len(haystack) + len(_SEP)
+
+        return cls(
+            bits,
+            keys,
+            minute_keys,
+            minute_prefix,
+            bits.from_positions(equipment_free),
+            _SEP.join(haystacks),
+            text_starts,
+        )
+
+    def _key(self, field: str, value: str) -> Any:
+        mask = self.keys[field].get(value.lower())
+        return self.bits.empty() if mask is None else mask
+
+    def _text_positions(self, needle: str) -> list[int]:
+        needle = needle.lower()
+        out: list[int] = []
+        starts = self.text_starts
+        last = len(starts) - 1
+        find = self.text.find
+        at = find(needle)
+        while at != -1:
+            pos = bisect_right(starts, at) - 1
+            row_end = starts[pos + 1] - len(_SEP) if pos < last else len(self.text)
+            if at + len(needle) <= row_end:
+                out.append(pos)
+                if pos == last:
+                    break
+                at = find(needle, starts[pos + 1])
+            else:
+                # Match runs into the next row (needle contains the separator).
+                at = find(needle, at + 1)
+        return out
+
+    def mask(self, args: SearchArgs) -> Any:
+        """Row mask of the workouts `matches(workout, args)` accepts."""
+        masks: list[Any] = []
+        if args.category:
+            masks.append(self._key("category", args.category))
+        if args.categories:
+            wanted = self.bits.empty()
+            for key in {c.strip() for c in args.categories.split(",")}:
+                wanted = wanted | self._key("category", key)
+            masks.append(wanted)
+        if args.duration:
+            masks.append(self._key("duration", args.duration))
+        if args.max_duration:
+            masks.append(
+                self.minute_prefix[bisect_right(self.minute_keys, args.max_duration)]
+            )
+        if args.equipment_free:
+            masks.append(self.equipment_free)
+        for field in _MULTI_FILTERS:
+            value = getattr(args, field)
+            if value:
+                masks.append(self._key(field, value))
+
+        result = self.bits.full()
+        for mask in masks:
+            result = result & mask
+        if args.search and self.bits.any(result):
+            result = result & self.bits.from_positions(
+                self._text_positions(args.search)
+            )
+        return result
+
+    def positions(self, args: SearchArgs) -> list[int]:
+        return self.bits.positions(self.mask(args))
+
+    def count(self, args: SearchArgs) -> int:
+        return self.bits.count(self.mask(args))
+
+    def select(
+        self, workouts: Sequence[dict[str, Any]], args: SearchArgs
+    ) -> list[dict[str, Any]]:
+        """Same result and order as filtering `workouts` with `matches()`."""
+        return [workouts[pos] for pos in self.positions(args)]
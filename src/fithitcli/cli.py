@@ -1,28 +1,52 @@
 from __future__ import annotations
 
 import typer
-from rich.console import Console
-
-from .fetch import fetch_cmd
-from .parse import parse_cmd
-from .search import search_cmd
-from .info import info_cmd
-from .validate import validate_cmd
 
+# Command modules are imported inside each command so that e.g.
+# `fithit search --format json` never loads rich, zipfile or urllib.
 app = typer.Typer(
     add_completion=False,
     help="fithit — Apple Fitness+ Workouts parsen & durchsuchen",
 )
 
-console = Console()
-
 
 @app.callback(invoke_without_command=True)
-def _main(ctx: typer.Context) -> None:
+def _main(
+    ctx: typer.Context,
+    backend: str | None = typer.Option(
+        None,
+        "--backend",
+        envvar="FITHIT_BACKEND",
+        help="Speicher-Backend: json|sqlite (default: nach Dateiendung der DB).",
+    ),
+    profile: bool = typer.Option(
+        False,
+        "--profile",
+        help="Laufzeit je Stufe und Zähler als JSON nach stderr "
+        "(oder in die Datei aus FITHIT_TRACE).",
+    ),
+    pstats: str | None = typer.Option(
+        None,
+        "--pstats",
+        envvar="FITHIT_PSTATS",
+        help="Befehl unter cProfile ausführen und pstats-Dump nach PATH schreiben.",
+    ),
+) -> None:
     """Show help when no command is provided."""
     if ctx.invoked_subcommand is None:
         typer.echo(ctx.get_help())
         raise typer.Exit(code=0)
+    if backend is not None:
+        from .db import set_backend
+
+        set_backend(backend)
+        ctx.call_on_close(lambda: set_backend(None))
+    from . import tracing
+
+    target = tracing.trace_target(profile)
+    if target is not None or pstats:
+        tracing.start(ctx.invoked_subcommand, pstats=pstats)
+        ctx.call_on_close(lambda: tracing.finish(target, pstats=pstats))
 
 
 @app.command("search")
@@ -50,15 +74,44 @@ def _search(
         None, "--flow-style", help="Yoga Flow Style (Slow, Energetic, ...)."
     ),
     search: str | None = typer.Option(
-        None, "--search", help="Textsuche in Beschreibung/Name."
+        None,
+        "--search",
+        help="Textsuche in Name und Beschreibung (Teilstring, ohne "
+        "Groß-/Kleinschreibung).",
+    ),
+    rank: bool = typer.Option(
+        False, "--rank", help="Treffer von --search nach Relevanz (BM25) sortieren."
     ),
     limit: int = typer.Option(5, "--limit", help="Max. Ergebnisse (default 5)."),
     randomize: bool = typer.Option(False, "--random", help="Ergebnisse mischen."),
+    seed: int | None = typer.Option(
+        None, "--seed", help="Mit --random: Zufallsauswahl reproduzierbar machen."
+    ),
     format: str = typer.Option(
-        "compact", "--format", help="Ausgabeformat: compact|json."
+        "compact", "--format", help="Ausgabeformat: compact|json|ndjson."
+    ),
+    batch: str | None = typer.Option(
+        None,
+        "--batch",
+        help="JSONL-Datei mit einer Suche pro Zeile ('-' = stdin); "
+        "gibt eine JSON-Zeile pro Suche aus. Übrige Optionen sind Defaults.",
+    ),
+    stats: bool = typer.Option(
+        False, "--stats", help="Mit --batch: Trefferzahl und Laufzeit je Suche."
+    ),
+    no_cache: bool = typer.Option(
+        False, "--no-cache", help="Query-Cache weder lesen noch schreiben."
+    ),
+    facets: str | None = typer.Option(
+        None,
+        "--facets",
+        help="Komma-separierte Felder (category, duration, trainer, body_focus, "
+        "equipment_free): Trefferzahl je Wert für den aktuellen Filter.",
     ),
 ):
     """Workouts aus der lokalen DB filtern."""
+    from .search import search_cmd
+
     search_cmd(
         category=category,
         categories=categories,
@@ -72,6 +125,12 @@ def _search(
         limit=limit,
         randomize=randomize,
         format=format,
+        rank=rank,
+        batch=batch,
+        stats=stats,
+        use_cache=not no_cache,
+        seed=seed,
+        facets=facets,
     )
 
 
@@ -83,9 +142,41 @@ def _parse(
     output: str | None = typer.Option(
         None, "--output", help="Zielpfad für workouts.json (default: Standard-DB-Pfad)."
     ),
+    incremental: bool = typer.Option(
+        False,
+        "--incremental",
+        help="Nur neue/geänderte Zeilen (_id/_mtime) parsen und Links prüfen.",
+    ),
+    link_cache_ttl: float = typer.Option(
+        168.0,
+        "--link-cache-ttl",
+        help="Gültigkeit des Link-Caches in Stunden (default 168).",
+    ),
+    link_cache: str | None = typer.Option(
+        None, "--link-cache", help="Pfad des Link-Caches (default: <DB>.links)."
+    ),
+    no_link_cache: bool = typer.Option(
+        False, "--no-link-cache", help="Alle Links ohne Cache prüfen."
+    ),
+    jobs: int = typer.Option(
+        1, "--jobs", "-j", help="Zeilen in N Prozessen parsen (default 1)."
+    ),
+    force: bool = typer.Option(
+        False, "--force", help="Auch bei unverändertem Inhalt neu parsen."
+    ),
 ):
     """.dtable parsen und workouts.json + summary.json schreiben."""
-    parse_cmd(dtable_path=dtable_path, output=output)
+    from .parse import parse_cmd
+
+    parse_cmd(
+        dtable_path=dtable_path,
+        output=output,
+        incremental=incremental,
+        link_cache_ttl=None if no_link_cache else link_cache_ttl,
+        link_cache=link_cache,
+        jobs=jobs,
+        force=force,
+    )
 
 
 @app.command("fetch")
@@ -98,9 +189,41 @@ def _fetch(
     output: str | None = typer.Option(
         None, "--output", help="Zielpfad für workouts.json (default: Standard-DB-Pfad)."
     ),
+    incremental: bool = typer.Option(
+        False,
+        "--incremental",
+        help="Nur neue/geänderte Zeilen (_id/_mtime) parsen und Links prüfen.",
+    ),
+    link_cache_ttl: float = typer.Option(
+        168.0,
+        "--link-cache-ttl",
+        help="Gültigkeit des Link-Caches in Stunden (default 168).",
+    ),
+    link_cache: str | None = typer.Option(
+        None, "--link-cache", help="Pfad des Link-Caches (default: <DB>.links)."
+    ),
+    no_link_cache: bool = typer.Option(
+        False, "--no-link-cache", help="Alle Links ohne Cache prüfen."
+    ),
+    jobs: int = typer.Option(
+        1, "--jobs", "-j", help="Zeilen in N Prozessen parsen (default 1)."
+    ),
+    force: bool = typer.Option(
+        False, "--force", help="Auch bei unverändertem Inhalt neu parsen."
+    ),
 ):
     """SeaTable .dtable per External-Link laden und direkt parsen."""
-    fetch_cmd(url=url, output=output)
+    from .fetch import fetch_cmd
+
+    fetch_cmd(
+        url=url,
+        output=output,
+        incremental=incremental,
+        link_cache_ttl=None if no_link_cache else link_cache_ttl,
+        link_cache=link_cache,
+        jobs=jobs,
+        force=force,
+    )
 
 
 @app.command("info")
@@ -110,14 +233,47 @@ def _info(
     ),
 ):
     """Zeigt DB-Statistiken (Kategorien, Trainer, Durations)."""
+    from .info import info_cmd
+
     info_cmd(format=format)
 
 
 @app.command("validate")
 def _validate(
     format: str = typer.Option(
-        "compact", "--format", help="Ausgabeformat: compact|json."
+        "compact", "--format", help="Ausgabeformat: compact|json|ndjson."
     ),
 ):
     """Validiert workouts.json gegen das public schema."""
+    from .validate import validate_cmd
+
     validate_cmd(format=format)
+
+
+@app.command("export")
+def _export(
+    output: str | None = typer.Option(
+        None, "--output", help="Zieldatei (default: stdout)."
+    ),
+):
+    """Workouts im public JSON-Schema exportieren (aus jedem Backend)."""
+    from .export import export_cmd
+
+    export_cmd(output=output)
+
+
+@app.command("serve")
+def _serve(
+    host: str = typer.Option(
+        "127.0.0.1", "--host", help="HTTP-Host (nur Loopback, z. B. 127.0.0.1)."
+    ),
+    port: int = typer.Option(8765, "--port", help="HTTP-Port."),
+    socket_path: str | None = typer.Option(
+        None, "--socket", help="Unix-Socket statt TCP verwenden."
+    ),
+    verbose: bool = typer.Option(False, "--verbose", help="Requests loggen."),
+):
+    """Query-Daemon: hält die DB im Speicher (/search, /info, /validate)."""
+    from .serve import serve_cmd
+
+    serve_cmd(host=host, port=port, socket_path=socket_path, verbose=verbose)
@@ -0,0 +1,268 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import marshal
+import mmap
+import os
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import typer
+
+from .atomic import atomic_open
+from .batch import BatchFilter
+from .facets import FacetStore, load_facets
+from .filters import normalized
+from .index import SearchIndex
+from .store import WorkoutStore
+from .text import TextIndex
+
+if TYPE_CHECKING:
+    from .sqlitedb import SqliteRows
+
+BACKENDS = ("json", "sqlite")
+# DB file extensions that select the SQLite backend.
+SQLITE_SUFFIXES = (".sqlite", ".sqlite3", ".db")
+INDEX_SUFFIX = ".idx"
+INDEX_MAGIC = b"FITHIDX\x00"
+INDEX_FORMAT_VERSION = 3
+# magic, format version, marshal version, json mtime_ns, json size,
+# json sha256, payload length
+_HEADER = struct.Struct("<8sHHqq32sQ")
+
+# Set by the global `--backend` option (or FITHIT_BACKEND) for one command.
+_backend_override: str | None = None
+
+
+def set_backend(backend: str | None) -> None:
+    """Force a storage backend for all DB paths (None: pick by extension)."""
+    global _backend_override
+    if backend is not None:
+        backend = backend.lower()
+        if backend not in BACKENDS:
+            raise typer.BadParameter("--backend muss 'json' oder 'sqlite' sein")
+    _backend_override = backend
+
+
+def backend_for(db_path: Path) -> str:
+    """Return "sqlite" for `.sqlite`/`.sqlite3`/`.db` paths, else "json"."""
+    if _backend_override is not None:
+        return _backend_override
+    return "sqlite" if db_path.suffix.lower() in SQLITE_SUFFIXES else "json"
+
+
+def default_db_path() -> Path:
+    """`FITHIT_DB_PATH`, or `workouts.json`/`.sqlite` in the XDG data dir."""
+    env = os.environ.get("FITHIT_DB_PATH")
+    if env:
+        return Path(env).expanduser()
+    xdg_data_home = os.environ.get("XDG_DATA_HOME")
+    base = (
+        Path(xdg_data_home).expanduser()
+        if xdg_data_home
+        else (Path.home() / ".local" / "share")
+    )
+    name = "workouts.sqlite" if _backend_override == "sqlite" else "workouts.json"
+    return base / "fithit" / name
+
+
+@dataclass
+class Catalog:
+    """Workouts of one DB file together with their search indexes.
+
+    `workouts` is a plain list, a `WorkoutStore` for columnar catalogs, or
+    lazily decoded `SqliteRows` for SQLite DBs.
+    `fingerprint` is the sha256 of the DB file (None if it was not indexable).
+    """
+
+    path: Path
+    workouts: list[dict[str, Any]] | WorkoutStore | SqliteRows
+    _index: SearchIndex | None = None
+    _text: TextIndex | None = None
+    _batch: BatchFilter | None = None
+    fingerprint: str | None = None
+    _facets: FacetStore | None = None
+
+    @property
+    def index(self) -> SearchIndex:
+        if self._index is None:
+            self._index = SearchIndex.build(self.workouts)
+        return self._index
+
+    @property
+    def text(self) -> TextIndex:
+        if self._text is None:
+            self._text = TextIndex.build(self.workouts)
+        return self._text
+
+    @property
+    def batch(self) -> BatchFilter:
+        """Mask-based filter for bulk queries; built on first use."""
+        if self._batch is None:
+            self._batch = BatchFilter.build(self.workouts)
+        return self._batch
+
+    @property
+    def facets(self) -> FacetStore:
+        """The facet store written by `parse`, or one built from `workouts`."""
+        if self._facets is None:
+            self._facets = load_facets(self.path) or FacetStore.build(self.workouts)
+        return self._facets
+
+
+def index_path_for(db_path: Path) -> Path:
+    return db_path.with_name(db_path.name + INDEX_SUFFIX)
+
+
+def _is_indexable(data: Any) -> bool:
+    return isinstance(data, list) and all(isinstance(w, dict) for w in data)
+
+
+def write_index(
+    db_path: Path,
+    workouts: list[dict[str, Any]],
+    index: SearchIndex | None = None,
+    text: TextIndex | None = None,
+    *,
+    raw: bytes | None = None,
+) -> Path | None:
+    """Write the binary sidecar for `db_path`; returns None if not writable.
+
+    The sidecar rows carry the private companion fields (see
+    `filters.normalized`) that the public JSON leaves out.
+    """
+    idx_path = index_path_for(db_path)
+    try:
+        if raw is None:
+            raw = db_path.read_bytes()
+        stat = db_path.stat()
+        payload = marshal.dumps(
+            {
+                "workouts": [{**w, **normalized(w)} for w in workouts],
+                "index": (index or SearchIndex.build(workouts)).to_state(),
+                "text": (text or TextIndex.build(workouts)).to_state(),
+            },
+            marshal.version,
+        )
+        header = _HEADER.pack(
+            INDEX_MAGIC,
+            INDEX_FORMAT_VERSION,
+            marshal.version,
+            stat.st_mtime_ns,
+            stat.st_size,
+            hashlib.sha256(raw).digest(),
+            len(payload),
+        )
+        with atomic_open(idx_path, "wb") as f:
+            f.write(header)
+            f.write(payload)
+    except (OSError, ValueError):
+        return None
+    return idx_path
+
+
+def _read_index(db_path: Path) -> tuple[Catalog | None, bytes | None]:
+    """Load the sidecar if it is fresh.
+
+    Returns the catalog (or None when missing/stale) plus the raw JSON bytes if
+    they had to be read for the hash comparison, so callers can reuse them.
+    """
+    idx_path = index_path_for(db_path)
+    try:
+        with (
+            idx_path.open("rb") as f,
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm,
+        ):
+            if len(mm) < _HEADER.size:
+                return None, None
+            magic, fmt, marshal_version, mtime_ns, size, digest, length = (
+                _HEADER.unpack_from(mm)
+            )
+            if (
+                magic != INDEX_MAGIC
+                or fmt != INDEX_FORMAT_VERSION
+                or marshal_version != marshal.version
+                or len(mm) != _HEADER.size + length
+            ):
+                return None, None
+
+            raw: bytes | None = None
+            stat = db_path.stat()
+            if stat.st_mtime_ns != mtime_ns or stat.st_size != size:
+                if stat.st_size != size:
+                    return None, None
+                raw = db_path.read_bytes()
+                if hashlib.sha256(raw).digest() != digest:
+                    return None, raw
+
+            with memoryview(mm) as view:
+                data = marshal.loads(view[_HEADER.size :])
+    except (OSError, ValueError, EOFError, TypeError):
+        return None, None
+
+    catalog = Catalog(
+        db_path,
+        data["workouts"],
+        SearchIndex.from_state(data["index"]),
+        TextIndex.from_state(data["text"]),
+        fingerprint=digest.hex(),
+    )
+    return catalog, raw
+
+
+def load_catalog(db_path: Path, *, columnar: bool = False) -> Catalog:
+    """Load workouts, preferring a fresh binary sidecar over `workouts.json`.
+
+    A missing or stale sidecar is rebuilt from the JSON (best effort; a
+    read-only data dir just skips the write). With `columnar`, the workouts
+    are kept in a compact `WorkoutStore` instead of a list of dicts.
+    SQLite DBs (see `backend_for()`) are opened as a `SqliteCatalog` instead.
+    """
+    if backend_for(db_path) == "sqlite":
+        _require_db(db_path)
+        from .sqlitedb import load_sqlite_catalog
+
+        return load_sqlite_catalog(db_path)
+    catalog = _load_catalog(db_path)
+    if columnar and _is_indexable(catalog.workouts):
+        # Indexes are built from the dicts before those are dropped.
+        index, text = catalog.index, catalog.text
+        catalog = Catalog(
+            db_path,
+            WorkoutStore.build(catalog.workouts),
+            index,
+            text,
+            fingerprint=catalog.fingerprint,
+        )
+    return catalog
+
+
+def _require_db(db_path: Path) -> None:
+    if not db_path.exists():
+        raise typer.BadParameter(
+            f"Datenbank nicht gefunden: {db_path}\n"
+            "Tipp: `fithit parse <dtable>` ausführen oder FITHIT_DB_PATH setzen."
+        )
+
+
+def _load_catalog(db_path: Path) -> Catalog:
+    _require_db(db_path)
+
+    catalog, raw = _read_index(db_path)
+    if catalog is not None:
+        return catalog
+
+    if raw is None:
+        raw = db_path.read_bytes()
+    data = json.loads(raw)
+    if not _is_indexable(data):
+        return Catalog(db_path, data)
+    # Same rows as a sidecar load would give.
+    data = [{**w, **normalized(w)} for w in data]
+
+    catalog = Catalog(db_path, data, fingerprint=hashlib.sha256(raw).hexdigest())
+    write_index(db_path, data, catalog.index, catalog.text, raw=raw)
+    return catalog
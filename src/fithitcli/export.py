@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import json
+import sys
+from collections.abc import Iterable
+from pathlib import Path
+from typing import IO, Any
+
+from .db import default_db_path, load_catalog
+from .filters import public_fields
+
+
+def write_json_export(workouts: Iterable[dict[str, Any]], out: IO[str]) -> int:
+    """Write the public fields of `workouts` as an indented JSON array.
+
+    Rows are written one at a time, so SQLite DBs are never fully decoded
+    into memory. Returns the number of workouts written.
+    """
+    count = 0
+    out.write("[")
+    for workout in workouts:
+        out.write(",\n  " if count else "\n  ")
+        text = json.dumps(public_fields(workout), indent=2, ensure_ascii=False)
+        out.write(text.replace("\n", "\n  "))
+        count += 1
+    out.write("\n]\n" if count else "]\n")
+    return count
+
+
+def export_cmd(*, output: str | None) -> None:
+    workouts = load_catalog(default_db_path()).workouts
+    if output is None:
+        write_json_export(workouts, sys.stdout)
+        sys.stdout.flush()
+        return
+
+    out_path = Path(output).expanduser()
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with out_path.open("w", encoding="utf-8") as f:
+        count = write_json_export(workouts, f)
+
+    from .output import console
+
+    console.print(f"Export: {count} Workouts → {out_path}")
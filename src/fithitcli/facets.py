@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import json
+import os
+from collections import Counter
+from collections.abc import Iterable
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from .atomic import atomic_open
+from .filters import _to_str_list, norm
+from .schema import SCHEMA_VERSION
+
+if TYPE_CHECKING:
+    from .search import SearchArgs
+
+FACETS_SUFFIX = ".facets"
+FACETS_VERSION = 1
+# Raw workout fields of a facet cell; `equipment_free` is derived.
+CELL_FIELDS = ("category", "duration", "trainer", "body_focus")
+FACET_FIELDS = (*CELL_FIELDS, "equipment_free")
+
+# Present (field, value) pairs plus the equipment-free flag; lists as tuples.
+_Cell = tuple[tuple[tuple[str, Any], ...], bool]
+
+
+def facets_path_for(db_path: Path) -> Path:
+    return db_path.with_name(db_path.name + FACETS_SUFFIX)
+
+
+def _freeze(value: Any) -> Any:
+    return tuple(_freeze(v) for v in value) if isinstance(value, list) else value
+
+
+def _thaw(value: Any) -> Any:
+    return [_thaw(v) for v in value] if isinstance(value, tuple) else value
+
+
+def _cell(workout: dict[str, Any]) -> _Cell:
+    return (
+        tuple(
+            (field, _freeze(workout[field]))
+            for field in CELL_FIELDS
+            if field in workout
+        ),
+        bool(norm(workout, "_is_equipment_free")),
+    )
+
+
+def _cell_workout(cell: _Cell) -> dict[str, Any]:
+    """A stand-in workout with the cell's values, for `search.matches()`."""
+    values, equipment_free = cell
+    workout = {field: _thaw(value) for field, value in values}
+    workout["_is_equipment_free"] = equipment_free
+    return workout
+
+
+def _date(workout: dict[str, Any]) -> str | None:
+    date = workout.get("date")
+    return date if isinstance(date, str) and date else None
+
+
+def _sorted_counts(counts: Counter[str]) -> dict[str, int]:
+    return dict(sorted(counts.items(), key=lambda kv: (-kv[1], kv[0])))
+
+
+class FacetStore:
+    """Workout counts per category × duration × trainer × body focus ×
+    equipment-free cell, plus a histogram of dates.
+
+    `info` reads its summary from here, and `search --facets` counts the
+    cells that match a filter instead of the workouts. Counts are additive,
+    so `add()`/`remove()` keep the store current for changed rows without
+    a rebuild. `parse`/`fetch` write it next to the DB (`<db>.facets`),
+    tied to the DB file's size and mtime.
+    """
+
+    def __init__(
+        self,
+        cells: Counter[_Cell] | None = None,
+        dates: Counter[str] | None = None,
+        *,
+        fingerprint: str | None = None,
+    ) -> None:
+        self.cells: Counter[_Cell] = cells if cells is not None else Counter()
+        self.dates: Counter[str] = dates if dates is not None else Counter()
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def build(cls, workouts: Iterable[dict[str, Any]]) -> FacetStore:
+        store = cls()
+        for workout in workouts:
+            store.add(workout)
+        return store
+
+    @property
+    def total(self) -> int:
+        return sum(self.cells.values())
+
+    def add(self, workout: dict[str, Any]) -> None:
+        self.cells[_cell(workout)] += 1
+        date = _date(workout)
+        if date:
+            self.dates[date] += 1
+
+    def remove(self, workout: dict[str, Any]) -> None:
+        cell = _cell(workout)
+        self.cells[cell] -= 1
+        if self.cells[cell] <= 0:
+            del self.cells[cell]
+        date = _date(workout)
+        if date:
+            self.dates[date] -= 1
+            if self.dates[date] <= 0:
+                del self.dates[date]
+
+    def summary(self) -> dict[str, Any]:
+        """The `info` summary (same as `info._compute_summary()`)."""
+        categories: Counter[str] = Counter()
+        trainers: set[str] = set()
+        durations: set[Any] = set()
+        for (values, _), count in self.cells.items():
+            fields = dict(values)
+            if fields.get("category"):
+                categories[str(_thaw(fields["category"]))] += count
+            trainer = fields.get("trainer")
+            if isinstance(trainer, str) and trainer:
+                trainers.add(trainer)
+            if fields.get("duration"):
+                durations.add(fields["duration"])
+        return {
+            "schema_version": SCHEMA_VERSION,
+            "total_workouts": self.total,
+            "categories": _sorted_counts(categories),
+            "trainers": sorted(trainers),
+            "durations": sorted(durations),
+            "dates": {
+                "min": min(self.dates, default=None),
+                "max": max(self.dates, default=None),
+            },
+        }
+
+    def counts(
+        self, fields: Iterable[str], args: SearchArgs | None = None
+    ) -> dict[str, dict[str, int]] | None:
+        """Workouts per value of each of `fields` among those matching `args`.
+
+        List values count once per element. Returns None if `args` filters
+        on something the cells don't hold (`--search`, `--flow-style`).
+        """
+        if args is not None and (args.search or args.flow_style):
+            return None
+        from .search import matches
+
+        fields = list(fields)
+        result: dict[str, Counter[str]] = {field: Counter() for field in fields}
+        for cell, count in self.cells.items():
+            workout = _cell_workout(cell)
+            if args is not None and not matches(workout, args):
+                continue
+            for field in fields:
+                if field == "equipment_free":
+                    result[field][json.dumps(cell[1])] += count
+                else:
+                    for value in dict.fromkeys(_to_str_list(workout.get(field))):
+                        result[field][value] += count
+        return {field: _sorted_counts(counts) for field, counts in result.items()}
+
+    def save(self, path: Path, db_path: Path) -> None:
+        """Write the store, tied to the current size and mtime of `db_path`."""
+        stat = db_path.stat()
+        with atomic_open(path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "version": FACETS_VERSION,
+                    "fingerprint": self.fingerprint,
+                    "db_mtime_ns": stat.st_mtime_ns,
+                    "db_size": stat.st_size,
+                    "cells": [
+                        {
+                            **{field: _thaw(value) for field, value in values},
+                            "equipment_free": equipment_free,
+                            "count": count,
+                        }
+                        for (values, equipment_free), count in self.cells.items()
+                    ],
+                    "dates": self.dates,
+                },
+                f,
+                ensure_ascii=False,
+                separators=(",", ":"),
+            )
+
+    @classmethod
+    def load(cls, path: Path, db_path: Path) -> FacetStore | None:
+        """The stored facets, or None if missing or not for `db_path` as is."""
+        try:
+            with path.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+            stat = os.stat(db_path)
+        except (OSError, ValueError):
+            return None
+        if (
+            not isinstance(data, dict)
+            or data.get("version") != FACETS_VERSION
+            or data.get("db_mtime_ns") != stat.st_mtime_ns
+            or data.get("db_size") != stat.st_size
+        ):
+            return None
+        try:
+            cells: Counter[_Cell] = Counter()
+            for entry in data["cells"]:
+                count = entry.pop("count")
+                equipment_free = bool(entry.pop("equipment_free"))
+                values = tuple(
+                    (field, _freeze(entry[field]))
+                    for field in CELL_FIELDS
+                    if field in entry
+                )
+                cells[(values, equipment_free)] += count
+            dates = Counter(data["dates"])
+        except (KeyError, TypeError, AttributeError):
+            return None
+        return cls(cells, dates, fingerprint=data.get("fingerprint"))
+
+
+def load_facets(db_path: Path) -> FacetStore | None:
+    return FacetStore.load(facets_path_for(db_path), db_path)
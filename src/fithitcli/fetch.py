@@ -1,23 +1,31 @@
 from __future__ import annotations
 
-import io
+import hashlib
+import http.client
 import json
 import urllib.error
 import urllib.parse
 import urllib.request
-import zipfile
+from dataclasses import asdict, dataclass, fields
+from pathlib import Path
 from typing import Any
 
 import typer
-from rich.console import Console
 
-from .parse import parse_content
-
-console = Console()
+from . import tracing
+from .atomic import atomic_open, writer_lock
+from .incremental import load_source_stamp
+from .output import console
+from .parse import _output_path, parse_dtable
 
 DEFAULT_SEATABLE_EXTERNAL_LINK = (
     "https://cloud.seatable.io/dtable/external-links/d08506897d274835bdab/"
 )
+DOWNLOAD_CHUNK_SIZE = 1 << 16
+DOWNLOAD_RETRIES = 3
+# The last download is kept next to the DB for conditional/resumed fetches.
+DOWNLOAD_SUFFIX = ".download"
+DOWNLOAD_STATE_VERSION = 1
 
 
 def _build_download_url(url: str) -> str:
@@ -45,42 +53,218 @@ def _build_download_url(url: str) -> str:
     )
 
 
-def _download_dtable(download_url: str, timeout: int = 60) -> bytes:
-    req = urllib.request.Request(download_url, headers={"User-Agent": "fithit-cli"})
-    try:
-        with urllib.request.urlopen(req, timeout=timeout) as resp:
-            data = resp.read()
-    except urllib.error.HTTPError as exc:
-        raise typer.BadParameter(
-            f"Download fehlgeschlagen ({exc.code}): {exc.reason}"
-        ) from exc
-    except urllib.error.URLError as exc:
-        raise typer.BadParameter(f"Download fehlgeschlagen: {exc.reason}") from exc
+@dataclass
+class DownloadState:
+    """What the spool file holds: source URL, validators, progress, hashes.
+
+    Stored as `<spool>.json` next to the spool; `parsed` is the sha256 of
+    the spool content last parsed into the DB.
+    """
+
+    url: str | None = None
+    etag: str | None = None
+    last_modified: str | None = None
+    size: int = 0
+    total: int | None = None
+    complete: bool = False
+    sha256: str | None = None
+    parsed: str | None = None
+
+    @classmethod
+    def load(cls, path: Path) -> DownloadState:
+        try:
+            with path.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls()
+        if not isinstance(data, dict) or data.get("version") != DOWNLOAD_STATE_VERSION:
+            return cls()
+        values = {f.name: data.get(f.name) for f in fields(cls)}
+        try:
+            values["size"] = int(values["size"] or 0)
+        except (TypeError, ValueError):
+            return cls()
+        values["complete"] = bool(values["complete"])
+        return cls(**values)
+
+    def save(self, path: Path) -> None:
+        with atomic_open(path, "w", encoding="utf-8") as f:
+            json.dump({"version": DOWNLOAD_STATE_VERSION, **asdict(self)}, f)
+
+    def restart(self, url: str) -> None:
+        self.url = url
+        self.etag = self.last_modified = self.sha256 = None
+        self.size = 0
+        self.total = None
+        self.complete = False
+
+
+def download_path_for(db_path: Path) -> Path:
+    return db_path.with_name(db_path.name + DOWNLOAD_SUFFIX)
+
 
-    if not data:
+def download_state_path(spool: Path) -> Path:
+    return spool.with_name(spool.name + ".json")
+
+
+def _hash_file(path: Path, size: int) -> Any:
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        while size > 0 and (chunk := f.read(min(DOWNLOAD_CHUNK_SIZE, size))):
+            digest.update(chunk)
+            size -= len(chunk)
+    return digest
+
+
+def _request_headers(url: str, spool: Path, state: DownloadState) -> dict[str, str]:
+    """Conditional headers for a complete spool, Range for a partial one."""
+    headers = {"User-Agent": "fithit-cli"}
+    on_disk = spool.stat().st_size if spool.exists() else -1
+    if state.url != url or on_disk != state.size:
+        state.restart(url)
+    elif state.complete:
+        if state.etag:
+            headers["If-None-Match"] = state.etag
+        if state.last_modified:
+            headers["If-Modified-Since"] = state.last_modified
+    elif state.size and (state.etag or state.last_modified):
+        headers["Range"] = f"bytes={state.size}-"
+        headers["If-Range"] = state.etag or state.last_modified or ""
+    else:
+        state.restart(url)
+    return headers
+
+
+def _receive(resp: Any, spool: Path, state: DownloadState, state_path: Path) -> None:
+    """Write the body of `resp` to `spool`, appending for a 206 reply."""
+    if resp.status == 206 and state.size:
+        digest = _hash_file(spool, state.size)
+        mode = "ab"
+        content_range = resp.headers.get("Content-Range", "")
+        total = content_range.rpartition("/")[2]
+        state.total = int(total) if total.isdigit() else None
+    else:
+        digest = hashlib.sha256()
+        mode = "wb"
+        state.size = 0
+        length = resp.headers.get("Content-Length")
+        state.total = int(length) if length and length.isdigit() else None
+    state.etag = resp.headers.get("ETag") or state.etag
+    state.last_modified = resp.headers.get("Last-Modified") or state.last_modified
+    state.complete = False
+    state.sha256 = None
+    # Validators go to disk first, so a dropped connection can resume.
+    state.save(state_path)
+
+    received = state.size
+    with spool.open(mode) as f:
+        try:
+            while chunk := resp.read(DOWNLOAD_CHUNK_SIZE):
+                if state.size == 0 and not chunk.startswith(b"PK"):
+                    raise typer.BadParameter("Download ist keine .dtable ZIP-Datei.")
+                f.write(chunk)
+                digest.update(chunk)
+                state.size += len(chunk)
+        finally:
+            f.flush()
+            state.save(state_path)
+            tracing.count("download.bytes", state.size - received)
+    if state.total is not None and state.size < state.total:
+        raise http.client.IncompleteRead(b"", state.total - state.size)
+    if not state.size:
         raise typer.BadParameter("Download leer.")
-    if not data.startswith(b"PK"):
-        raise typer.BadParameter("Download ist keine .dtable ZIP-Datei.")
-    return data
+    state.total = state.size
+    state.complete = True
+    state.sha256 = digest.hexdigest()
+    state.save(state_path)
 
 
-def _load_content_from_zip(data: bytes) -> dict[str, Any]:
-    try:
-        with zipfile.ZipFile(io.BytesIO(data)) as zf:
-            with zf.open("content.json") as f:
-                return json.load(f)
-    except KeyError as exc:
-        raise typer.BadParameter("content.json fehlt in der .dtable Datei.") from exc
-    except zipfile.BadZipFile as exc:
-        raise typer.BadParameter("Download ist kein gültiges ZIP (.dtable).") from exc
+def _download_dtable(
+    download_url: str,
+    spool: Path,
+    state: DownloadState,
+    *,
+    timeout: int = 60,
+    retries: int = DOWNLOAD_RETRIES,
+) -> bool:
+    """Bring `spool` up to date with `download_url`.
 
+    A complete spool is revalidated with If-None-Match/If-Modified-Since; a
+    partial one (from a dropped connection, here or in an earlier run) is
+    continued with a Range request guarded by If-Range. Returns False if the
+    server answered 304, i.e. the spool is already current.
+    """
+    state_path = download_state_path(spool)
+    attempt = 0
+    while True:
+        headers = _request_headers(download_url, spool, state)
+        req = urllib.request.Request(download_url, headers=headers)
+        try:
+            with urllib.request.urlopen(req, timeout=timeout) as resp:
+                _receive(resp, spool, state, state_path)
+            return True
+        except urllib.error.HTTPError as exc:
+            if exc.code == 304 and state.complete:
+                return False
+            if exc.code == 416 and "Range" in headers:
+                state.restart(download_url)
+                continue
+            raise typer.BadParameter(
+                f"Download fehlgeschlagen ({exc.code}): {exc.reason}"
+            ) from exc
+        except (OSError, http.client.HTTPException) as exc:
+            attempt += 1
+            if attempt > retries:
+                reason = getattr(exc, "reason", exc)
+                raise typer.BadParameter(f"Download fehlgeschlagen: {reason}") from exc
+            console.print(
+                f"Verbindung abgebrochen nach {state.size} Bytes, setze fort …"
+            )
 
-def fetch_cmd(*, url: str | None, output: str | None) -> None:
+
+def fetch_cmd(
+    *,
+    url: str | None,
+    output: str | None,
+    incremental: bool = False,
+    link_cache_ttl: float | None = None,
+    link_cache: str | None = None,
+    jobs: int = 1,
+    force: bool = False,
+) -> None:
     external_url = url or DEFAULT_SEATABLE_EXTERNAL_LINK
     download_url = _build_download_url(external_url)
+    out_path = _output_path(output)
+    spool = download_path_for(out_path)
+    state_path = download_state_path(spool)
 
     console.print(f"Download: {download_url}")
-    data = _download_dtable(download_url)
-    content = _load_content_from_zip(data)
-
-    parse_content(content=content, source=download_url, output=output)
+    # The spool has its own lock, so a download can run next to a `parse`
+    # of the same DB; the DB lock is only taken for the parse step below.
+    with writer_lock(spool):
+        state = DownloadState.load(state_path)
+        with tracing.span("download"):
+            changed = _download_dtable(download_url, spool, state)
+        if (
+            not changed
+            and not force
+            and state.parsed == state.sha256
+            and load_source_stamp(out_path) is not None
+        ):
+            console.print("Unverändert (HTTP 304), DB ist aktuell.")
+            return
+        if changed:
+            console.print(f"Geladen: {state.size} Bytes → {spool}")
+        with spool.open("rb") as f, tracing.span("parse"):
+            parse_dtable(
+                f,
+                source=download_url,
+                output=str(out_path),
+                incremental=incremental,
+                link_cache_ttl=link_cache_ttl,
+                link_cache=link_cache,
+                jobs=jobs,
+                force=force,
+            )
+        state.parsed = state.sha256
+        state.save(state_path)
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+from typing import Any
+
+# Equipment values that still count as equipment-free.
+_EQUIPMENT_FREE = frozenset({"mat", "yoga mat", "no equipment", "bodyweight"})
+
+
+def _to_str_list(value: Any) -> list[str]:
+    if value is None:
+        return []
+    if isinstance(value, list):
+        return [str(v).strip() for v in value if v is not None and str(v).strip() != ""]
+    text = str(value).strip()
+    return [text] if text else []
+
+
+def _parse_minutes(value: Any) -> int | None:
+    if value is None:
+        return None
+    text = str(value).strip().lower()
+    if not text:
+        return None
+    digits = "".join(ch for ch in text if ch.isdigit())
+    if not digits:
+        return None
+    try:
+        return int(digits)
+    except ValueError:
+        return None
+
+
+def is_equipment_free(workout: dict[str, Any]) -> bool:
+    equip = _to_str_list(workout.get("equipment"))
+    if equip and any(e.lower() not in _EQUIPMENT_FREE for e in equip):
+        return False
+    dumbbells = _to_str_list(workout.get("dumbbells"))
+    return not any(d.lower() != "bodyweight" for d in dumbbells)
+
+
+def matches_text(workout: dict[str, Any], needle: str) -> bool:
+    desc = (
+        str(workout.get("description", "")) + " " + str(workout.get("name", ""))
+    ).lower()
+    return needle.lower() in desc
+
+
+def _lower_list(field: str) -> Callable[[dict[str, Any]], list[str]]:
+    return lambda workout: [v.lower() for v in _to_str_list(workout.get(field))]
+
+
+# Private companion fields stored in the `.idx` sidecar rows next to the
+# public ones (never in the DB itself): the normalized values the search
+# filters compare against. All keys start with "_" and never appear in
+# search output.
+NORMALIZERS: dict[str, Callable[[dict[str, Any]], Any]] = {
+    "_category_key": lambda workout: str(workout.get("category", "")).lower(),
+    "_duration_key": lambda workout: str(workout.get("duration", "")).lower(),
+    "_duration_minutes": lambda workout: _parse_minutes(workout.get("duration")),
+    "_is_equipment_free": is_equipment_free,
+    "_trainer_keys": _lower_list("trainer"),
+    "_body_focus_keys": _lower_list("body_focus"),
+    "_flow_style_keys": _lower_list("flow_style"),
+}
+
+
+def normalized(workout: dict[str, Any]) -> dict[str, Any]:
+    """All private companion fields of `workout`."""
+    return {key: compute(workout) for key, compute in NORMALIZERS.items()}
+
+
+def norm(workout: dict[str, Any], key: str) -> Any:
+    """Precomputed companion `key` if present, computed on the fly otherwise."""
+    if key in workout:
+        return workout[key]
+    return NORMALIZERS[key](workout)
+
+
+def public_fields(workout: dict[str, Any]) -> dict[str, Any]:
+    """`workout` without private ("_"-prefixed) fields."""
+    if not any(key.startswith("_") for key in workout):
+        return workout
+    return {k: v for k, v in workout.items() if not k.startswith("_")}
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any
+
+from .atomic import atomic_open
+
+ROW_STATE_SUFFIX = ".rows"
+ROW_STATE_VERSION = 1
+SOURCE_SUFFIX = ".source"
+SOURCE_VERSION = 2
+
+# Per row: [_mtime, parsed workout or None, link or None, link verdict or None]
+RowEntry = list[Any]
+
+
+def row_state_path(db_path: Path) -> Path:
+    return db_path.with_name(db_path.name + ROW_STATE_SUFFIX)
+
+
+def columns_fingerprint(columns: list[dict[str, Any]]) -> str:
+    """Hash of a table's column definitions (names, keys, option lists).
+
+    `parse_row` output depends on them, so a change invalidates every cached
+    row of that table.
+    """
+    canonical = json.dumps(
+        columns, sort_keys=True, separators=(",", ":"), ensure_ascii=False
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def content_fingerprint(
+    tables: Iterable[tuple[Any, Any, Iterable[Any]]], *, salt: str = ""
+) -> str:
+    """Hash of `(name, columns, rows)` tables, each value as canonical JSON.
+
+    Key order and whitespace of the export don't matter; table and row order
+    do, since they decide the order of the parsed workouts.
+    """
+    digest = hashlib.sha256(salt.encode("utf-8"))
+    for name, columns, rows in tables:
+        digest.update(b"\x1e" + _canonical([name, columns]))
+        for row in rows:
+            digest.update(b"\n" + _canonical(row))
+    return digest.hexdigest()
+
+
+def _canonical(value: Any) -> bytes:
+    return json.dumps(
+        value, sort_keys=True, separators=(",", ":"), ensure_ascii=False
+    ).encode("utf-8")
+
+
+def source_path_for(db_path: Path) -> Path:
+    return db_path.with_name(db_path.name + SOURCE_SUFFIX)
+
+
+def source_stamp(
+    db_file: Path, content_fp: str, raw_fp: str | None = None
+) -> dict[str, Any]:
+    """Sidecar content tying the export's fingerprints to `db_file` as is.
+
+    `content_fp` covers the relevant tables (`content_fingerprint`); `raw_fp`,
+    if known, the export's bytes, so a byte-identical export is recognized
+    without decoding it.
+    """
+    stat = db_file.stat()
+    return {
+        "version": SOURCE_VERSION,
+        "content": content_fp,
+        "raw": raw_fp,
+        "db_mtime_ns": stat.st_mtime_ns,
+        "db_size": stat.st_size,
+    }
+
+
+def load_source_stamp(db_path: Path) -> dict[str, Any] | None:
+    """The `<db>.source` stamp, or None if missing or not for `db_path` as is."""
+    try:
+        with source_path_for(db_path).open("r", encoding="utf-8") as f:
+            data = json.load(f)
+        stat = os.stat(db_path)
+    except (OSError, ValueError):
+        return None
+    if (
+        not isinstance(data, dict)
+        or data.get("version") != SOURCE_VERSION
+        or data.get("db_mtime_ns") != stat.st_mtime_ns
+        or data.get("db_size") != stat.st_size
+    ):
+        return None
+    return data
+
+
+def save_source_stamp(db_path: Path, stamp: dict[str, Any]) -> None:
+    with atomic_open(source_path_for(db_path), "w", encoding="utf-8") as f:
+        json.dump(stamp, f)
+
+
+class RowState:
+    """Per-row fingerprints (`_id` → `_mtime`) plus the parse result of each row."""
+
+    def __init__(
+        self,
+        tables: dict[str, dict[str, Any]] | None = None,
+        *,
+        fingerprint: str | None = None,
+    ) -> None:
+        self.tables: dict[str, dict[str, Any]] = tables or {}
+        # Fingerprint of the DB written together with this state.
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def load(cls, path: Path) -> RowState:
+        try:
+            with path.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls()
+        if not isinstance(data, dict) or data.get("version") != ROW_STATE_VERSION:
+            return cls()
+        tables = data.get("tables")
+        fingerprint = data.get("fingerprint")
+        return cls(
+            tables if isinstance(tables, dict) else None,
+            fingerprint=fingerprint if isinstance(fingerprint, str) else None,
+        )
+
+    def save(self, path: Path) -> None:
+        with atomic_open(path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "version": ROW_STATE_VERSION,
+                    "fingerprint": self.fingerprint,
+                    "tables": self.tables,
+                },
+                f,
+                ensure_ascii=False,
+                separators=(",", ":"),
+            )
+
+    def rows_for(self, table: str, columns_fp: str) -> dict[str, RowEntry]:
+        """Cached rows of `table`, or nothing if its columns changed since."""
+        entry = self.tables.get(table)
+        if not isinstance(entry, dict) or entry.get("columns") != columns_fp:
+            return {}
+        rows = entry.get("rows")
+        return rows if isinstance(rows, dict) else {}
+
+    def start_table(self, table: str, columns_fp: str) -> dict[str, RowEntry]:
+        rows: dict[str, RowEntry] = {}
+        self.tables[table] = {"columns": columns_fp, "rows": rows}
+        return rows
+
+    def published(self) -> dict[tuple[str, str], RowEntry]:
+        """Rows whose workout made it into the DB (parsed, link not broken)."""
+        rows: dict[tuple[str, str], RowEntry] = {}
+        for table, entry in self.tables.items():
+            table_rows = entry.get("rows") if isinstance(entry, dict) else None
+            if not isinstance(table_rows, dict):
+                continue
+            for row_id, row in table_rows.items():
+                if row[1] is not None and (not row[2] or row[3]):
+                    rows[(table, row_id)] = row
+        return rows
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable
+from typing import TYPE_CHECKING, Any
+
+from .filters import _to_str_list, matches_text, norm
+
+if TYPE_CHECKING:
+    from .search import SearchArgs
+
+# Fields that are matched case-insensitively against the whole value.
+SCALAR_FIELDS = ("category", "duration")
+# Fields that may hold a string or a list of strings; any element may match.
+MULTI_FIELDS = ("trainer", "body_focus", "flow_style", "equipment")
+
+
+def _post(postings: dict[Any, list[int]], key: Any, pos: int) -> None:
+    bucket = postings.get(key)
+    if bucket is None:
+        postings[key] = [pos]
+    elif bucket[-1] != pos:
+        bucket.append(pos)
+
+
+def _union(lists: Iterable[list[int]]) -> list[int]:
+    non_empty = [lst for lst in lists if lst]
+    if not non_empty:
+        return []
+    if len(non_empty) == 1:
+        return non_empty[0]
+    return sorted(set().union(*non_empty))
+
+
+def _intersect(small: list[int], big: list[int]) -> list[int]:
+    out: list[int] = []
+    lo = 0
+    size = len(big)
+    for pos in small:
+        lo = bisect_left(big, pos, lo)
+        if lo == size:
+            break
+        if big[lo] == pos:
+            out.append(pos)
+    return out
+
+
+class SearchIndex:
+    """Inverted index over the filterable workout fields.
+
+    Posting lists hold ascending positions into the workout list, so a query
+    returns workouts in DB order (newest first), exactly like a full scan with
+    `matches()`.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        postings: dict[str, dict[Any, list[int]]],
+        minutes: dict[int, list[int]],
+        equipment_free: list[int],
+    ) -> None:
+        self.size = size
+        self.postings = postings
+        self.minutes = minutes
+        self.equipment_free = equipment_free
+        self._minute_keys = sorted(minutes)
+
+    @classmethod
+    def build(cls, workouts: list[dict[str, Any]]) -> SearchIndex:
+        postings: dict[str, dict[Any, list[int]]] = {
+            field: {} for field in SCALAR_FIELDS + MULTI_FIELDS
+        }
+        minutes: dict[int, list[int]] = {}
+        equipment_free: list[int] = []
+
+        for pos, workout in enumerate(workouts):
+            for field in SCALAR_FIELDS:
+                _post(postings[field], norm(workout, f"_{field}_key"), pos)
+            for field in MULTI_FIELDS:
+                for value in _to_str_list(workout.get(field)):
+                    _post(postings[field], value.lower(), pos)
+
+            dur_min = norm(workout, "_duration_minutes")
+            if dur_min is not None:
+                _post(minutes, dur_min, pos)
+            if norm(workout, "_is_equipment_free"):
+                equipment_free.append(pos)
+
+        return cls(len(workouts), postings, minutes, equipment_free)
+
+    def to_state(self) -> dict[str, Any]:
+        """Plain-data representation (dicts, lists, ints, strings)."""
+        return {
+            "size": self.size,
+            "postings": self.postings,
+            "minutes": self.minutes,
+            "equipment_free": self.equipment_free,
+        }
+
+    @classmethod
+    def from_state(cls, state: dict[str, Any]) -> SearchIndex:
+        return cls(
+            state["size"],
+            state["postings"],
+            state["minutes"],
+            state["equipment_free"],
+        )
+
+    def _lookup(self, field: str, value: str) -> list[int]:
+        return self.postings[field].get(value.lower(), [])
+
+    def query(self, args: SearchArgs) -> list[int]:
+        """Positions matching all structured filters of `args`.
+
+        The free-text `search` filter is not indexed here; see `select()`.
+        """
+        lists: list[list[int]] = []
+
+        if args.category:
+            lists.append(self._lookup("category", args.category))
+        if args.categories:
+            keys = {c.strip().lower() for c in args.categories.split(",")}
+            lists.append(_union(self.postings["category"].get(k, []) for k in keys))
+        if args.duration:
+            lists.append(self._lookup("duration", args.duration))
+        if args.max_duration:
+            upper = bisect_right(self._minute_keys, args.max_duration)
+            lists.append(_union(self.minutes[k] for k in self._minute_keys[:upper]))
+        if args.equipment_free:
+            lists.append(self.equipment_free)
+        if args.trainer:
+            lists.append(self._lookup("trainer", args.trainer))
+        if args.body_focus:
+            lists.append(self._lookup("body_focus", args.body_focus))
+        if args.flow_style:
+            lists.append(self._lookup("flow_style", args.flow_style))
+
+        if not lists:
+            return list(range(self.size))
+
+        lists.sort(key=len)
+        result = lists[0]
+        for other in lists[1:]:
+            if not result:
+                break
+            result = _intersect(result, other)
+        return list(result)
+
+    def select(
+        self, workouts: list[dict[str, Any]], args: SearchArgs
+    ) -> list[dict[str, Any]]:
+        """Workouts matching `args`; same result and order as `matches()`."""
+        positions = self.query(args)
+        if args.search:
+            return [
+                workouts[pos]
+                for pos in positions
+                if matches_text(workouts[pos], args.search)
+            ]
+        return [workouts[pos] for pos in positions]
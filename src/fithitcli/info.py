@@ -1,44 +1,32 @@
 from __future__ import annotations
 
-import json
-import os
 from collections import Counter
+from collections.abc import Sequence
 from pathlib import Path
 from typing import Any
 
 import typer
-from rich.console import Console
-from rich.table import Table
 
+from . import tracing
+from .db import default_db_path, load_catalog
+from .facets import load_facets
+from .output import console, print_json
+from .querycache import query_cache_info
 from .schema import SCHEMA_VERSION
+from .store import WorkoutStore
 
-console = Console()
 
+def _load(db_path: Path) -> Sequence[dict[str, Any]]:
+    return load_catalog(db_path).workouts
 
-def _default_db_path() -> Path:
-    env = os.environ.get("FITHIT_DB_PATH")
-    if env:
-        return Path(env).expanduser()
-    xdg_data_home = os.environ.get("XDG_DATA_HOME")
-    base = (
-        Path(xdg_data_home).expanduser()
-        if xdg_data_home
-        else (Path.home() / ".local" / "share")
-    )
-    return base / "fithit" / "workouts.json"
-
-
-def _load(db_path: Path) -> list[dict[str, Any]]:
-    if not db_path.exists():
-        raise typer.BadParameter(
-            f"Datenbank nicht gefunden: {db_path}\n"
-            "Tipp: `fithit parse <dtable>` ausführen oder FITHIT_DB_PATH setzen."
-        )
-    with db_path.open("r", encoding="utf-8") as f:
-        return json.load(f)
 
-
-def _compute_summary(workouts: list[dict[str, Any]]) -> dict[str, Any]:
+def _compute_summary(
+    workouts: Sequence[dict[str, Any]],
+) -> dict[str, Any]:
+    if isinstance(workouts, WorkoutStore):
+        return _compute_store_summary(workouts)
+    if not isinstance(workouts, list):
+        workouts = list(workouts)
     categories = Counter(str(w.get("category")) for w in workouts if w.get("category"))
     trainers = sorted(
         {
@@ -48,27 +36,59 @@ def _compute_summary(workouts: list[dict[str, Any]]) -> dict[str, Any]:
         }
     )
     durations = sorted({w.get("duration") for w in workouts if w.get("duration")})
+    dates = [d for w in workouts if isinstance(d := w.get("date"), str) and d]
     return {
         "schema_version": SCHEMA_VERSION,
         "total_workouts": len(workouts),
         "categories": dict(sorted(categories.items(), key=lambda kv: (-kv[1], kv[0]))),
         "trainers": trainers,
         "durations": durations,
+        "dates": {"min": min(dates, default=None), "max": max(dates, default=None)},
+    }
+
+
+def _compute_store_summary(store: WorkoutStore) -> dict[str, Any]:
+    """`_compute_summary` from the value tables, without touching rows."""
+    categories: Counter[str] = Counter()
+    for value, count in store.value_counts("category").items():
+        if value:
+            categories[str(list(value) if isinstance(value, tuple) else value)] += count
+    trainers = sorted(
+        v for v in store.value_counts("trainer") if isinstance(v, str) and v
+    )
+    durations = sorted(v for v in store.value_counts("duration") if v)
+    dates = [v for v in store.value_counts("date") if isinstance(v, str) and v]
+    return {
+        "schema_version": SCHEMA_VERSION,
+        "total_workouts": len(store),
+        "categories": dict(sorted(categories.items(), key=lambda kv: (-kv[1], kv[0]))),
+        "trainers": trainers,
+        "durations": durations,
+        "dates": {"min": min(dates, default=None), "max": max(dates, default=None)},
     }
 
 
 def info_cmd(*, format: str = "compact") -> None:
-    db_path = _default_db_path()
-    workouts = _load(db_path)
-    summary = _compute_summary(workouts)
+    db_path = default_db_path()
+    with tracing.span("load"):
+        facets = load_facets(db_path)
+        workouts = _load(db_path) if facets is None else None
+    with tracing.span("summary"):
+        if facets is not None:
+            summary = facets.summary()
+        else:
+            summary = _compute_summary(workouts)
+    summary["query_cache"] = query_cache_info(db_path)
 
     fmt = (format or "compact").lower()
     if fmt == "json":
-        console.print_json(json.dumps(summary, ensure_ascii=False, indent=2))
+        print_json(summary)
         return
     if fmt != "compact":
         raise typer.BadParameter("--format muss 'compact' oder 'json' sein")
 
+    from rich.table import Table
+
     console.print(f"DB: {db_path}")
     console.print(f"Schema: v{SCHEMA_VERSION}")
     console.print(f"Total: {summary['total_workouts']}\n")
@@ -87,3 +107,10 @@ def info_cmd(*, format: str = "compact") -> None:
     console.print(
         f"Durations ({len(summary['durations'])}): {', '.join(summary['durations'])}"
     )
+    dates = summary["dates"]
+    if dates["min"]:
+        console.print(f"Zeitraum: {dates['min']} – {dates['max']}")
+    cache = summary["query_cache"]
+    console.print(
+        f"Query-Cache: {cache['hits']} Treffer, {cache['misses']} Fehlschläge"
+    )
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from .atomic import atomic_open
+
+LINK_CACHE_SUFFIX = ".links"
+LINK_CACHE_VERSION = 1
+LINK_CACHE_TTL_HOURS = 7 * 24.0
+
+
+@dataclass
+class LinkResult:
+    ok: bool
+    status: int | None = None
+    etag: str | None = None
+    last_modified: str | None = None
+
+
+def link_cache_path_for(db_path: Path) -> Path:
+    return db_path.with_name(db_path.name + LINK_CACHE_SUFFIX)
+
+
+class LinkCache:
+    """On-disk link-check results with TTL and HTTP validators.
+
+    Only working links are served from the cache while fresh; broken links are
+    always checked again so a transient outage cannot hide a workout for the
+    whole TTL. Stale entries with an ETag/Last-Modified are revalidated with a
+    conditional request instead of a full GET.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        ttl_seconds: float,
+        entries: dict[str, dict[str, Any]] | None = None,
+    ) -> None:
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.entries: dict[str, dict[str, Any]] = entries or {}
+        self._stored: set[str] = set()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: Path, ttl_seconds: float) -> LinkCache:
+        try:
+            with path.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls(path, ttl_seconds)
+        if not isinstance(data, dict) or data.get("version") != LINK_CACHE_VERSION:
+            return cls(path, ttl_seconds)
+        links = data.get("links")
+        return cls(path, ttl_seconds, links if isinstance(links, dict) else None)
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with atomic_open(self.path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"version": LINK_CACHE_VERSION, "links": self.entries},
+                f,
+                ensure_ascii=False,
+                separators=(",", ":"),
+            )
+
+    def fresh(self, links: Iterable[str], *, now: float | None = None) -> set[str]:
+        """Links known to work whose entry is younger than the TTL."""
+        now = time.time() if now is None else now
+        result: set[str] = set()
+        for link in links:
+            entry = self.entries.get(link)
+            if (
+                entry
+                and entry.get("ok")
+                and now - float(entry.get("checked_at", 0)) < self.ttl_seconds
+            ):
+                result.add(link)
+        return result
+
+    def revalidatable(self, link: str) -> dict[str, Any] | None:
+        """The entry of a working link that carries ETag/Last-Modified."""
+        entry = self.entries.get(link)
+        if (
+            entry
+            and entry.get("ok")
+            and (entry.get("etag") or entry.get("last_modified"))
+        ):
+            return entry
+        return None
+
+    def store(self, link: str, result: LinkResult) -> None:
+        with self._lock:
+            self._stored.add(link)
+            self.entries[link] = {
+                "ok": result.ok,
+                "status": result.status,
+                "checked_at": time.time(),
+                "etag": result.etag,
+                "last_modified": result.last_modified,
+            }
+
+    def record(self, verdicts: dict[str, bool]) -> None:
+        """Store verdicts that did not come through `checker()`."""
+        now = time.time()
+        with self._lock:
+            for link, ok in verdicts.items():
+                if link not in self._stored:
+                    self.entries[link] = {"ok": ok, "checked_at": now}
+
+    def checker(
+        self,
+        probe: Callable[[str, int], LinkResult],
+        revalidate: Callable[[str, int, dict[str, Any]], LinkResult | None],
+    ) -> Callable[[str, int], bool]:
+        """A `checker` for `_validate_links` that fills the cache as it goes."""
+
+        def check(link: str, timeout: int) -> bool:
+            entry = self.revalidatable(link)
+            result = revalidate(link, timeout, entry) if entry else None
+            if result is None:
+                result = probe(link, timeout)
+            self.store(link, result)
+            return result.ok
+
+        return check
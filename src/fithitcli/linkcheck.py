@@ -0,0 +1,430 @@
+from __future__ import annotations
+
+import asyncio
+import email.utils
+import ssl
+import string
+import time
+import urllib.parse
+from collections.abc import AsyncIterator, Iterable
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+from .linkcache import LinkResult
+
+if TYPE_CHECKING:
+    from .linkcache import LinkCache
+
+RETRYABLE_HTTP_STATUS_CODES = {429, 500, 502, 503, 504}
+# Replies that make a host space out its request starts.
+THROTTLE_STATUS_CODES = {429, 503}
+LINK_CHECK_PER_HOST = 6
+# Gap between request starts after the first throttle reply; it doubles with
+# every further one up to the maximum and halves again with each success.
+LINK_CHECK_BACKOFF_SECONDS = 0.05
+LINK_CHECK_MAX_BACKOFF_SECONDS = 2.0
+LINK_CHECK_MAX_REDIRECTS = 5
+MAX_RETRY_AFTER_SECONDS = 60.0
+# Probes started but not finished; a fed link waits for a free slot.
+LINK_CHECK_MAX_PENDING = 256
+
+REDIRECT_STATUS_CODES = {301, 302, 303, 307, 308}
+# Servers (and CDNs) that refuse HEAD get a one-byte ranged GET instead.
+HEAD_FALLBACK_STATUS_CODES = {403, 405, 501}
+# Bodies up to this size are drained to keep the connection alive.
+MAX_DRAIN_BYTES = 1 << 16
+USER_AGENT = "fithit-cli"
+
+_SAFE_TARGET_CHARS = string.punctuation.replace('"', "").replace("<", "")
+
+
+class _ProtocolError(Exception):
+    """The peer sent something that is not a usable HTTP/1.x response."""
+
+
+@dataclass
+class _Response:
+    status: int
+    headers: dict[str, str]
+
+
+class _Connection:
+    """One keep-alive HTTP/1.1 connection."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.reusable = True
+
+    async def request(self, method: str, target: str, headers: dict[str, str]):
+        lines = [f"{method} {target} HTTP/1.1"]
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        await self.writer.drain()
+
+        while True:
+            response = await self._read_head()
+            if not 100 <= response.status < 200:
+                break
+        if method == "HEAD" or response.status in (204, 304):
+            return response
+        await self._drain_body(response.headers)
+        return response
+
+    async def _read_head(self) -> _Response:
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionResetError("connection closed by peer")
+        parts = status_line.decode("latin-1").split(None, 2)
+        if len(parts) < 2 or not parts[0].startswith("HTTP/"):
+            raise _ProtocolError(f"invalid status line: {status_line!r}")
+        try:
+            status = int(parts[1])
+        except ValueError as exc:
+            raise _ProtocolError(f"invalid status: {parts[1]!r}") from exc
+
+        headers: dict[str, str] = {}
+        for _ in range(200):
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        else:
+            raise _ProtocolError("too many headers")
+
+        connection = headers.get("connection", "").lower()
+        if connection == "close" or (
+            parts[0] == "HTTP/1.0" and connection != "keep-alive"
+        ):
+            self.reusable = False
+        return _Response(status, headers)
+
+    async def _drain_body(self, headers: dict[str, str]) -> None:
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            drained = 0
+            while True:
+                size_line = await self.reader.readline()
+                try:
+                    size = int(size_line.split(b";", 1)[0].strip(), 16)
+                except ValueError as exc:
+                    raise _ProtocolError("invalid chunk size") from exc
+                if size == 0:
+                    while (await self.reader.readline()) not in (b"\r\n", b"\n", b""):
+                        pass
+                    return
+                drained += size
+                if drained > MAX_DRAIN_BYTES:
+                    self.reusable = False
+                    return
+                await self.reader.readexactly(size + 2)
+        length = headers.get("content-length")
+        if length is not None and length.isdigit() and int(length) <= MAX_DRAIN_BYTES:
+            await self.reader.readexactly(int(length))
+        else:
+            # Unknown or large body: never read it, just drop the connection.
+            self.reusable = False
+
+    async def close(self) -> None:
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except (OSError, ssl.SSLError):
+            pass
+
+
+@dataclass
+class _Host:
+    semaphore: asyncio.Semaphore
+    interval: float
+    idle: list[_Connection] = field(default_factory=list)
+    next_start: float = 0.0
+    blocked_until: float = 0.0
+    backoff: float = 0.0
+
+    async def wait_turn(self) -> None:
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        start = max(now, self.next_start, self.blocked_until)
+        self.next_start = start + max(self.interval, self.backoff)
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    def block(self, seconds: float) -> None:
+        until = asyncio.get_running_loop().time() + seconds
+        self.blocked_until = max(self.blocked_until, until)
+
+    def slow_down(self) -> None:
+        self.backoff = min(
+            max(self.backoff * 2, LINK_CHECK_BACKOFF_SECONDS),
+            LINK_CHECK_MAX_BACKOFF_SECONDS,
+        )
+
+    def recover(self) -> None:
+        if self.backoff:
+            half = self.backoff / 2
+            self.backoff = half if half >= LINK_CHECK_BACKOFF_SECONDS else 0.0
+
+
+def _retry_after(value: str | None) -> float | None:
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        seconds = float(value)
+    else:
+        try:
+            when = email.utils.parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        seconds = when.timestamp() - time.time()
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER_SECONDS)
+
+
+async def _batches(links: Iterable[str]) -> AsyncIterator[list[str]]:
+    """`links` in one batch, or a `LinkFeed`'s links as they are fed."""
+    take = getattr(links, "take", None)
+    if take is None:
+        yield list(links)
+        return
+    loop = asyncio.get_running_loop()
+    while batch := await loop.run_in_executor(None, take):
+        yield batch
+
+
+class AsyncLinkChecker:
+    """Batch link checker on asyncio with per-host keep-alive connections.
+
+    Links are checked with HEAD (a one-byte ranged GET where HEAD is refused),
+    redirects are followed, and every host gets at most `per_host` parallel
+    connections. Request starts are unthrottled unless `rate` caps them per
+    second; a 429 or 503 makes the host back off (pausing it for Retry-After,
+    spacing out its requests until it answers normally again). With a
+    `cache`, cached validators turn the HEAD into a conditional request and
+    every result is stored back.
+
+    Usable as `checker` for `_validate_links`, which hands it the links
+    through `check_all`: a collection, or a `LinkFeed` whose links are
+    probed as they arrive (at most `LINK_CHECK_MAX_PENDING` at a time).
+    """
+
+    def __init__(
+        self,
+        *,
+        per_host: int = LINK_CHECK_PER_HOST,
+        rate: float | None = None,
+        retries: int = 2,
+        max_redirects: int = LINK_CHECK_MAX_REDIRECTS,
+        cache: LinkCache | None = None,
+    ) -> None:
+        self.per_host = per_host
+        self.interval = 1.0 / rate if rate else 0.0
+        self.retries = retries
+        self.max_redirects = max_redirects
+        self.cache = cache
+        self.connections_opened = 0
+        self._hosts: dict[tuple[str, str, int], _Host] = {}
+        self._ssl: ssl.SSLContext | None = None
+
+    def __call__(self, link: str, timeout: int) -> bool:
+        return self.check_all([link], timeout)[link]
+
+    def check_all(self, links: Iterable[str], timeout: float) -> dict[str, bool]:
+        return {link: r.ok for link, r in self.probe_all(links, timeout).items()}
+
+    def probe_all(self, links: Iterable[str], timeout: float) -> dict[str, LinkResult]:
+        return asyncio.run(self._probe_all(links, timeout))
+
+    async def _probe_all(
+        self, links: Iterable[str], timeout: float
+    ) -> dict[str, LinkResult]:
+        self._hosts = {}
+        pending = asyncio.Semaphore(LINK_CHECK_MAX_PENDING)
+
+        async def probe(link: str) -> LinkResult:
+            try:
+                return await self._probe(link, timeout)
+            finally:
+                pending.release()
+
+        tasks: dict[str, asyncio.Task[LinkResult]] = {}
+        try:
+            async for batch in _batches(links):
+                for link in batch:
+                    if link not in tasks:
+                        await pending.acquire()
+                        tasks[link] = asyncio.create_task(probe(link))
+            outcomes = await asyncio.gather(*tasks.values(), return_exceptions=True)
+        finally:
+            for host in self._hosts.values():
+                for conn in host.idle:
+                    await conn.close()
+            self._hosts = {}
+
+        results: dict[str, LinkResult] = {}
+        for link, outcome in zip(tasks, outcomes):
+            result = outcome if isinstance(outcome, LinkResult) else LinkResult(False)
+            results[link] = result
+            if self.cache is not None:
+                self.cache.store(link, result)
+        return results
+
+    async def _probe(self, link: str, timeout: float) -> LinkResult:
+        parts = urllib.parse.urlsplit(link)
+        if parts.scheme.lower() not in {"http", "https"}:
+            return LinkResult(ok=True)
+        entry = self.cache.revalidatable(link) if self.cache is not None else None
+
+        status: int | None = None
+        for attempt in range(self.retries + 1):
+            try:
+                result = await self._follow(link, timeout, entry)
+            except (
+                OSError,
+                TimeoutError,
+                asyncio.IncompleteReadError,
+                _ProtocolError,
+                ValueError,
+            ):
+                result = None
+            if result is not None:
+                status = result.status
+                if result.ok or status not in RETRYABLE_HTTP_STATUS_CODES:
+                    return result
+            if attempt < self.retries:
+                # A 429/503 already made the host back off.
+                await asyncio.sleep(0.25 * (2**attempt))
+        return LinkResult(ok=False, status=status)
+
+    async def _follow(
+        self, url: str, timeout: float, entry: dict[str, Any] | None
+    ) -> LinkResult:
+        conditional: dict[str, str] = {}
+        if entry:
+            if entry.get("etag"):
+                conditional["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                conditional["If-Modified-Since"] = entry["last_modified"]
+
+        for _ in range(self.max_redirects + 1):
+            response = await self._request("HEAD", url, timeout, conditional)
+            ranged = response.status in HEAD_FALLBACK_STATUS_CODES
+            if ranged:
+                response = await self._request(
+                    "GET", url, timeout, {"Range": "bytes=0-0"}
+                )
+            location = response.headers.get("location")
+            if response.status in REDIRECT_STATUS_CODES and location:
+                url = urllib.parse.urljoin(url, location)
+                conditional = {}
+                continue
+            break
+        else:
+            return LinkResult(ok=False, status=response.status)
+
+        status = response.status
+        ok = status < 400 or (ranged and status == 416)
+        if not ok:
+            return LinkResult(ok=False, status=status)
+        etag = response.headers.get("etag")
+        last_modified = response.headers.get("last-modified")
+        if status == 304 and entry:
+            etag = etag or entry.get("etag")
+            last_modified = last_modified or entry.get("last_modified")
+        return LinkResult(True, status, etag, last_modified)
+
+    def _host(self, key: tuple[str, str, int]) -> _Host:
+        host = self._hosts.get(key)
+        if host is None:
+            host = _Host(asyncio.Semaphore(self.per_host), self.interval)
+            self._hosts[key] = host
+        return host
+
+    async def _connect(self, scheme: str, hostname: str, port: int) -> _Connection:
+        tls: ssl.SSLContext | None = None
+        if scheme == "https":
+            if self._ssl is None:
+                self._ssl = ssl.create_default_context()
+            tls = self._ssl
+        reader, writer = await asyncio.open_connection(
+            hostname, port, ssl=tls, server_hostname=hostname if tls else None
+        )
+        self.connections_opened += 1
+        return _Connection(reader, writer)
+
+    async def _request(
+        self, method: str, url: str, timeout: float, extra: dict[str, str]
+    ) -> _Response:
+        parts = urllib.parse.urlsplit(url)
+        scheme = parts.scheme.lower()
+        if scheme not in {"http", "https"} or not parts.hostname:
+            raise ValueError(f"unsupported URL: {url}")
+        default_port = 443 if scheme == "https" else 80
+        port = parts.port or default_port
+        hostname = parts.hostname.encode("idna").decode("ascii")
+        target = urllib.parse.quote(
+            urllib.parse.urlunsplit(("", "", parts.path or "/", parts.query, "")),
+            safe=_SAFE_TARGET_CHARS,
+        )
+        headers = {
+            "Host": hostname if port == default_port else f"{hostname}:{port}",
+            "User-Agent": USER_AGENT,
+            "Accept": "*/*",
+            "Accept-Encoding": "identity",
+            **extra,
+        }
+
+        host = self._host((scheme, hostname, port))
+        async with host.semaphore:
+            await host.wait_turn()
+            response = await asyncio.wait_for(
+                self._send(host, scheme, hostname, port, method, target, headers),
+                timeout,
+            )
+        if response.status in THROTTLE_STATUS_CODES:
+            delay = _retry_after(response.headers.get("retry-after"))
+            if delay:
+                host.block(delay)
+            host.slow_down()
+        else:
+            host.recover()
+        return response
+
+    async def _send(
+        self,
+        host: _Host,
+        scheme: str,
+        hostname: str,
+        port: int,
+        method: str,
+        target: str,
+        headers: dict[str, str],
+    ) -> _Response:
+        while host.idle:
+            conn = host.idle.pop()
+            try:
+                response = await conn.request(method, target, headers)
+            except (OSError, asyncio.IncompleteReadError, _ProtocolError):
+                # The server closed the idle connection; try the next one.
+                conn.writer.close()
+                continue
+            except BaseException:
+                conn.writer.close()
+                raise
+            self._release(host, conn)
+            return response
+
+        conn = await self._connect(scheme, hostname, port)
+        try:
+            response = await conn.request(method, target, headers)
+        except BaseException:
+            conn.writer.close()
+            raise
+        self._release(host, conn)
+        return response
+
+    def _release(self, host: _Host, conn: _Connection) -> None:
+        if conn.reusable and not conn.reader.at_eof():
+            host.idle.append(conn)
+        else:
+            conn.writer.close()
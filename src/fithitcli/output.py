@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import json
+import sys
+from collections.abc import Iterable
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from rich.console import Console
+
+
+@lru_cache(maxsize=1)
+def get_console() -> Console:
+    from rich.console import Console
+
+    return Console()
+
+
+class _LazyConsole:
+    """Module-level stand-in so `rich` is only imported on first use."""
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(get_console(), name)
+
+
+console: Console = _LazyConsole()  # type: ignore[assignment]
+
+
+def print_json(payload: Any) -> None:
+    """Write `payload` as indented JSON to stdout, bypassing rich."""
+    out = sys.stdout
+    out.write(json.dumps(payload, ensure_ascii=False, indent=2))
+    out.write("\n")
+    out.flush()
+
+
+def print_json_lines(payloads: Iterable[Any]) -> None:
+    """Write each payload as one compact JSON line as it is produced (NDJSON)."""
+    out = sys.stdout
+    dumps = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+    for payload in payloads:
+        out.write(dumps(payload))
+        out.write("\n")
+    out.flush()
+
+
+def print_json_line(payload: Any) -> None:
+    """Write `payload` as one compact JSON line to stdout and flush it."""
+    out = sys.stdout
+    out.write(json.dumps(payload, ensure_ascii=False, separators=(",", ":")))
+    out.write("\n")
+    out.flush()
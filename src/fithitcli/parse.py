@@ -1,20 +1,44 @@
 from __future__ import annotations
 
 import concurrent.futures
+import hashlib
 import json
-import os
+import threading
 import time
 import urllib.error
 import urllib.parse
 import urllib.request
 import zipfile
+from collections import deque
+from collections.abc import Iterable, Iterator
+from itertools import islice
 from pathlib import Path
-from typing import Any, Callable
+from typing import IO, Any, Callable
 
 import typer
-from rich.console import Console
 
-console = Console()
+from . import __version__, tracing
+from .atomic import generation, writer_lock
+from .db import backend_for, default_db_path, write_index
+from .facets import FacetStore, facets_path_for, load_facets
+from .incremental import (
+    RowEntry,
+    RowState,
+    columns_fingerprint,
+    content_fingerprint,
+    load_source_stamp,
+    row_state_path,
+    save_source_stamp,
+    source_path_for,
+    source_stamp,
+)
+from .linkcache import LinkCache, LinkResult, link_cache_path_for
+from .linkcheck import RETRYABLE_HTTP_STATUS_CODES, AsyncLinkChecker
+from .output import console
+from .pipeline import LinkCheckStage
+from .querycache import clear_query_cache, query_cache_dir_for
+from .schema import SCHEMA_VERSION
+from .stream import StreamError, iter_tables
 
 RELEVANT_TABLES = [
     "Strength",
@@ -31,20 +55,17 @@ RELEVANT_TABLES = [
 LINK_CHECK_TIMEOUT_SECONDS = 10
 LINK_CHECK_MAX_WORKERS = 16
 LINK_CHECK_RETRIES = 2
-RETRYABLE_HTTP_STATUS_CODES = {429, 500, 502, 503, 504}
-
-
-def _default_db_path() -> Path:
-    env = os.environ.get("FITHIT_DB_PATH")
-    if env:
-        return Path(env).expanduser()
-    xdg_data_home = os.environ.get("XDG_DATA_HOME")
-    base = (
-        Path(xdg_data_home).expanduser()
-        if xdg_data_home
-        else (Path.home() / ".local" / "share")
-    )
-    return base / "fithit" / "workouts.json"
+# Rows per work item when parsing with --jobs.
+PARSE_CHUNK_ROWS = 1000
+# Written next to the DB in the same generation.
+SUMMARY_NAME = "summary.json"
+
+# (workout or None, link or None, row state entry) per kept row while streaming
+_ParsedRow = tuple[dict[str, Any] | None, str | None, RowEntry]
+# (link or None, workout or None) of one freshly parsed row
+_RowResult = tuple[str | None, dict[str, Any] | None]
+# (row _id, row _mtime, reusable row state entry or None) per streamed row
+_RowPlan = tuple[Any, Any, RowEntry | None]
 
 
 def _extract_link_value(row: dict[str, Any], link_keys: list[str]) -> str | None:
@@ -61,13 +82,30 @@ def _extract_link_value(row: dict[str, Any], link_keys: list[str]) -> str | None
     return None
 
 
-def _check_link_works(link: str, timeout: int) -> bool:
+def _link_keys(columns: list[dict[str, Any]]) -> list[str]:
+    return [
+        col.get("key")
+        for col in columns
+        if str(col.get("name", "")).strip().lower() == "link"
+        and isinstance(col.get("key"), str)
+    ]
+
+
+def _validators(headers: Any) -> tuple[str | None, str | None]:
+    if headers is None:
+        return None, None
+    return headers.get("ETag"), headers.get("Last-Modified")
+
+
+def _probe_link(link: str, timeout: int) -> LinkResult:
+    """GET `link` (with retries) and report status plus cache validators."""
     parsed = urllib.parse.urlparse(link)
     if parsed.scheme.lower() not in {"http", "https"}:
         # Unsupported schemes cannot be checked via urllib HTTP requests.
-        return True
+        return LinkResult(ok=True)
 
     attempts = LINK_CHECK_RETRIES + 1
+    status: int | None = None
     for attempt in range(attempts):
         req = urllib.request.Request(link, headers={"User-Agent": "fithit-cli"})
         try:
@@ -80,41 +118,93 @@ def _check_link_works(link: str, timeout: int) -> bool:
                     ):
                         time.sleep(0.25 * (2**attempt))
                         continue
-                    return False
-                return True
+                    return LinkResult(ok=False, status=status)
+                etag, last_modified = _validators(getattr(resp, "headers", None))
+                return LinkResult(True, status, etag, last_modified)
         except urllib.error.HTTPError as exc:
+            status = exc.code
             if (
                 exc.code in RETRYABLE_HTTP_STATUS_CODES
                 and attempt < LINK_CHECK_RETRIES
             ):
                 time.sleep(0.25 * (2**attempt))
                 continue
-            return False
+            return LinkResult(ok=False, status=status)
         except urllib.error.URLError:
             if attempt < LINK_CHECK_RETRIES:
                 time.sleep(0.25 * (2**attempt))
                 continue
-            return False
+            return LinkResult(ok=False)
         except ValueError:
-            return False
+            return LinkResult(ok=False)
+
+    return LinkResult(ok=False, status=status)
 
-    return False
+
+def _check_link_works(link: str, timeout: int) -> bool:
+    return _probe_link(link, timeout).ok
+
+
+def _revalidate_link(
+    link: str, timeout: int, entry: dict[str, Any]
+) -> LinkResult | None:
+    """Conditional HEAD for a cached link; None means "fall back to a GET"."""
+    headers = {"User-Agent": "fithit-cli"}
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    req = urllib.request.Request(link, headers=headers, method="HEAD")
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            status = getattr(resp, "status", None) or resp.getcode()
+            if not isinstance(status, int) or status >= 400:
+                return None
+            etag, last_modified = _validators(getattr(resp, "headers", None))
+            return LinkResult(True, status, etag, last_modified)
+    except urllib.error.HTTPError as exc:
+        if exc.code == 304:
+            etag, last_modified = _validators(exc.headers)
+            return LinkResult(
+                True,
+                304,
+                etag or entry.get("etag"),
+                last_modified or entry.get("last_modified"),
+            )
+        if exc.code in (404, 410):
+            return LinkResult(ok=False, status=exc.code)
+        # HEAD not allowed, rate limited, server error, ...: let GET decide.
+        return None
+    except (urllib.error.URLError, ValueError):
+        return None
 
 
 def _validate_links(
-    links: set[str],
+    links: Iterable[str],
     *,
     timeout: int,
     checker: Callable[[str, int], bool],
 ) -> dict[str, bool]:
+    """Check `links` (a set or a `LinkFeed`); checkers with `check_all` get
+    them all at once, plain callables run on a thread pool as links arrive."""
     results: dict[str, bool] = {}
     if not links:
         return results
 
+    check_all = getattr(checker, "check_all", None)
+    if check_all is not None:
+        return check_all(links, timeout)
+
+    slots = threading.BoundedSemaphore(4 * LINK_CHECK_MAX_WORKERS)
     with concurrent.futures.ThreadPoolExecutor(
-        max_workers=min(max(len(links), 1), LINK_CHECK_MAX_WORKERS)
+        max_workers=LINK_CHECK_MAX_WORKERS
     ) as executor:
-        futures = {executor.submit(checker, link, timeout): link for link in links}
+        futures: dict[concurrent.futures.Future[bool], str] = {}
+        for link in links:
+            slots.acquire()
+            future = executor.submit(checker, link, timeout)
+            future.add_done_callback(lambda _: slots.release())
+            futures[future] = link
         for future in concurrent.futures.as_completed(futures):
             link = futures[future]
             try:
@@ -124,11 +214,34 @@ def _validate_links(
     return results
 
 
+def _link_check_stage(cache: LinkCache | None = None) -> LinkCheckStage:
+    """Link checks on a worker thread, fed while rows are still being parsed."""
+    checker = _make_checker(cache)
+    return LinkCheckStage(
+        lambda links: _validate_links(
+            links, timeout=LINK_CHECK_TIMEOUT_SECONDS, checker=checker
+        )
+    )
+
+
+def _threaded_checker(cache: LinkCache | None) -> Callable[[str, int], bool]:
+    if cache is None:
+        return _check_link_works
+    return cache.checker(_probe_link, _revalidate_link)
+
+
+def _make_checker(cache: LinkCache | None = None) -> Callable[[str, int], bool]:
+    """The asyncio engine, or urllib threads when a proxy is configured."""
+    if urllib.request.getproxies():
+        return _threaded_checker(cache)
+    return AsyncLinkChecker(retries=LINK_CHECK_RETRIES, cache=cache)
+
+
 def _filter_unreachable_link_rows(
     content: dict[str, Any],
     *,
     timeout: int = LINK_CHECK_TIMEOUT_SECONDS,
-    checker: Callable[[str, int], bool] = _check_link_works,
+    checker: Callable[[str, int], bool] | None = None,
 ) -> tuple[int, int]:
     prepared_tables: list[tuple[dict[str, Any], list[tuple[dict[str, Any], str | None]]]] = (
         []
@@ -139,12 +252,7 @@ def _filter_unreachable_link_rows(
         if table.get("name") not in RELEVANT_TABLES:
             continue
 
-        link_keys = [
-            col.get("key")
-            for col in table.get("columns", [])
-            if str(col.get("name", "")).strip().lower() == "link"
-            and isinstance(col.get("key"), str)
-        ]
+        link_keys = _link_keys(table.get("columns", []))
         if not link_keys:
             continue
 
@@ -162,7 +270,9 @@ def _filter_unreachable_link_rows(
             row_links.append((row, link))
         prepared_tables.append((table, row_links))
 
-    link_status = _validate_links(unique_links, timeout=timeout, checker=checker)
+    link_status = _validate_links(
+        unique_links, timeout=timeout, checker=checker or _make_checker()
+    )
 
     removed_rows = 0
     for table, row_links in prepared_tables:
@@ -195,16 +305,7 @@ def build_option_map(columns: list[dict[str, Any]]):
 
 def resolve_value(val: Any, opt_map: dict[str, dict[str | int, str]], col_name: str):
     """Resolve option IDs to human-readable names."""
-    lookup = opt_map.get(col_name, {})
-    if isinstance(val, list):
-        resolved = [lookup.get(v, lookup.get(str(v), str(v))) for v in val]
-        return resolved if len(resolved) > 1 else (resolved[0] if resolved else None)
-    if isinstance(val, (int, float)):
-        as_int = int(val)
-        return lookup.get(as_int, lookup.get(str(as_int), val))
-    if isinstance(val, str) and val in lookup:
-        return lookup[val]
-    return val
+    return _option_converter(opt_map.get(col_name, {}))(val)
 
 
 def extract_text(val: Any):
@@ -214,205 +315,819 @@ def extract_text(val: Any):
     return val
 
 
-def parse_row(
-    row: dict[str, Any],
-    col_map: dict[str, str],
-    opt_map: dict[str, str],
-    table_name: str,
-):
-    """Parse a single row into a clean workout dict."""
-    mapped: dict[str, Any] = {}
-    for key, val in row.items():
-        if key.startswith("_") or val is None or val == "" or val == []:
-            continue
-        col_name = col_map.get(key, key)
-        # Skip internal/test columns
-        if (
-            col_name.startswith("~")
-            or col_name.startswith("TEST")
-            or "(copy)" in col_name
-        ):
-            continue
-        mapped[col_name] = val
+_MISSING: Any = object()
 
-    workout: dict[str, Any] = {"category": table_name}
 
-    # Date
-    if "Date" in mapped:
-        workout["date"] = mapped["Date"]
+def _skip_col_name(col_name: str) -> bool:
+    """Internal/test columns."""
+    return (
+        col_name.startswith("~") or col_name.startswith("TEST") or "(copy)" in col_name
+    )
 
-    # Duration — resolve from option
-    if "Duration" in mapped:
-        dur = resolve_value(mapped["Duration"], opt_map, "Duration")
-        workout["duration"] = str(dur) if dur else None
 
-    # Trainer
-    if "Trainer" in mapped:
-        workout["trainer"] = resolve_value(mapped["Trainer"], opt_map, "Trainer")
+def _raw(val: Any) -> Any:
+    return val
 
-    # Episode
-    if "Ep" in mapped:
-        workout["episode"] = mapped["Ep"]
 
-    # Music genre
-    if "Music" in mapped:
-        workout["music"] = resolve_value(mapped["Music"], opt_map, "Music")
+def _option_converter(lookup: dict[str | int, str]) -> Callable[[Any], Any]:
+    """`resolve_value` with the column's option lookup bound."""
+
+    def convert(val: Any) -> Any:
+        if isinstance(val, list):
+            resolved = [lookup.get(v, lookup.get(str(v), str(v))) for v in val]
+            if len(resolved) > 1:
+                return resolved
+            return resolved[0] if resolved else None
+        if isinstance(val, (int, float)):
+            as_int = int(val)
+            return lookup.get(as_int, lookup.get(str(as_int), val))
+        if isinstance(val, str) and val in lookup:
+            return lookup[val]
+        return val
+
+    return convert
+
+
+def _duration_converter(lookup: dict[str | int, str]) -> Callable[[Any], Any]:
+    resolve = _option_converter(lookup)
+
+    def convert(val: Any) -> Any:
+        dur = resolve(val)
+        return str(dur) if dur else None
+
+    return convert
+
+
+def _description(val: Any) -> Any:
+    return extract_text(val) or _MISSING
+
+
+def _flag(val: Any) -> Any:
+    return True if val else _MISSING
+
+
+# (column name, workout field, converter kind) in output order. `text` goes
+# through `extract_text`; `option`/`duration` resolve option IDs. A converter
+# returning `_MISSING` leaves the field out; `description` takes the first of
+# Description/Preview with text.
+ROW_FIELDS: list[tuple[str, str, str]] = [
+    ("Date", "date", "raw"),
+    ("Duration", "duration", "duration"),
+    ("Trainer", "trainer", "option"),
+    ("Ep", "episode", "raw"),
+    ("Music", "music", "option"),
+    ("Link", "link", "raw"),
+    ("Playlist", "playlist", "raw"),
+    ("Description", "description", "description"),
+    ("Preview", "description", "description"),
+    ("Detailed Moves", "detailed_moves", "text"),
+    ("Notes", "notes", "text"),
+    ("Format", "format", "text"),
+    ("Body Focus", "body_focus", "option"),
+    ("Equipment", "equipment", "option"),
+    ("Dumbbells", "dumbbells", "option"),
+    ("Muscle Groups", "muscle_groups", "option"),
+    ("Types of Moves", "move_types", "option"),
+    ("Flow Style", "flow_style", "option"),
+    ("Workout Details", "workout_details", "text"),
+    ("Strikes", "strikes", "option"),
+    ("Resistance Band", "resistance_band", "option"),
+    ("Theme", "theme", "option"),
+    ("Topic/Theme", "topic", "option"),
+    ("Prenatal", "prenatal", "flag"),
+    ("Workout Type", "workout_type", "option"),
+    ("Name", "name", "text"),
+]
 
-    # Link
-    if "Link" in mapped:
-        workout["link"] = mapped["Link"]
 
-    # Playlist
-    if "Playlist" in mapped:
-        workout["playlist"] = mapped["Playlist"]
+class RowDecoder:
+    """`parse_row` compiled for one table.
+
+    Every column key is mapped once to the slot of its output field (keys of
+    ignored columns and unused fields get none), and each field gets its
+    converter with the option lookup bound. Decoding a row is then one pass
+    over its items plus one over the fields the table's columns can fill.
+    """
+
+    def __init__(
+        self,
+        col_map: dict[str, str],
+        opt_map: dict[str, dict[str | int, str]],
+        table_name: str,
+    ) -> None:
+        self.table_name = table_name
+        slot_of = {name: i for i, (name, _, _) in enumerate(ROW_FIELDS)}
+        self._slots: dict[str, int] = {}
+        for key, name in col_map.items():
+            if not isinstance(key, str) or key.startswith("_"):
+                continue
+            if not isinstance(name, str) or _skip_col_name(name):
+                continue
+            if name in slot_of:
+                self._slots[key] = slot_of[name]
+        # Keys without a column stand for themselves (`col_map.get(key, key)`).
+        self._bare = {
+            name: slot for name, slot in slot_of.items() if name not in col_map
+        }
+
+        # (slot, field, converter, whether an earlier slot may have set it)
+        self._all_fields: list[tuple[int, str, Callable[[Any], Any], bool]] = []
+        seen: set[str] = set()
+        for slot, (name, field, kind) in enumerate(ROW_FIELDS):
+            lookup = opt_map.get(name, {})
+            if kind == "option":
+                convert = _option_converter(lookup)
+            elif kind == "duration":
+                convert = _duration_converter(lookup)
+            elif kind == "text":
+                convert = extract_text
+            elif kind == "description":
+                convert = _description
+            elif kind == "flag":
+                convert = _flag
+            else:
+                convert = _raw
+            self._all_fields.append((slot, field, convert, field in seen))
+            seen.add(field)
+        column_slots = set(self._slots.values())
+        self._fields = [f for f in self._all_fields if f[0] in column_slots]
+
+    def __call__(self, row: dict[str, Any]) -> dict[str, Any]:
+        values = [_MISSING] * len(ROW_FIELDS)
+        slots = self._slots
+        fields = self._fields
+        for key, val in row.items():
+            slot = slots.get(key)
+            if slot is None:
+                slot = self._bare.get(key)
+                if slot is None:
+                    continue
+                fields = self._all_fields
+            if not (val is None or val == "" or val == []):
+                values[slot] = val
+
+        workout: dict[str, Any] = {"category": self.table_name}
+        for slot, field, convert, first_wins in fields:
+            val = values[slot]
+            if val is _MISSING or (first_wins and field in workout):
+                continue
+            val = convert(val)
+            if val is not _MISSING:
+                workout[field] = val
+        return workout
 
-    # Description
-    for field in ["Description", "Preview"]:
-        if field in mapped:
-            text = extract_text(mapped[field])
-            if text:
-                workout["description"] = text
-                break
 
-    # Detailed moves
-    if "Detailed Moves" in mapped:
-        workout["detailed_moves"] = extract_text(mapped["Detailed Moves"])
+# Decoder of the last (col_map, opt_map, table) `parse_row` was called with.
+_last_decoder: tuple[dict[str, str], dict[str, Any], str, RowDecoder] | None = None
 
-    # Notes
-    if "Notes" in mapped:
-        workout["notes"] = extract_text(mapped["Notes"])
 
-    # Format
-    if "Format" in mapped:
-        workout["format"] = extract_text(mapped["Format"])
+def parse_row(
+    row: dict[str, Any],
+    col_map: dict[str, str],
+    opt_map: dict[str, str],
+    table_name: str,
+):
+    """Parse a single row into a clean workout dict.
+
+    Rows of one table share the `RowDecoder` compiled for its maps, which
+    must not change between calls.
+    """
+    global _last_decoder
+    cached = _last_decoder
+    if (
+        cached is None
+        or cached[0] is not col_map
+        or cached[1] is not opt_map
+        or cached[2] != table_name
+    ):
+        decoder = RowDecoder(col_map, opt_map, table_name)
+        cached = _last_decoder = (col_map, opt_map, table_name, decoder)
+    return cached[3](row)
+
+
+def _is_workout(workout: dict[str, Any]) -> bool:
+    return bool(workout.get("link") or workout.get("description"))
+
+
+def _parse_chunk(
+    name: str, columns: list[dict[str, Any]], rows: list[dict[str, Any]]
+) -> list[_RowResult]:
+    """Parse `rows` of table `name` on their own (process pool work item)."""
+    col_map, opt_map = build_option_map(columns)
+    link_keys = _link_keys(columns)
+    results: list[_RowResult] = []
+    for row in rows:
+        link = _extract_link_value(row, link_keys) if link_keys else None
+        workout = parse_row(row, col_map, opt_map, name)
+        results.append((link, workout if _is_workout(workout) else None))
+    return results
 
-    # Category-specific fields
-    # Strength
-    if "Body Focus" in mapped:
-        workout["body_focus"] = resolve_value(
-            mapped["Body Focus"], opt_map, "Body Focus"
-        )
-    if "Equipment" in mapped:
-        workout["equipment"] = resolve_value(mapped["Equipment"], opt_map, "Equipment")
-    if "Dumbbells" in mapped:
-        workout["dumbbells"] = resolve_value(mapped["Dumbbells"], opt_map, "Dumbbells")
-    if "Muscle Groups" in mapped:
-        workout["muscle_groups"] = resolve_value(
-            mapped["Muscle Groups"], opt_map, "Muscle Groups"
-        )
-    if "Types of Moves" in mapped:
-        workout["move_types"] = resolve_value(
-            mapped["Types of Moves"], opt_map, "Types of Moves"
-        )
 
-    # Yoga
-    if "Flow Style" in mapped:
-        workout["flow_style"] = resolve_value(
-            mapped["Flow Style"], opt_map, "Flow Style"
-        )
+def _parse_rows(
+    name: str,
+    columns: list[dict[str, Any]],
+    rows: Iterable[dict[str, Any]],
+    pool: concurrent.futures.ProcessPoolExecutor | None,
+    jobs: int,
+) -> Iterator[_RowResult]:
+    """Parse results for `rows`, in order.
+
+    Without a pool each row is parsed as it is read. With one, rows go out in
+    chunks of `PARSE_CHUNK_ROWS`; at most `2 * jobs` chunks are in flight.
+    """
+    if pool is None:
+        col_map, opt_map = build_option_map(columns)
+        link_keys = _link_keys(columns)
+        if tracing.enabled():
+            yield from _traced_rows(name, rows, col_map, opt_map, link_keys)
+            return
+        for row in rows:
+            link = _extract_link_value(row, link_keys) if link_keys else None
+            workout = parse_row(row, col_map, opt_map, name)
+            yield link, workout if _is_workout(workout) else None
+        return
+
+    pending: deque[concurrent.futures.Future[list[_RowResult]]] = deque()
+    it = iter(rows)
+    while chunk := list(islice(it, PARSE_CHUNK_ROWS)):
+        pending.append(pool.submit(_parse_chunk, name, columns, chunk))
+        if len(pending) > 2 * jobs:
+            yield from pending.popleft().result()
+    while pending:
+        yield from pending.popleft().result()
+
+
+def _traced_rows(
+    name: str,
+    rows: Iterable[dict[str, Any]],
+    col_map: dict[str, str],
+    opt_map: dict[str, Any],
+    link_keys: list[str],
+) -> Iterator[_RowResult]:
+    """The serial loop of `_parse_rows`, timing row decoding and `parse_row`."""
+    clock = time.perf_counter
+    decode = parse = 0.0
+    count = 0
+    it = iter(rows)
+    try:
+        while True:
+            start = clock()
+            row = next(it, _MISSING)
+            decoded = clock()
+            decode += decoded - start
+            if row is _MISSING:
+                return
+            link = _extract_link_value(row, link_keys) if link_keys else None
+            workout = parse_row(row, col_map, opt_map, name)
+            parse += clock() - decoded
+            count += 1
+            yield link, workout if _is_workout(workout) else None
+    finally:
+        tracing.record("decode", decode, count)
+        tracing.record("parse_row", parse, count)
+
+
+def _parse_pool(jobs: int) -> concurrent.futures.ProcessPoolExecutor | None:
+    if jobs < 1:
+        raise typer.BadParameter("--jobs muss mindestens 1 sein")
+    return concurrent.futures.ProcessPoolExecutor(jobs) if jobs > 1 else None
+
+
+def _split_cached(
+    rows: Iterable[Any],
+    cached_rows: dict[str, RowEntry],
+    plan: deque[_RowPlan],
+) -> Iterator[dict[str, Any]]:
+    """Yield the rows that need parsing; queue a plan entry for every row.
+
+    A row is reused when the previous run saw the same `_id` and `_mtime`.
+    """
+    for row in rows:
+        if not isinstance(row, dict):
+            continue
+        row_id, mtime = row.get("_id"), row.get("_mtime")
+        cached = cached_rows.get(row_id) if isinstance(row_id, str) else None
+        if cached is None or mtime is None or cached[0] != mtime:
+            cached = None
+        plan.append((row_id, mtime, cached))
+        if cached is None:
+            yield row
+
+
+def _join_plan(
+    plan: deque[_RowPlan], results: Iterator[_RowResult]
+) -> Iterator[tuple[_RowPlan, _RowResult]]:
+    """Pair each plan entry with its (link, workout), parsed or reused."""
+    for result in results:
+        while True:
+            item = plan.popleft()
+            cached = item[2]
+            if cached is None:
+                yield item, result
+                break
+            yield item, (cached[2], cached[1])
+    # Only reused rows are left once every parsed row has been paired.
+    for item in plan:
+        cached = item[2]
+        if cached is not None:
+            yield item, (cached[2], cached[1])
 
-    # HIIT / Kickboxing
-    if "Workout Details" in mapped:
-        workout["workout_details"] = extract_text(mapped["Workout Details"])
-    if "Strikes" in mapped:
-        workout["strikes"] = resolve_value(mapped["Strikes"], opt_map, "Strikes")
 
-    # Pilates
-    if "Resistance Band" in mapped:
-        workout["resistance_band"] = resolve_value(
-            mapped["Resistance Band"], opt_map, "Resistance Band"
-        )
+def _output_path(output: str | None) -> Path:
+    out_path = Path(output).expanduser() if output else default_db_path()
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    return out_path
 
-    # Meditation
-    if "Theme" in mapped:
-        workout["theme"] = resolve_value(mapped["Theme"], opt_map, "Theme")
-    if "Topic/Theme" in mapped:
-        workout["topic"] = resolve_value(mapped["Topic/Theme"], opt_map, "Topic/Theme")
 
-    # Prenatal
-    if mapped.get("Prenatal"):
-        workout["prenatal"] = True
+def _fingerprint_salt() -> str:
+    """What else shapes the DB, so an upgrade rebuilds it from the same export."""
+    return f"{__version__}:{SCHEMA_VERSION}:{','.join(RELEVANT_TABLES)}"
 
-    # Workout Type (sub-type within category)
-    if "Workout Type" in mapped:
-        workout["workout_type"] = resolve_value(
-            mapped["Workout Type"], opt_map, "Workout Type"
-        )
 
-    # Name
-    if "Name" in mapped:
-        workout["name"] = extract_text(mapped["Name"])
+def _content_fingerprint(
+    tables: Iterable[tuple[Any, Any, Iterable[Any]]],
+) -> str:
+    return content_fingerprint(tables, salt=_fingerprint_salt())
 
-    return workout
 
+def _raw_fingerprint(fp: IO[bytes]) -> str:
+    """SHA-256 of the rest of `fp`; the position is restored afterwards."""
+    start = fp.tell()
+    digest = hashlib.sha256(_fingerprint_salt().encode("utf-8"))
+    while chunk := fp.read(1 << 20):
+        digest.update(chunk)
+    fp.seek(start)
+    return digest.hexdigest()
 
-def parse_content(*, content: dict[str, Any], source: str, output: str | None) -> None:
-    out_path = Path(output).expanduser() if output else _default_db_path()
-    out_path.parent.mkdir(parents=True, exist_ok=True)
 
-    console.print(f"Parsing: {source}")
-    checked_links, removed_rows = _filter_unreachable_link_rows(content)
+def _report_unchanged(out_path: Path, content_fp: str) -> None:
+    console.print(f"Inhalt unverändert ({content_fp[:12]}), {out_path} ist aktuell.")
+
+
+def _report_link_check(
+    checked_links: int, removed_rows: int, cached_links: int = 0
+) -> None:
     if checked_links:
+        cached = f" ({cached_links} aus Cache)" if cached_links else ""
         console.print(
-            f"Link-Check: {checked_links} URL(s) geprüft, {removed_rows} Workout(s) entfernt."
+            f"Link-Check: {checked_links} URL(s) geprüft{cached}, {removed_rows} Workout(s) entfernt."
         )
     else:
         console.print("Link-Check: keine Links gefunden.")
 
-    all_workouts: list[dict[str, Any]] = []
-    stats: dict[str, int] = {}
 
-    for table in content.get("tables", []):
-        name = table.get("name")
-        if name not in RELEVANT_TABLES:
-            continue
-
-        col_map, opt_map = build_option_map(table.get("columns", []))
-        rows = table.get("rows", [])
-        count = 0
-
-        for row in rows:
-            workout = parse_row(row, col_map, opt_map, name)
-            if workout.get("link") or workout.get("description"):
-                all_workouts.append(workout)
-                count += 1
-
-        stats[name] = count
-        console.print(f"  {name}: {count} Workouts")
-
-    all_workouts.sort(key=lambda w: w.get("date", ""), reverse=True)
-
-    with out_path.open("w", encoding="utf-8") as f:
-        json.dump(all_workouts, f, indent=2, ensure_ascii=False)
+def _write_db(
+    all_workouts: list[dict[str, Any]],
+    stats: dict[str, int],
+    *,
+    source: str,
+    out_path: Path,
+    facets: FacetStore | None = None,
+    content_fp: str | None = None,
+    raw_fp: str | None = None,
+) -> str:
+    """Publish the DB and `summary.json` as one generation (see `Generation`).
+
+    Callers hold `writer_lock(out_path)`. `facets` is the facet store of
+    `all_workouts` if the caller kept it up to date; otherwise it is built.
+    `content_fp`/`raw_fp` are recorded in `<db>.source` (see `source_stamp`)
+    so an unchanged export can skip the next run; without them the stamp is
+    removed. Returns the fingerprint of the new DB.
+    """
+    with tracing.span("sort"):
+        all_workouts.sort(key=lambda w: w.get("date", ""), reverse=True)
+
+    summary_path = out_path.parent / SUMMARY_NAME
+    sqlite = backend_for(out_path) == "sqlite"
+    raw: bytes | None = None
+    source_path = source_path_for(out_path)
+    publish = tracing.span("publish")
+    with publish, generation(out_path) as gen:
+        db_tmp = gen.reserve(out_path)
+        with tracing.span("encode"):
+            if sqlite:
+                from .sqlitedb import write_sqlite
+
+                fingerprint = write_sqlite(db_tmp, all_workouts)
+            else:
+                raw = json.dumps(all_workouts, indent=2, ensure_ascii=False).encode()
+                fingerprint = hashlib.sha256(raw).hexdigest()
+                db_tmp.write_bytes(raw)
+
+        summary = {
+            "source": source,
+            "total_workouts": len(all_workouts),
+            "categories": stats,
+            "trainers": sorted(
+                set(
+                    w["trainer"]
+                    for w in all_workouts
+                    if isinstance(w.get("trainer"), str)
+                )
+            ),
+            "durations": sorted(
+                set(w["duration"] for w in all_workouts if w.get("duration"))
+            ),
+            "fingerprint": fingerprint,
+        }
+        with gen.open(summary_path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+        if content_fp is not None:
+            # The temp DB keeps its size and mtime through the rename.
+            with gen.open(source_path, "w", encoding="utf-8") as f:
+                json.dump(source_stamp(db_tmp, content_fp, raw_fp), f)
+        else:
+            source_path.unlink(missing_ok=True)
 
     console.print(f"\nTotal: {len(all_workouts)} Workouts → {out_path}")
 
-    summary = {
-        "source": source,
-        "total_workouts": len(all_workouts),
-        "categories": stats,
-        "trainers": sorted(
-            set(w["trainer"] for w in all_workouts if isinstance(w.get("trainer"), str))
-        ),
-        "durations": sorted(
-            set(w["duration"] for w in all_workouts if w.get("duration"))
-        ),
-    }
-
-    summary_path = out_path.parent / "summary.json"
-    with summary_path.open("w", encoding="utf-8") as f:
-        json.dump(summary, f, indent=2, ensure_ascii=False)
-
-    console.print(f"Summary → {summary_path}")
+    clear_query_cache(query_cache_dir_for(out_path))
+    with tracing.span("index"):
+        index_path = None if sqlite else write_index(out_path, all_workouts, raw=raw)
+    if index_path:
+        console.print(f"Index → {index_path}")
 
+    with tracing.span("facets"):
+        if facets is None:
+            facets = FacetStore.build(all_workouts)
+        facets.fingerprint = fingerprint
+        try:
+            facets.save(facets_path_for(out_path), out_path)
+        except OSError:
+            pass
 
-def parse_cmd(*, dtable_path: str, output: str | None) -> None:
+    console.print(f"Summary → {summary_path}")
+    return fingerprint
+
+
+def _updated_facets(
+    out_path: Path, previous: RowState, current: RowState, total: int
+) -> FacetStore | None:
+    """The previous run's facets with only the changed rows applied.
+
+    Returns None (rebuild) unless the stored facets, the previous row state
+    and the DB on disk all belong to the same run and every workout is
+    tracked in the row state.
+    """
+    facets = load_facets(out_path)
+    if (
+        facets is None
+        or facets.fingerprint is None
+        or facets.fingerprint != previous.fingerprint
+    ):
+        return None
+    old = previous.published()
+    new = current.published()
+    if facets.total != len(old) or len(new) != total:
+        return None
+    # Reused rows carry the very workout dict of the previous state.
+    for key, row in old.items():
+        kept = new.get(key)
+        if kept is None or kept[1] is not row[1]:
+            facets.remove(row[1])
+    for key, row in new.items():
+        was = old.get(key)
+        if was is None or was[1] is not row[1]:
+            facets.add(row[1])
+    return facets
+
+
+def parse_content(
+    *,
+    content: dict[str, Any],
+    source: str,
+    output: str | None,
+    jobs: int = 1,
+    force: bool = False,
+) -> None:
+    out_path = _output_path(output)
+    with writer_lock(out_path, companions=(SUMMARY_NAME,)):
+        console.print(f"Parsing: {source}")
+        with tracing.span("hash"):
+            content_fp = _content_fingerprint(
+                (table.get("name"), table.get("columns", []), table.get("rows", []))
+                for table in content.get("tables", [])
+                if isinstance(table, dict) and table.get("name") in RELEVANT_TABLES
+            )
+        stamp = None if force else load_source_stamp(out_path)
+        if stamp is not None and stamp.get("content") == content_fp:
+            _report_unchanged(out_path, content_fp)
+            return
+        tables: list[tuple[str, list[_RowResult]]] = []
+        to_check: set[str] = set()
+
+        pool = _parse_pool(jobs)
+        try:
+            with _link_check_stage() as stage:
+                with tracing.span("rows"):
+                    for table in content.get("tables", []):
+                        name = table.get("name")
+                        if name not in RELEVANT_TABLES:
+                            continue
+
+                        columns = table.get("columns", [])
+                        rows = (r for r in table.get("rows", []) if isinstance(r, dict))
+                        parsed: list[_RowResult] = []
+                        results = _parse_rows(name, columns, rows, pool, jobs)
+                        for link, workout in results:
+                            if link and link not in to_check:
+                                to_check.add(link)
+                                stage.put(link)
+                            if link or workout is not None:
+                                parsed.append((link, workout))
+                        tables.append((name, parsed))
+                with tracing.span("link_check"):
+                    link_status = stage.result()
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+
+        removed_rows = 0
+        all_workouts: list[dict[str, Any]] = []
+        stats: dict[str, int] = {}
+        counts: list[tuple[str, int]] = []
+        for name, parsed in tables:
+            count = 0
+            for link, workout in parsed:
+                if link and not link_status.get(link, False):
+                    removed_rows += 1
+                elif workout is not None:
+                    all_workouts.append(workout)
+                    count += 1
+            stats[name] = count
+            counts.append((name, count))
+
+        _report_link_check(len(to_check), removed_rows)
+        for name, count in counts:
+            console.print(f"  {name}: {count} Workouts")
+        tracing.count("links.checked", len(to_check))
+        tracing.count("rows.removed", removed_rows)
+        tracing.count("workouts", len(all_workouts))
+        if removed_rows:
+            # An unreachable link may be back next time: no stamp, so the
+            # same export gets its links checked again.
+            content_fp = None
+
+        with tracing.span("write"):
+            _write_db(
+                all_workouts,
+                stats,
+                source=source,
+                out_path=out_path,
+                content_fp=content_fp,
+            )
+
+
+def parse_stream(
+    fp: IO[bytes],
+    *,
+    source: str,
+    output: str | None,
+    incremental: bool = False,
+    link_cache_ttl: float | None = None,
+    link_cache: str | None = None,
+    jobs: int = 1,
+    force: bool = False,
+) -> None:
+    """Like `parse_content`, but reads content.json incrementally from `fp`.
+
+    Irrelevant tables are skipped without being decoded, and each row is
+    handed to `parse_row` as soon as it is read, so only the parsed workouts
+    (plus their link) are kept until the link check has run. Links are
+    checked on a worker thread while the remaining rows are still being
+    parsed (see `LinkCheckStage`).
+
+    With `incremental`, rows whose `_id`/`_mtime` match the row state of the
+    previous run reuse its parse result and link verdict; only added or
+    changed rows (and previously broken links) are parsed and checked again.
+
+    With `link_cache_ttl` (hours), working links checked within the TTL are
+    taken from the link cache (`<db>.links` or `link_cache`) without any
+    request; older ones are revalidated with a conditional HEAD.
+
+    With `jobs` > 1, rows are parsed in chunks on a process pool; the
+    result is identical to the serial run.
+
+    If `fp` is seekable, it is hashed first (its bytes, then its relevant
+    tables); when the DB was built from the same content, nothing else
+    runs unless `force`.
+    """
+    out_path = _output_path(output)
+    with writer_lock(out_path, companions=(SUMMARY_NAME,)):
+        console.print(f"Parsing: {source}")
+
+        content_fp = raw_fp = None
+        if fp.seekable():
+            stamp = None if force else load_source_stamp(out_path)
+            with tracing.span("hash"):
+                raw_fp = _raw_fingerprint(fp)
+            if stamp is not None and stamp.get("raw") == raw_fp:
+                _report_unchanged(out_path, stamp["content"])
+                return
+            with tracing.span("hash"):
+                start = fp.tell()
+                content_fp = _content_fingerprint(iter_tables(fp, RELEVANT_TABLES))
+                fp.seek(start)
+            if stamp is not None and stamp.get("content") == content_fp:
+                # Only irrelevant bytes changed; remember them for next time.
+                stamp["raw"] = raw_fp
+                save_source_stamp(out_path, stamp)
+                _report_unchanged(out_path, content_fp)
+                return
+
+        state_path = row_state_path(out_path)
+        previous = RowState.load(state_path) if incremental else RowState()
+        current = RowState()
+
+        cache: LinkCache | None = None
+        if link_cache_ttl is not None:
+            cache_path = (
+                Path(link_cache).expanduser()
+                if link_cache
+                else link_cache_path_for(out_path)
+            )
+            cache = LinkCache.load(cache_path, link_cache_ttl * 3600)
+
+        tables: list[tuple[str, list[_ParsedRow]]] = []
+        to_check: set[str] = set()
+        cached_links: set[str] = set()
+        known_ok: set[str] = set()
+        reused_rows = 0
+        parsed_rows = 0
+
+        pool = _parse_pool(jobs)
+        try:
+            with _link_check_stage(cache) as stage:
+
+                def check(link: str) -> None:
+                    if link in to_check:
+                        return
+                    to_check.add(link)
+                    if cache is not None and cache.fresh([link]):
+                        cached_links.add(link)
+                    else:
+                        stage.put(link)
+
+                with tracing.span("rows"):
+                    for name, columns, rows in iter_tables(fp, RELEVANT_TABLES):
+                        columns_fp = columns_fingerprint(columns)
+                        cached_rows = previous.rows_for(name, columns_fp)
+                        state_rows = current.start_table(name, columns_fp)
+                        parsed: list[_ParsedRow] = []
+                        plan: deque[_RowPlan] = deque()
+                        fresh_rows = _split_cached(rows, cached_rows, plan)
+                        results = _parse_rows(name, columns, fresh_rows, pool, jobs)
+
+                        joined = _join_plan(plan, results)
+                        for (row_id, mtime, cached), (link, workout) in joined:
+                            if cached is not None:
+                                reused_rows += 1
+                                if link and cached[3]:
+                                    known_ok.add(link)
+                                elif link:
+                                    check(link)
+                            else:
+                                parsed_rows += 1
+                                if link:
+                                    check(link)
+
+                            entry: RowEntry = [mtime, workout, link, None]
+                            if isinstance(row_id, str) and mtime is not None:
+                                state_rows[row_id] = entry
+                            if link or workout is not None:
+                                parsed.append((workout, link, entry))
+                        tables.append((name, parsed))
+                with tracing.span("link_check"):
+                    network_status = stage.result()
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+
+        link_status = {link: True for link in known_ok}
+        link_status.update((link, True) for link in cached_links)
+        link_status.update(network_status)
+        if cache is not None:
+            cache.record(network_status)
+            cache.save()
+
+        removed_rows = 0
+        all_workouts: list[dict[str, Any]] = []
+        stats: dict[str, int] = {}
+        counts: list[tuple[str, int]] = []
+        for name, parsed in tables:
+            count = 0
+            for workout, link, entry in parsed:
+                if link:
+                    entry[3] = link_status.get(link, False)
+                    if not entry[3]:
+                        removed_rows += 1
+                        continue
+                if workout is not None:
+                    all_workouts.append(workout)
+                    count += 1
+            stats[name] = count
+            counts.append((name, count))
+
+        _report_link_check(len(to_check), removed_rows, len(cached_links))
+        if incremental:
+            console.print(
+                f"Inkrementell: {parsed_rows} Zeile(n) neu/geändert, "
+                f"{reused_rows} unverändert übernommen."
+            )
+        for name, count in counts:
+            console.print(f"  {name}: {count} Workouts")
+        tracing.count("rows.parsed", parsed_rows)
+        tracing.count("rows.reused", reused_rows)
+        tracing.count("links.checked", len(to_check))
+        tracing.count("links.cached", len(cached_links))
+        tracing.count("rows.removed", removed_rows)
+        tracing.count("workouts", len(all_workouts))
+        if removed_rows:
+            # An unreachable link may be back next time (see `parse_content`).
+            content_fp = raw_fp = None
+
+        facets = (
+            _updated_facets(out_path, previous, current, len(all_workouts))
+            if incremental
+            else None
+        )
+        with tracing.span("write"):
+            current.fingerprint = _write_db(
+                all_workouts,
+                stats,
+                source=source,
+                out_path=out_path,
+                facets=facets,
+                content_fp=content_fp,
+                raw_fp=raw_fp,
+            )
+        current.save(state_path)
+
+
+def parse_dtable(
+    dtable: Path | IO[bytes],
+    *,
+    source: str,
+    output: str | None,
+    incremental: bool = False,
+    link_cache_ttl: float | None = None,
+    link_cache: str | None = None,
+    jobs: int = 1,
+    force: bool = False,
+) -> None:
+    """Stream-parse `content.json` from a .dtable ZIP (path or file object)."""
+    try:
+        with tracing.span("unzip"):
+            zf = zipfile.ZipFile(dtable)
+    except zipfile.BadZipFile as exc:
+        raise typer.BadParameter("Keine gültige .dtable (ZIP) Datei.") from exc
+
+    with zf:
+        try:
+            member = zf.open("content.json")
+        except KeyError as exc:
+            raise typer.BadParameter(
+                "content.json fehlt in der .dtable Datei."
+            ) from exc
+        with member:
+            try:
+                parse_stream(
+                    member,
+                    source=source,
+                    output=output,
+                    incremental=incremental,
+                    link_cache_ttl=link_cache_ttl,
+                    link_cache=link_cache,
+                    jobs=jobs,
+                    force=force,
+                )
+            except StreamError as exc:
+                raise typer.BadParameter(
+                    f"content.json ist kein gültiges JSON: {exc}"
+                ) from exc
+
+
+def parse_cmd(
+    *,
+    dtable_path: str,
+    output: str | None,
+    incremental: bool = False,
+    link_cache_ttl: float | None = None,
+    link_cache: str | None = None,
+    jobs: int = 1,
+    force: bool = False,
+) -> None:
     dtable = Path(dtable_path).expanduser()
     if not dtable.exists():
         raise typer.BadParameter(f"Datei nicht gefunden: {dtable}")
 
-    with zipfile.ZipFile(dtable) as zf:
-        with zf.open("content.json") as f:
-            content = json.load(f)
-
-    parse_content(content=content, source=str(dtable), output=output)
+    parse_dtable(
+        dtable,
+        source=str(dtable),
+        output=output,
+        incremental=incremental,
+        link_cache_ttl=link_cache_ttl,
+        link_cache=link_cache,
+        jobs=jobs,
+        force=force,
+    )
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import queue
+import threading
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from types import TracebackType
+from typing import Self
+
+# Links waiting between the parser and the link checker.
+LINK_FEED_SIZE = 1024
+# Seconds a blocked `put()` waits before checking whether the consumer stopped.
+_POLL_SECONDS = 0.05
+
+_CLOSED = object()
+
+
+class LinkFeed:
+    """Bounded hand-off of links from the parser to the link checker.
+
+    The producer `put()`s links as rows are decoded (blocking while the feed
+    is full) and `close()`s it at the end. The consumer either iterates it or
+    calls `take()` for whatever is queued. Iteration ends once the feed is
+    closed and drained; iterating again replays every link fed so far, so a
+    consumer may walk it twice like the set it replaces.
+    """
+
+    def __init__(self, maxsize: int = LINK_FEED_SIZE) -> None:
+        self._queue: queue.Queue[object] = queue.Queue(maxsize)
+        self._links: list[str] = []
+        self._drained = False
+        # Set once the consumer is gone; later links are dropped.
+        self.stopped = threading.Event()
+
+    def put(self, link: str) -> None:
+        while not self.stopped.is_set():
+            try:
+                self._queue.put(link, timeout=_POLL_SECONDS)
+                return
+            except queue.Full:
+                continue
+
+    def close(self) -> None:
+        while not self.stopped.is_set():
+            try:
+                self._queue.put(_CLOSED, timeout=_POLL_SECONDS)
+                return
+            except queue.Full:
+                continue
+
+    def take(self) -> list[str]:
+        """The next queued links, waiting for at least one; [] once closed."""
+        if self._drained:
+            return []
+        item = self._queue.get()
+        batch: list[str] = []
+        while item is not _CLOSED:
+            batch.append(item)  # type: ignore[arg-type]
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+        else:
+            self._drained = True
+        self._links.extend(batch)
+        return batch
+
+    def __iter__(self) -> Iterator[str]:
+        if self._drained:
+            yield from list(self._links)
+            return
+        while batch := self.take():
+            yield from batch
+
+
+class LinkCheckStage:
+    """Runs `check(feed)` on a worker thread while the parser feeds links.
+
+    Link checks start with the first fed link instead of after the last row,
+    so the refresh takes about as long as the slower of parsing and checking.
+    `result()` closes the feed and returns the verdicts; leaving the block
+    early closes it too and waits for the checks in flight.
+    """
+
+    def __init__(
+        self,
+        check: Callable[[LinkFeed], dict[str, bool]],
+        *,
+        maxsize: int = LINK_FEED_SIZE,
+    ) -> None:
+        self.feed = LinkFeed(maxsize)
+        self._check = check
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix="fithit-linkcheck")
+        self._future: Future[dict[str, bool]]
+
+    def _run(self) -> dict[str, bool]:
+        try:
+            return self._check(self.feed)
+        finally:
+            self.feed.stopped.set()
+
+    def __enter__(self) -> Self:
+        # The future keeps a failed check's exception for `result()`.
+        self._future = self._executor.submit(self._run)
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.feed.close()
+        self._executor.shutdown()
+
+    def put(self, link: str) -> None:
+        self.feed.put(link)
+
+    def result(self) -> dict[str, bool]:
+        self.feed.close()
+        self._executor.shutdown()
+        return self._future.result()
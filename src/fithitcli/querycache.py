@@ -0,0 +1,324 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import marshal
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+try:
+    import fcntl
+except ImportError:  # Windows: concurrent flushes may lose counts.
+    fcntl = None  # type: ignore[assignment]
+
+if TYPE_CHECKING:
+    from .search import SearchArgs
+
+QUERY_CACHE_SUFFIX = ".qcache"
+# Part of every key: bump whenever the same query may select other workouts
+# (e.g. `--search` semantics), so entries from older versions just miss.
+QUERY_CACHE_VERSION = 2
+QUERY_CACHE_MEMORY_ENTRIES = 256
+QUERY_CACHE_DISK_ENTRIES = 1024
+QUERY_CACHE_DISK_BYTES = 16 << 20
+_STATS_NAME = "stats.json"
+_STATS_LOCK_NAME = "stats.lock"
+_ENTRY_SUFFIX = ".bin"
+_COUNTERS = ("memory_hits", "disk_hits", "misses")
+
+
+def query_cache_dir_for(db_path: Path) -> Path:
+    return db_path.with_name(db_path.name + QUERY_CACHE_SUFFIX)
+
+
+def canonical_query(args: SearchArgs, *, rank: bool = False) -> str:
+    """Cache key for `args`: equal keys always select the same workouts.
+
+    Only normalizations `matches()` itself applies are folded in: filter
+    values are lowercased, `--categories` becomes a sorted set of stripped
+    names, falsy filters drop out, and `rank` only counts with `--search`
+    (whose text is kept verbatim, as ` OR ` is case-sensitive). The key
+    carries `QUERY_CACHE_VERSION`.
+    """
+
+    def lower(value: str | None) -> str | None:
+        return value.lower() if value else None
+
+    categories = (
+        sorted({c.strip().lower() for c in args.categories.split(",")})
+        if args.categories
+        else None
+    )
+    return json.dumps(
+        {
+            "category": lower(args.category),
+            "categories": categories,
+            "duration": lower(args.duration),
+            "max_duration": args.max_duration or None,
+            "equipment_free": bool(args.equipment_free),
+            "trainer": lower(args.trainer),
+            "body_focus": lower(args.body_focus),
+            "flow_style": lower(args.flow_style),
+            "search": args.search or None,
+            "rank": bool(rank and args.search),
+            "version": QUERY_CACHE_VERSION,
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    # Per thread, as `serve` threads may write the same entry at once.
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with tmp_path.open("wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+@contextmanager
+def _stats_lock(directory: Path) -> Iterator[None]:
+    """Serialize read-modify-write of `stats.json` across processes."""
+    with (directory / _STATS_LOCK_NAME).open("a") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class QueryCache:
+    """LRU cache of search result positions, in memory and on disk.
+
+    Entries are keyed on `canonical_query()` plus the DB content
+    fingerprint, so a rewritten DB never serves stale results; `parse`
+    additionally clears the disk tier. Values are the full, unlimited result
+    positions, so `--limit` and `--random` apply on top of a hit. The disk
+    tier is one small file per entry whose mtime is its LRU clock. All disk
+    access is best effort: a read-only data dir only loses the disk tier.
+    Lookups are thread-safe, so `serve` can share one instance.
+    """
+
+    def __init__(
+        self,
+        directory: Path | None,
+        *,
+        memory_entries: int = QUERY_CACHE_MEMORY_ENTRIES,
+        disk_entries: int = QUERY_CACHE_DISK_ENTRIES,
+        disk_bytes: int = QUERY_CACHE_DISK_BYTES,
+    ) -> None:
+        self.directory = directory
+        self.memory_entries = memory_entries
+        self.disk_entries = disk_entries
+        self.disk_bytes = disk_bytes
+        self.stats = dict.fromkeys(_COUNTERS, 0)
+        self._memory: OrderedDict[tuple[str, str], list[int]] = OrderedDict()
+        self._flushed = dict.fromkeys(_COUNTERS, 0)
+        self._lock = threading.Lock()
+
+    def _entry_path(self, fingerprint: str, key: str) -> Path | None:
+        if self.directory is None:
+            return None
+        digest = hashlib.sha256(f"{fingerprint}\0{key}".encode()).hexdigest()
+        return self.directory / f"{digest[:32]}{_ENTRY_SUFFIX}"
+
+    def _read_disk(self, fingerprint: str, key: str) -> list[int] | None:
+        path = self._entry_path(fingerprint, key)
+        if path is None:
+            return None
+        try:
+            stored_fp, stored_key, positions = marshal.loads(path.read_bytes())
+            os.utime(path)
+        except (OSError, ValueError, EOFError, TypeError):
+            return None
+        if stored_fp != fingerprint or stored_key != key:
+            return None
+        return positions
+
+    def _write_disk(self, fingerprint: str, key: str, positions: list[int]) -> None:
+        path = self._entry_path(fingerprint, key)
+        if path is None:
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            _write_atomic(path, marshal.dumps((fingerprint, key, positions)))
+            self._evict_disk(path.parent)
+        except (OSError, ValueError):
+            pass
+
+    def _evict_disk(self, directory: Path) -> None:
+        entries = []
+        total = 0
+        with os.scandir(directory) as it:
+            for entry in it:
+                if entry.name.endswith(_ENTRY_SUFFIX):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+                    total += stat.st_size
+        if len(entries) <= self.disk_entries and total <= self.disk_bytes:
+            return
+        entries.sort()
+        while entries and (len(entries) > self.disk_entries or total > self.disk_bytes):
+            _, size, path = entries.pop(0)
+            total -= size
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+    def _remember(self, mem_key: tuple[str, str], positions: list[int]) -> None:
+        with self._lock:
+            self._memory[mem_key] = positions
+            self._memory.move_to_end(mem_key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.stats[name] += 1
+
+    def get(
+        self, fingerprint: str | None, args: SearchArgs, rank: bool
+    ) -> list[int] | None:
+        """Cached positions for `args`, or None on a miss.
+
+        Without a fingerprint (e.g. an unindexable DB) nothing is cached and
+        no lookup is counted.
+        """
+        if fingerprint is None:
+            return None
+        key = canonical_query(args, rank=rank)
+        mem_key = (fingerprint, key)
+        with self._lock:
+            positions = self._memory.get(mem_key)
+            if positions is not None:
+                self._memory.move_to_end(mem_key)
+                self.stats["memory_hits"] += 1
+                return positions
+        positions = self._read_disk(fingerprint, key)
+        if positions is not None:
+            self._count("disk_hits")
+            self._remember(mem_key, positions)
+            return positions
+        self._count("misses")
+        return None
+
+    def put(
+        self,
+        fingerprint: str | None,
+        args: SearchArgs,
+        rank: bool,
+        positions: list[int],
+    ) -> None:
+        """Store the complete result positions for `args`."""
+        if fingerprint is None:
+            return
+        key = canonical_query(args, rank=rank)
+        self._remember((fingerprint, key), positions)
+        self._write_disk(fingerprint, key, positions)
+
+    def positions(
+        self,
+        fingerprint: str | None,
+        args: SearchArgs,
+        rank: bool,
+        compute: Callable[[], list[int]],
+    ) -> tuple[list[int], bool]:
+        """`get()`, falling back to `compute()` (and `put()`) on a miss.
+
+        Returns the positions and whether they came from the cache.
+        """
+        positions = self.get(fingerprint, args, rank)
+        if positions is not None:
+            return positions, True
+        positions = compute()
+        self.put(fingerprint, args, rank, positions)
+        return positions, False
+
+    def flush_stats(self) -> None:
+        """Add the counters gathered since the last flush to the disk totals."""
+        if self.directory is None:
+            return
+        with self._lock:
+            stats = dict(self.stats)
+            delta = {name: stats[name] - self._flushed[name] for name in _COUNTERS}
+            if not any(delta.values()):
+                return
+            try:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                with _stats_lock(self.directory):
+                    totals = read_query_cache_stats(self.directory)
+                    for name in _COUNTERS:
+                        totals[name] += delta[name]
+                    _write_atomic(
+                        self.directory / _STATS_NAME,
+                        json.dumps(totals).encode("utf-8"),
+                    )
+            except OSError:
+                return
+            self._flushed = stats
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+        clear_query_cache(self.directory)
+
+
+def read_query_cache_stats(directory: Path) -> dict[str, int]:
+    """Persisted hit/miss counters of the cache in `directory`."""
+    stats = dict.fromkeys(_COUNTERS, 0)
+    try:
+        data: Any = json.loads((directory / _STATS_NAME).read_bytes())
+    except (OSError, ValueError):
+        return stats
+    if isinstance(data, dict):
+        for name in _COUNTERS:
+            if isinstance(data.get(name), int):
+                stats[name] = data[name]
+    return stats
+
+
+def query_cache_summary(stats: dict[str, int]) -> dict[str, Any]:
+    """Counters plus totals and hit rate, as shown by `info --format json`."""
+    hits = stats["memory_hits"] + stats["disk_hits"]
+    lookups = hits + stats["misses"]
+    return {
+        **stats,
+        "hits": hits,
+        "hit_rate": round(hits / lookups, 4) if lookups else None,
+    }
+
+
+def query_cache_info(db_path: Path) -> dict[str, Any]:
+    """`query_cache_summary()` of the persisted counters for `db_path`."""
+    return query_cache_summary(read_query_cache_stats(query_cache_dir_for(db_path)))
+
+
+def clear_query_cache(directory: Path | None) -> None:
+    """Drop all cached results (the counters are kept)."""
+    if directory is None:
+        return
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                if entry.name.endswith(_ENTRY_SUFFIX):
+                    try:
+                        os.unlink(entry.path)
+                    except OSError:
+                        pass
+    except OSError:
+        pass
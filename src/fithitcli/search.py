@@ -1,41 +1,40 @@
 from __future__ import annotations
 
+import dataclasses
 import json
-import os
 import random
+import sys
+import time
+from collections.abc import Iterable, Iterator
 from dataclasses import dataclass
+from itertools import islice
+from math import exp, floor, log, log1p
 from pathlib import Path
-from typing import Any, Iterable
+from typing import TYPE_CHECKING, Any
 
 import typer
-from rich.console import Console
-from rich.table import Table
 
-console = Console()
-
-
-def _default_db_path() -> Path:
-    env = os.environ.get("FITHIT_DB_PATH")
-    if env:
-        return Path(env).expanduser()
-    xdg_data_home = os.environ.get("XDG_DATA_HOME")
-    base = (
-        Path(xdg_data_home).expanduser()
-        if xdg_data_home
-        else (Path.home() / ".local" / "share")
-    )
-    return base / "fithit" / "workouts.json"
+from . import tracing
+from .db import Catalog, default_db_path, load_catalog
+from .facets import FACET_FIELDS, FacetStore
+from .filters import (  # noqa: F401 (re-exported)
+    _parse_minutes,
+    _to_str_list,
+    is_equipment_free,
+    matches_text,
+    norm,
+    public_fields,
+)
+from .output import console, print_json, print_json_line, print_json_lines
+from .querycache import QueryCache, query_cache_dir_for
+from .sqlitedb import SqliteCatalog
+
+if TYPE_CHECKING:
+    from rich.table import Table
 
 
 def load_workouts(db_path: Path | None = None) -> list[dict[str, Any]]:
-    path = db_path or _default_db_path()
-    if not path.exists():
-        raise typer.BadParameter(
-            f"Datenbank nicht gefunden: {path}\n"
-            "Tipp: `fithit parse <dtable>` ausführen oder FITHIT_DB_PATH setzen."
-        )
-    with path.open("r", encoding="utf-8") as f:
-        return json.load(f)
+    return load_catalog(db_path or default_db_path()).workouts
 
 
 @dataclass
@@ -51,97 +50,386 @@ class SearchArgs:
     search: str | None
 
 
-def _to_str_list(value: Any) -> list[str]:
-    if value is None:
-        return []
-    if isinstance(value, list):
-        return [str(v).strip() for v in value if v is not None and str(v).strip() != ""]
-    text = str(value).strip()
-    return [text] if text else []
-
-
-def _parse_minutes(value: Any) -> int | None:
-    if value is None:
-        return None
-    text = str(value).strip().lower()
-    if not text:
-        return None
-    digits = "".join(ch for ch in text if ch.isdigit())
-    if not digits:
-        return None
-    try:
-        return int(digits)
-    except ValueError:
-        return None
-
-
 def matches(workout: dict[str, Any], args: SearchArgs) -> bool:
+    """Filter check; uses the precomputed `_…` companion fields when present."""
     # Category filter
-    if (
-        args.category
-        and str(workout.get("category", "")).lower() != args.category.lower()
-    ):
+    if args.category and norm(workout, "_category_key") != args.category.lower():
         return False
     if args.categories:
         cats = [c.strip().lower() for c in args.categories.split(",")]
-        if str(workout.get("category", "")).lower() not in cats:
+        if norm(workout, "_category_key") not in cats:
             return False
 
     # Duration filter
-    if (
-        args.duration
-        and str(workout.get("duration", "")).lower() != args.duration.lower()
-    ):
+    if args.duration and norm(workout, "_duration_key") != args.duration.lower():
         return False
 
     # Max duration filter
     if args.max_duration:
-        dur_min = _parse_minutes(workout.get("duration"))
+        dur_min = norm(workout, "_duration_minutes")
         if dur_min is None or dur_min > args.max_duration:
             return False
 
     # Equipment-free filter
-    if args.equipment_free:
-        equip = _to_str_list(workout.get("equipment"))
-        if equip:
-            allowed = {"mat", "yoga mat", "no equipment", "bodyweight"}
-            non_mat = [e for e in equip if e.lower() not in allowed]
-            if non_mat:
-                return False
-        dumbbells = _to_str_list(workout.get("dumbbells"))
-        if dumbbells and any(d.lower() != "bodyweight" for d in dumbbells):
-            return False
+    if args.equipment_free and not norm(workout, "_is_equipment_free"):
+        return False
 
     # Trainer filter
-    if args.trainer:
-        trainers = _to_str_list(workout.get("trainer"))
-        if not any(t.lower() == args.trainer.lower() for t in trainers):
-            return False
+    if args.trainer and args.trainer.lower() not in norm(workout, "_trainer_keys"):
+        return False
 
     # Body focus filter
-    if args.body_focus:
-        body_focus = _to_str_list(workout.get("body_focus"))
-        if not any(b.lower() == args.body_focus.lower() for b in body_focus):
-            return False
+    if args.body_focus and args.body_focus.lower() not in norm(
+        workout, "_body_focus_keys"
+    ):
+        return False
 
     # Flow style filter (Yoga)
-    if args.flow_style:
-        flow_style = _to_str_list(workout.get("flow_style"))
-        if not any(f.lower() == args.flow_style.lower() for f in flow_style):
-            return False
+    if args.flow_style and args.flow_style.lower() not in norm(
+        workout, "_flow_style_keys"
+    ):
+        return False
 
     # Text search in description
-    if args.search:
-        desc = (
-            str(workout.get("description", "")) + " " + str(workout.get("name", ""))
-        ).lower()
-        if args.search.lower() not in desc:
-            return False
+    return not args.search or matches_text(workout, args.search)
+
+
+def iter_positions(
+    catalog: Catalog,
+    args: SearchArgs,
+    *,
+    rank: bool = False,
+    text_scores: dict[str, dict[int, float] | None] | None = None,
+) -> Iterator[int]:
+    """Structured filters via the inverted index, then the `--search` text.
+
+    `--search` is the case-insensitive substring test of `matches_text()`
+    in every mode. Positions keep DB order (newest first) unless `rank` is
+    set, in which case the same matches are ordered by BM25 relevance
+    (matches without a BM25 score last, ties keep DB order). `text_scores`
+    memoizes BM25 scores per query text across calls. Unranked positions are
+    produced lazily, so a consumer that stops early skips the remaining
+    text checks. SQLite catalogs answer the whole query in SQL instead.
+    """
+    if isinstance(catalog, SqliteCatalog):
+        yield from catalog.positions(args, rank=rank)
+        return
+    positions = catalog.index.query(args)
+    if not args.search:
+        yield from positions
+        return
+    workouts = catalog.workouts
+    matched = (p for p in positions if matches_text(workouts[p], args.search))
+    if not rank:
+        yield from matched
+        return
+    if text_scores is None:
+        scores = catalog.text.search(args.search)
+    elif args.search in text_scores:
+        scores = text_scores[args.search]
+    else:
+        scores = text_scores[args.search] = catalog.text.search(args.search)
+    if not scores:
+        yield from matched
+        return
+    yield from sorted(matched, key=lambda p: -scores.get(p, 0.0))
+
+
+def find_positions(
+    catalog: Catalog,
+    args: SearchArgs,
+    *,
+    rank: bool = False,
+    text_scores: dict[str, dict[int, float] | None] | None = None,
+) -> list[int]:
+    """All positions `iter_positions()` produces."""
+    return list(iter_positions(catalog, args, rank=rank, text_scores=text_scores))
+
+
+def sample_positions(positions: Iterable[int], k: int, rng: random.Random) -> list[int]:
+    """Uniform random sample of `k` positions in random order.
+
+    Reservoir sampling (Algorithm L): memory is O(k) and skipped items are
+    consumed by `islice` without a Python-level loop. The result only depends
+    on the sequence and `rng`, so a seeded `rng` gives the same sample
+    whether `positions` is a cached list or a lazy stream.
+    """
+    if k <= 0:
+        return []
+    it = iter(positions)
+    reservoir = list(islice(it, k))
+    if len(reservoir) == k:
+        w = exp(log(_unit(rng)) / k)
+        while True:
+            skip = floor(log(_unit(rng)) / log1p(-w)) if w < 1.0 else 0
+            item = next(islice(it, skip, None), None)
+            if item is None:
+                break
+            reservoir[rng.randrange(k)] = item
+            w *= exp(log(_unit(rng)) / k)
+    rng.shuffle(reservoir)
+    return reservoir
+
+
+def _unit(rng: random.Random) -> float:
+    """Uniform float in (0, 1)."""
+    while True:
+        value = rng.random()
+        if value:
+            return value
+
+
+def find_workouts(
+    catalog: Catalog,
+    args: SearchArgs,
+    *,
+    rank: bool = False,
+    text_scores: dict[str, dict[int, float] | None] | None = None,
+) -> list[dict[str, Any]]:
+    """The workouts at `find_positions()`."""
+    workouts = catalog.workouts
+    positions = find_positions(catalog, args, rank=rank, text_scores=text_scores)
+    return [workouts[p] for p in positions]
+
+
+def _cached_positions(
+    catalog: Catalog,
+    args: SearchArgs,
+    *,
+    rank: bool,
+    cache: QueryCache | None,
+    text_scores: dict[str, dict[int, float] | None] | None = None,
+) -> tuple[list[int], bool]:
+    def compute() -> list[int]:
+        return find_positions(catalog, args, rank=rank, text_scores=text_scores)
 
-    return True
+    if cache is None:
+        return compute(), False
+    return cache.positions(catalog.fingerprint, args, rank, compute)
+
+
+def run_search(
+    catalog: Catalog,
+    args: SearchArgs,
+    *,
+    limit: int,
+    randomize: bool = False,
+    rank: bool = False,
+    cache: QueryCache | None = None,
+    seed: int | None = None,
+) -> list[dict[str, Any]]:
+    """The result list `search --format json` prints."""
+    return list(
+        iter_search(
+            catalog,
+            args,
+            limit=limit,
+            randomize=randomize,
+            rank=rank,
+            cache=cache,
+            seed=seed,
+        )
+    )
+
+
+def iter_search(
+    catalog: Catalog,
+    args: SearchArgs,
+    *,
+    limit: int,
+    randomize: bool = False,
+    rank: bool = False,
+    cache: QueryCache | None = None,
+    seed: int | None = None,
+) -> Iterator[dict[str, Any]]:
+    """Search results one public workout at a time, at most `limit` of them.
+
+    Without `randomize` matching stops after `limit` hits. With it, `limit`
+    workouts are reservoir-sampled (reproducibly with `seed`). A `cache` hit
+    replaces the matching; complete match lists are stored back into it.
+    """
+    limit = max(limit, 0)
+    with tracing.span("match"):
+        cached = None
+        if cache is not None:
+            cached = cache.get(catalog.fingerprint, args, rank)
+        if cached is not None:
+            source: Iterable[int] = cached
+        elif randomize:
+            # Sampling consumes every match anyway, so keep them for the cache.
+            source = find_positions(catalog, args, rank=rank)
+            if cache is not None:
+                cache.put(catalog.fingerprint, args, rank, source)
+        else:
+            source = iter_positions(catalog, args, rank=rank)
+
+        if randomize:
+            picked = sample_positions(source, limit, random.Random(seed))
+        else:
+            picked = list(islice(source, limit))
+            if cached is None and cache is not None and len(picked) < limit:
+                # The stream ran dry before `limit`, so this is the full result.
+                cache.put(catalog.fingerprint, args, rank, picked)
+    tracing.count("query_cache.hits", int(cached is not None))
+
+    workouts = catalog.workouts
+    for p in picked:
+        yield public_fields(workouts[p])
+
+
+def _facet_fields(spec: str) -> list[str]:
+    fields = list(dict.fromkeys(f.strip() for f in spec.split(",") if f.strip()))
+    unknown = [f for f in fields if f not in FACET_FIELDS]
+    if not fields or unknown:
+        raise typer.BadParameter(f"--facets erlaubt nur: {', '.join(FACET_FIELDS)}")
+    return fields
+
+
+def facet_counts(
+    catalog: Catalog,
+    args: SearchArgs,
+    fields: list[str],
+    *,
+    cache: QueryCache | None = None,
+) -> dict[str, dict[str, int]]:
+    """Matching workouts per value of each facet field (ignores `--limit`).
+
+    Structured filters are answered from the facet store's cells; with
+    `--search`/`--flow-style` the matched workouts are counted instead.
+    """
+    counts = catalog.facets.counts(fields, args)
+    if counts is None:
+        positions, _ = _cached_positions(catalog, args, rank=False, cache=cache)
+        workouts = catalog.workouts
+        counts = FacetStore.build(workouts[p] for p in positions).counts(fields)
+    return counts or {}
+
+
+_BATCH_TEXT_FIELDS = (
+    "category",
+    "categories",
+    "duration",
+    "trainer",
+    "body_focus",
+    "flow_style",
+    "search",
+)
+_BATCH_FLAGS = ("equipment_free", "random", "rank")
+_BATCH_INTS = ("max_duration", "limit", "seed")
+_BATCH_FIELDS = {"id", *_BATCH_TEXT_FIELDS, *_BATCH_FLAGS, *_BATCH_INTS}
+
+
+def _batch_query(line: str, defaults: dict[str, Any]) -> dict[str, Any]:
+    """Validate one JSONL query and merge it over the command-line defaults."""
+    try:
+        query = json.loads(line)
+    except json.JSONDecodeError as exc:
+        raise ValueError(f"kein gültiges JSON: {exc}") from exc
+    if not isinstance(query, dict):
+        raise TypeError("Query muss ein JSON-Objekt sein")
+    unknown = sorted(set(query) - _BATCH_FIELDS)
+    if unknown:
+        raise ValueError(f"unbekannte Felder: {', '.join(unknown)}")
+    for name, value in query.items():
+        if value is None or name == "id":
+            continue
+        if name in _BATCH_TEXT_FIELDS and not isinstance(value, str):
+            raise ValueError(f"{name} muss ein String sein")
+        if name in _BATCH_FLAGS and not isinstance(value, bool):
+            raise ValueError(f"{name} muss true oder false sein")
+        if name in _BATCH_INTS and (
+            isinstance(value, bool) or not isinstance(value, int)
+        ):
+            raise ValueError(f"{name} muss eine Ganzzahl sein")
+    merged = dict(defaults)
+    merged.update((k, v) for k, v in query.items() if v is not None)
+    return merged
+
+
+def run_batch(
+    catalog: Catalog,
+    lines: Iterable[str],
+    *,
+    defaults: dict[str, Any],
+    stats: bool = False,
+    cache: QueryCache | None = None,
+) -> Iterator[dict[str, Any]]:
+    """Answer JSONL search queries one by one against a single catalog.
+
+    Each non-empty line is an object with the `SearchArgs` fields plus
+    `limit`, `random`, `seed`, `rank` and an optional `id` (default: line number);
+    missing fields fall back to `defaults`. Identical queries and repeated
+    `--search` texts reuse earlier results (through `cache`, or an in-memory
+    one for this batch). Invalid lines yield an `error` instead of aborting
+    the batch.
+    """
+    if cache is None:
+        cache = QueryCache(None)
+    workouts = catalog.workouts
+    text_scores: dict[str, dict[int, float] | None] = {}
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        started = time.perf_counter()
+        reply: dict[str, Any] = {"id": number}
+        try:
+            query = _batch_query(line, defaults)
+            if "id" in query:
+                reply["id"] = query["id"]
+            args = SearchArgs(
+                **{f.name: query.get(f.name) for f in dataclasses.fields(SearchArgs)}
+            )
+            args.equipment_free = bool(args.equipment_free)
+            rank = bool(query.get("rank"))
+            positions, cached = _cached_positions(
+                catalog, args, rank=rank, cache=cache, text_scores=text_scores
+            )
+            limit = max(query.get("limit") or 0, 0)
+            if query.get("random"):
+                picked = sample_positions(
+                    positions, limit, random.Random(query.get("seed"))
+                )
+            else:
+                picked = positions[:limit]
+            reply["results"] = [public_fields(workouts[p]) for p in picked]
+            if stats:
+                reply["stats"] = {
+                    "matches": len(positions),
+                    "cached": cached,
+                    "ms": round((time.perf_counter() - started) * 1000, 3),
+                }
+        except (ValueError, TypeError) as exc:
+            reply["error"] = str(exc)
+        yield reply
+
+
+def _batch_cmd(
+    catalog: Catalog,
+    source: str,
+    *,
+    defaults: dict[str, Any],
+    stats: bool,
+    cache: QueryCache | None,
+) -> None:
+    if source == "-":
+        for reply in run_batch(
+            catalog, sys.stdin, defaults=defaults, stats=stats, cache=cache
+        ):
+            print_json_line(reply)
+        return
+    path = Path(source).expanduser()
+    try:
+        f = path.open("r", encoding="utf-8")
+    except OSError as exc:
+        raise typer.BadParameter(f"Datei nicht gefunden: {path}") from exc
+    with f:
+        for reply in run_batch(catalog, f, defaults=defaults, stats=stats, cache=cache):
+            print_json_line(reply)
 
 
 def _compact_table(results: Iterable[dict[str, Any]]) -> Table:
+    from rich.table import Table
+
     table = Table(title=None, show_header=True, header_style="bold")
     table.add_column("Kategorie", style="cyan", no_wrap=True)
     table.add_column("Dauer", style="magenta", no_wrap=True)
@@ -175,8 +463,44 @@ def search_cmd(
     limit: int,
     randomize: bool,
     format: str,
+    rank: bool = False,
+    batch: str | None = None,
+    stats: bool = False,
+    use_cache: bool = True,
+    seed: int | None = None,
+    facets: str | None = None,
 ) -> None:
-    workouts = load_workouts()
+    facet_fields = _facet_fields(facets) if facets is not None else None
+    db_path = default_db_path()
+    with tracing.span("load"):
+        catalog = load_catalog(db_path)
+    cache = QueryCache(query_cache_dir_for(db_path)) if use_cache else None
+    if batch is not None:
+        if facet_fields is not None:
+            raise typer.BadParameter("--facets geht nicht zusammen mit --batch")
+        defaults = {
+            "category": category,
+            "categories": categories,
+            "duration": duration,
+            "max_duration": max_duration,
+            "equipment_free": equipment_free,
+            "trainer": trainer,
+            "body_focus": body_focus,
+            "flow_style": flow_style,
+            "search": search,
+            "limit": limit,
+            "random": randomize,
+            "seed": seed,
+            "rank": rank,
+        }
+        try:
+            with tracing.span("batch"):
+                _batch_cmd(catalog, batch, defaults=defaults, stats=stats, cache=cache)
+        finally:
+            if cache is not None:
+                cache.flush_stats()
+        return
+
     args = SearchArgs(
         category=category,
         categories=categories,
@@ -189,17 +513,53 @@ def search_cmd(
         search=search,
     )
 
-    results = [w for w in workouts if matches(w, args)]
-    if randomize:
-        random.shuffle(results)
-    results = results[: max(limit, 0)]
-
     fmt = (format or "compact").lower()
+    if fmt not in ("compact", "json", "ndjson"):
+        raise typer.BadParameter("--format muss 'compact', 'json' oder 'ndjson' sein")
+
+    if fmt == "ndjson":
+        print_json_lines(
+            iter_search(
+                catalog,
+                args,
+                limit=limit,
+                randomize=randomize,
+                rank=rank,
+                cache=cache,
+                seed=seed,
+            )
+        )
+        if facet_fields is not None:
+            with tracing.span("facets"):
+                counts = facet_counts(catalog, args, facet_fields, cache=cache)
+            print_json_line({"facets": counts})
+        if cache is not None:
+            cache.flush_stats()
+        return
+
+    results = run_search(
+        catalog,
+        args,
+        limit=limit,
+        randomize=randomize,
+        rank=rank,
+        cache=cache,
+        seed=seed,
+    )
+    with tracing.span("facets"):
+        counts = (
+            facet_counts(catalog, args, facet_fields, cache=cache)
+            if facet_fields is not None
+            else None
+        )
+    if cache is not None:
+        cache.flush_stats()
+
     if fmt == "json":
-        console.print_json(json.dumps(results, ensure_ascii=False, indent=2))
+        print_json(
+            results if counts is None else {"results": results, "facets": counts}
+        )
         return
-    if fmt != "compact":
-        raise typer.BadParameter("--format muss 'compact' oder 'json' sein")
 
     if not results:
         console.print("Keine passenden Workouts gefunden.")
@@ -221,3 +581,9 @@ def search_cmd(
                 console.print(f"  Equipment: {equip}")
             if link:
                 console.print(f"  → {link}")
+
+    if counts is not None:
+        console.print()
+        for field, values in counts.items():
+            shown = ", ".join(f"{value} ({n})" for value, n in values.items())
+            console.print(f"[bold]{field}[/bold]: {shown or '–'}")
@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import ipaddress
+import json
+import os
+import socketserver
+import stat
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qs, urlparse
+
+import typer
+
+from .db import Catalog, default_db_path, load_catalog
+from .output import console
+from .querycache import QueryCache, query_cache_dir_for, query_cache_info
+from .search import SearchArgs, run_search
+from .validate import validate_workouts
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+_TRUE_VALUES = {"1", "true", "yes", "on"}
+_SEARCH_TEXT_PARAMS = (
+    "category",
+    "categories",
+    "duration",
+    "trainer",
+    "body_focus",
+    "flow_style",
+    "search",
+)
+
+
+class CatalogHolder:
+    """Keeps the catalog resident and reloads it when the DB file changes.
+
+    Also owns the query cache shared by all requests.
+    """
+
+    def __init__(self, db_path: Path) -> None:
+        self.db_path = db_path
+        self.cache = QueryCache(query_cache_dir_for(db_path))
+        self._lock = threading.Lock()
+        self._catalog: Catalog | None = None
+        self._stamp: tuple[int, int] | None = None
+
+    def _current_stamp(self) -> tuple[int, int] | None:
+        try:
+            stat = self.db_path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def get(self) -> Catalog:
+        stamp = self._current_stamp()
+        with self._lock:
+            if self._catalog is None or stamp != self._stamp:
+                self._catalog = load_catalog(self.db_path, columnar=True)
+                self._stamp = stamp
+            return self._catalog
+
+
+def _flag(params: dict[str, list[str]], name: str) -> bool:
+    values = params.get(name)
+    return bool(values) and values[-1].strip().lower() in _TRUE_VALUES
+
+
+def _int(params: dict[str, list[str]], name: str, default: int | None) -> int | None:
+    values = params.get(name)
+    if not values or values[-1] == "":
+        return default
+    try:
+        return int(values[-1])
+    except ValueError as exc:
+        raise ValueError(f"{name} muss eine Ganzzahl sein") from exc
+
+
+def search_payload(
+    catalog: Catalog,
+    params: dict[str, list[str]],
+    cache: QueryCache | None = None,
+) -> Any:
+    """Answer a search query string the way `search --format json` would."""
+    text = {
+        name: (params[name][-1] if params.get(name) else None)
+        for name in _SEARCH_TEXT_PARAMS
+    }
+    args = SearchArgs(
+        max_duration=_int(params, "max_duration", None),
+        equipment_free=_flag(params, "equipment_free"),
+        **text,
+    )
+    return run_search(
+        catalog,
+        args,
+        limit=_int(params, "limit", 5) or 0,
+        randomize=_flag(params, "random"),
+        seed=_int(params, "seed", None),
+        rank=_flag(params, "rank"),
+        cache=cache,
+    )
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "fithit"
+    holder: CatalogHolder
+
+    def _send(self, status: int, payload: Any) -> None:
+        body = json.dumps(payload, ensure_ascii=False, indent=2).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        params = parse_qs(url.query, keep_blank_values=True)
+        route = url.path.rstrip("/") or "/"
+
+        if route == "/health":
+            self._send(200, {"ok": True})
+            return
+        if route not in ("/search", "/info", "/validate"):
+            self._send(404, {"error": f"Unbekannter Pfad: {url.path}"})
+            return
+
+        try:
+            catalog = self.holder.get()
+        except (typer.BadParameter, OSError, ValueError) as exc:
+            self._send(503, {"error": str(exc)})
+            return
+
+        try:
+            if route == "/search":
+                payload = search_payload(catalog, params, self.holder.cache)
+                self.holder.cache.flush_stats()
+            elif route == "/info":
+                payload = catalog.facets.summary()
+                payload["query_cache"] = query_cache_info(self.holder.db_path)
+            else:
+                payload = validate_workouts(catalog.workouts)
+        except ValueError as exc:
+            self._send(400, {"error": str(exc)})
+            return
+        self._send(200, payload)
+
+    def address_string(self) -> str:
+        # Unix domain sockets report an empty client address.
+        return str(self.client_address[0]) if self.client_address else "unix"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if self.server.verbose:  # type: ignore[attr-defined]
+            super().log_message(format, *args)
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def _require_loopback(host: str) -> None:
+    if host == "localhost":
+        return
+    try:
+        loopback = ipaddress.ip_address(host.strip("[]")).is_loopback
+    except ValueError:
+        loopback = False
+    if not loopback:
+        raise typer.BadParameter(
+            f"--host muss eine Loopback-Adresse sein (z. B. 127.0.0.1), nicht {host}"
+        )
+
+
+def _remove_stale_socket(path: Path) -> None:
+    try:
+        mode = path.lstat().st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise typer.BadParameter(f"{path} existiert und ist kein Unix-Socket.")
+    path.unlink()
+
+
+def make_server(
+    holder: CatalogHolder,
+    *,
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    socket_path: str | None = None,
+    verbose: bool = False,
+) -> socketserver.BaseServer:
+    handler = type("Handler", (_Handler,), {"holder": holder})
+    server: socketserver.BaseServer
+    if socket_path:
+        path = Path(socket_path).expanduser()
+        _remove_stale_socket(path)
+        server = _UnixHTTPServer(str(path), handler)
+    else:
+        _require_loopback(host)
+        server = ThreadingHTTPServer((host, port), handler)
+    server.verbose = verbose  # type: ignore[attr-defined]
+    return server
+
+
+def serve_cmd(
+    *,
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    socket_path: str | None = None,
+    verbose: bool = False,
+) -> None:
+    holder = CatalogHolder(default_db_path())
+    catalog = holder.get()
+    server = make_server(
+        holder, host=host, port=port, socket_path=socket_path, verbose=verbose
+    )
+
+    where = socket_path or f"http://{host}:{server.server_address[1]}"
+    console.print(f"DB: {holder.db_path} ({len(catalog.workouts)} Workouts)")
+    console.print(f"Serving on {where} (Strg+C beendet)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if socket_path:
+            try:
+                os.unlink(Path(socket_path).expanduser())
+            except OSError:
+                pass
@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from collections.abc import Iterable, Iterator, Sequence
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, overload
+
+import typer
+
+from .db import Catalog
+from .filters import _to_str_list, norm, public_fields
+from .text import TEXT_FIELDS, _field_text, parse_query, tokenize
+
+if TYPE_CHECKING:
+    import sqlite3
+
+    from .search import SearchArgs
+
+SQLITE_FORMAT_VERSION = 1
+# String-or-list fields, stored one row per value in `workout_values`.
+MULTI_VALUE_FIELDS = (
+    "trainer",
+    "body_focus",
+    "flow_style",
+    "equipment",
+    "dumbbells",
+    "muscle_groups",
+    "move_types",
+    "strikes",
+)
+_FTS_COLUMNS = tuple(TEXT_FIELDS)
+_FTS_WEIGHTS = ", ".join(str(weight) for weight in TEXT_FIELDS.values())
+
+# `id` is the position in DB order (newest first), `data` the public workout
+# as JSON; the other columns are the normalized values `matches()` compares.
+# The FTS table holds the stemmed tokens of `text.tokenize()`, so matches are
+# the same as with the JSON backend's `TextIndex`.
+_SCHEMA = f"""
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE workouts (
+    id INTEGER PRIMARY KEY,
+    data TEXT NOT NULL,
+    category_key TEXT NOT NULL,
+    duration_key TEXT NOT NULL,
+    duration_minutes INTEGER,
+    equipment_free INTEGER NOT NULL,
+    haystack TEXT NOT NULL
+);
+CREATE TABLE workout_values (
+    field TEXT NOT NULL,
+    key TEXT NOT NULL,
+    workout_id INTEGER NOT NULL REFERENCES workouts (id),
+    value TEXT NOT NULL,
+    PRIMARY KEY (field, key, workout_id)
+) WITHOUT ROWID;
+CREATE INDEX workouts_category_key ON workouts (category_key);
+CREATE INDEX workouts_duration_key ON workouts (duration_key);
+CREATE INDEX workouts_duration_minutes ON workouts (duration_minutes);
+CREATE INDEX workout_values_workout ON workout_values (workout_id);
+CREATE VIRTUAL TABLE workouts_fts USING fts5 (
+    {", ".join(_FTS_COLUMNS)},
+    tokenize = "unicode61 remove_diacritics 0 tokenchars '_'"
+);
+"""
+
+
+def _haystack(workout: dict[str, Any]) -> str:
+    """The lowercased text `matches_text()` searches."""
+    return (
+        str(workout.get("description", "")) + " " + str(workout.get("name", ""))
+    ).lower()
+
+
+def _fts_query(clauses: list[list[str]]) -> str:
+    """FTS5 MATCH expression for `text.parse_query()` clauses."""
+
+    def quote(term: str) -> str:
+        return '"' + term.replace('"', '""') + '"'
+
+    return " OR ".join(
+        "(" + " AND ".join(quote(term) for term in clause) + ")" for clause in clauses
+    )
+
+
+def write_sqlite(db_path: Path, workouts: Iterable[dict[str, Any]]) -> str:
+    """Write `workouts` (in DB order) to a new SQLite DB at `db_path`.
+
+    `db_path` is meant to be a temp file that is then published with
+    `atomic.Generation`, so readers never see a half-written DB. Returns the
+    content fingerprint.
+    """
+    import sqlite3
+
+    db_path.unlink(missing_ok=True)
+    digest = hashlib.sha256()
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.executescript(_SCHEMA)
+        for pos, workout in enumerate(workouts):
+            data = json.dumps(public_fields(workout), ensure_ascii=False)
+            digest.update(data.encode("utf-8"))
+            digest.update(b"\n")
+            conn.execute(
+                "INSERT INTO workouts VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    pos,
+                    data,
+                    norm(workout, "_category_key"),
+                    norm(workout, "_duration_key"),
+                    norm(workout, "_duration_minutes"),
+                    int(bool(norm(workout, "_is_equipment_free"))),
+                    _haystack(workout),
+                ),
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO workout_values VALUES (?, ?, ?, ?)",
+                (
+                    (field, value.lower(), pos, value)
+                    for field in MULTI_VALUE_FIELDS
+                    for value in _to_str_list(workout.get(field))
+                ),
+            )
+            conn.execute(
+                f"INSERT INTO workouts_fts (rowid, {', '.join(_FTS_COLUMNS)}) "
+                f"VALUES (?{', ?' * len(_FTS_COLUMNS)})",
+                (
+                    pos,
+                    *(
+                        " ".join(tokenize(_field_text(workout.get(field))))
+                        for field in _FTS_COLUMNS
+                    ),
+                ),
+            )
+        fingerprint = digest.hexdigest()
+        conn.executemany(
+            "INSERT INTO meta VALUES (?, ?)",
+            [("fingerprint", fingerprint), ("format", str(SQLITE_FORMAT_VERSION))],
+        )
+        conn.execute(f"PRAGMA user_version = {SQLITE_FORMAT_VERSION}")
+        conn.commit()
+    finally:
+        conn.close()
+    return fingerprint
+
+
+class SqliteRows(Sequence[dict[str, Any]]):
+    """The workouts of a SQLite DB as a read-only sequence, decoded on access."""
+
+    def __init__(self, catalog: SqliteCatalog, size: int) -> None:
+        self._catalog = catalog
+        self._size = size
+
+    def __len__(self) -> int:
+        return self._size
+
+    @overload
+    def __getitem__(self, pos: int) -> dict[str, Any]: ...
+
+    @overload
+    def __getitem__(self, pos: slice) -> list[dict[str, Any]]: ...
+
+    def __getitem__(self, pos: int | slice) -> Any:
+        if isinstance(pos, slice):
+            return [self[i] for i in range(*pos.indices(self._size))]
+        if pos < 0:
+            pos += self._size
+        if not 0 <= pos < self._size:
+            raise IndexError("workout index out of range")
+        rows = self._catalog.execute("SELECT data FROM workouts WHERE id = ?", (pos,))
+        return json.loads(rows[0][0])
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        rows = self._catalog.execute("SELECT data FROM workouts ORDER BY id")
+        return (json.loads(data) for (data,) in rows)
+
+
+class SqliteCatalog(Catalog):
+    """Catalog backed by a SQLite DB written by `write_sqlite()`.
+
+    Searches run as SQL (see `positions()`); `workouts` decodes rows on
+    access. The in-memory `index`/`text`/`batch` of `Catalog` still work, but
+    are built from all rows on first use.
+    """
+
+    def __init__(self, path: Path, conn: sqlite3.Connection) -> None:
+        self._conn = conn
+        self._lock = threading.Lock()
+        meta = dict(self.execute("SELECT key, value FROM meta"))
+        (size,) = self.execute("SELECT count(*) FROM workouts")[0]
+        super().__init__(path, [], fingerprint=meta.get("fingerprint"))
+        self.workouts = SqliteRows(self, size)
+
+    def execute(self, sql: str, params: Sequence[Any] = ()) -> list[Any]:
+        """Run one statement and fetch all rows (thread-safe)."""
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def positions(self, args: SearchArgs, *, rank: bool = False) -> list[int]:
+        """Positions matching `args`, like `search.find_positions()`."""
+        sql, params = compile_search(args, rank=rank)
+        return [pos for (pos,) in self.execute(sql, params)]
+
+
+def compile_search(args: SearchArgs, *, rank: bool = False) -> tuple[str, list[Any]]:
+    """`SearchArgs` as one parameterized SELECT of matching positions."""
+    where: list[str] = []
+    params: list[Any] = []
+    if args.category:
+        where.append("w.category_key = ?")
+        params.append(args.category.lower())
+    if args.categories:
+        keys = sorted({c.strip().lower() for c in args.categories.split(",")})
+        where.append(f"w.category_key IN ({', '.join('?' * len(keys))})")
+        params.extend(keys)
+    if args.duration:
+        where.append("w.duration_key = ?")
+        params.append(args.duration.lower())
+    if args.max_duration:
+        where.append("w.duration_minutes <= ?")
+        params.append(args.max_duration)
+    if args.equipment_free:
+        where.append("w.equipment_free = 1")
+    for field in ("trainer", "body_focus", "flow_style"):
+        value = getattr(args, field)
+        if value:
+            where.append(
+                "w.id IN (SELECT workout_id FROM workout_values"
+                " WHERE field = ? AND key = ?)"
+            )
+            params.extend((field, value.lower()))
+
+    source = "workouts AS w"
+    order = "w.id"
+    join_params: list[Any] = []
+    if args.search:
+        # The match set is the substring test of `matches_text()`; FTS5 BM25
+        # only orders it under `--rank` (unscored matches last).
+        where.append("instr(w.haystack, ?) > 0")
+        params.append(args.search.lower())
+        clauses = parse_query(args.search) if rank else []
+        if clauses:
+            source += (
+                " LEFT JOIN (SELECT rowid, bm25(workouts_fts, "
+                f"{_FTS_WEIGHTS}) AS score FROM workouts_fts"
+                " WHERE workouts_fts MATCH ?) AS f ON f.rowid = w.id"
+            )
+            join_params.append(_fts_query(clauses))
+            order = "f.score IS NULL, f.score, w.id"
+
+    sql = f"SELECT w.id FROM {source}"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    return f"{sql} ORDER BY {order}", join_params + params
+
+
+def load_sqlite_catalog(db_path: Path) -> SqliteCatalog:
+    import sqlite3
+
+    try:
+        conn = sqlite3.connect(
+            f"{db_path.resolve().as_uri()}?mode=ro", uri=True, check_same_thread=False
+        )
+        return SqliteCatalog(db_path, conn)
+    except sqlite3.DatabaseError as exc:
+        raise typer.BadParameter(
+            f"Keine gültige fithit SQLite-Datenbank: {db_path} ({exc})"
+        ) from exc
@@ -0,0 +1,287 @@
+from __future__ import annotations
+
+from array import array
+from collections import Counter
+from collections.abc import Hashable, Iterator, Mapping, Sequence
+from typing import Any, overload
+
+# Free-text fields, stored as one string blob per field plus offsets.
+TEXT_FIELDS = ("description", "name", "link")
+
+_MISSING = object()
+
+
+def _codes(size: int, count: int) -> array:
+    """Zeroed code buffer with the smallest unsigned type holding `count`."""
+    typecode = "B" if count <= 0xFF else "H" if count <= 0xFFFF else "I"
+    return array(typecode, bytes(array(typecode).itemsize * size))
+
+
+def _narrow(codes: list[int], count: int) -> array:
+    buf = _codes(0, count)
+    buf.fromlist(codes)
+    return buf
+
+
+class _DictColumn:
+    """Scalar values as integer codes into a table of distinct values."""
+
+    def __init__(self, values: list[Any], codes: array) -> None:
+        self.values = values
+        self.codes = codes
+
+    @classmethod
+    def build(cls, cells: list[Any]) -> _DictColumn:
+        lookup: dict[tuple[type, Any], int] = {}
+        values: list[Any] = [_MISSING]
+        codes: list[int] = []
+        for value in cells:
+            if value is _MISSING:
+                codes.append(0)
+                continue
+            # Keyed by type too, so 1, 1.0 and True stay distinct values.
+            key = (type(value), value)
+            code = lookup.get(key)
+            if code is None:
+                code = lookup[key] = len(values)
+                values.append(value)
+            codes.append(code)
+        return cls(values, _narrow(codes, len(values)))
+
+    def get(self, pos: int) -> Any:
+        return self.values[self.codes[pos]]
+
+    def value_counts(self) -> dict[Any, int]:
+        counts = Counter(self.codes)
+        return {self.values[c]: n for c, n in counts.items() if c}
+
+
+class _MultiColumn:
+    """String-or-list values: offsets into one shared code array per field.
+
+    `is_list` keeps whether a row held a list or a bare scalar, so rows
+    round-trip unchanged.
+    """
+
+    def __init__(
+        self, values: list[Any], offsets: array, codes: array, is_list: bytearray
+    ) -> None:
+        self.values = values
+        self.offsets = offsets
+        self.codes = codes
+        self.is_list = is_list
+
+    @classmethod
+    def build(cls, cells: list[Any]) -> _MultiColumn:
+        lookup: dict[tuple[type, Any], int] = {}
+        values: list[Any] = []
+        offsets = array("I", [0])
+        codes: list[int] = []
+        is_list = bytearray(len(cells))
+        for pos, cell in enumerate(cells):
+            if cell is not _MISSING:
+                items = cell if isinstance(cell, list) else [cell]
+                is_list[pos] = isinstance(cell, list)
+                for value in items:
+                    key = (type(value), value)
+                    code = lookup.get(key)
+                    if code is None:
+                        code = lookup[key] = len(values)
+                        values.append(value)
+                    codes.append(code)
+            offsets.append(len(codes))
+        return cls(values, offsets, _narrow(codes, len(values)), is_list)
+
+    def elements(self, pos: int) -> list[Any]:
+        values = self.values
+        return [
+            values[c] for c in self.codes[self.offsets[pos] : self.offsets[pos + 1]]
+        ]
+
+    def get(self, pos: int) -> Any:
+        items = self.elements(pos)
+        return items if self.is_list[pos] else items[0]
+
+    def value_counts(self) -> dict[Any, int]:
+        """Per-row values; lists are counted as tuples."""
+        counts: Counter[Any] = Counter()
+        for pos in range(len(self.is_list)):
+            items = self.elements(pos)
+            if self.is_list[pos]:
+                counts[tuple(items)] += 1
+            elif items:
+                counts[items[0]] += 1
+        return dict(counts)
+
+
+class _TextColumn:
+    """Strings concatenated into one blob, sliced by offsets on access."""
+
+    def __init__(self, blob: str, offsets: array) -> None:
+        self.blob = blob
+        self.offsets = offsets
+
+    @classmethod
+    def build(cls, cells: list[Any]) -> _TextColumn:
+        parts: list[str] = []
+        offsets = array("Q", [0])
+        end = 0
+        for cell in cells:
+            if cell is not _MISSING:
+                parts.append(cell)
+                end += len(cell)
+            offsets.append(end)
+        return cls("".join(parts), offsets)
+
+    def get(self, pos: int) -> str:
+        return self.blob[self.offsets[pos] : self.offsets[pos + 1]]
+
+
+class _ObjectColumn:
+    """Fallback for values that cannot be dictionary-encoded (nested objects)."""
+
+    def __init__(self, cells: list[Any]) -> None:
+        self.cells = cells
+
+    def get(self, pos: int) -> Any:
+        return self.cells[pos]
+
+
+_Column = _DictColumn | _MultiColumn | _TextColumn | _ObjectColumn
+
+
+def _column_for(field: str, cells: list[Any]) -> _Column:
+    present = [c for c in cells if c is not _MISSING]
+    if field in TEXT_FIELDS and all(isinstance(c, str) for c in present):
+        return _TextColumn.build(cells)
+    has_list = False
+    for cell in present:
+        items = cell if isinstance(cell, list) else [cell]
+        has_list = has_list or isinstance(cell, list)
+        if not all(isinstance(v, Hashable) for v in items):
+            return _ObjectColumn(cells)
+    if has_list:
+        return _MultiColumn.build(cells)
+    return _DictColumn.build(cells)
+
+
+class RowView(Mapping[str, Any]):
+    """Read-only mapping over one stored row; decodes fields on access."""
+
+    __slots__ = ("_pos", "_store")
+
+    def __init__(self, store: WorkoutStore, pos: int) -> None:
+        self._store = store
+        self._pos = pos
+
+    def _fields(self) -> tuple[str, ...]:
+        return self._store.shapes[self._store.shape_codes[self._pos]]
+
+    def __getitem__(self, field: str) -> Any:
+        if field not in self._fields():
+            raise KeyError(field)
+        return self._store.columns[field].get(self._pos)
+
+    def __contains__(self, field: object) -> bool:
+        return field in self._fields()
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._fields())
+
+    def __len__(self) -> int:
+        return len(self._fields())
+
+
+class WorkoutStore(Sequence[dict[str, Any]]):
+    """Columnar, dictionary-encoded storage for a list of workouts.
+
+    Categorical fields (category, trainer, duration, ...) hold integer codes
+    in `array` buffers into one table of distinct values, string-or-list
+    fields use offsets into a shared code array, and free text lives in one
+    string per field. Each row's key order is kept as a code into a table of
+    field tuples, so indexing returns a dict equal to the original workout.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        shapes: list[tuple[str, ...]],
+        shape_codes: array,
+        columns: dict[str, _Column],
+    ) -> None:
+        self.size = size
+        self.shapes = shapes
+        self.shape_codes = shape_codes
+        self.columns = columns
+
+    @classmethod
+    def build(cls, workouts: Sequence[Mapping[str, Any]]) -> WorkoutStore:
+        shape_lookup: dict[tuple[str, ...], int] = {}
+        shapes: list[tuple[str, ...]] = []
+        shape_codes: list[int] = []
+        cells: dict[str, list[Any]] = {}
+
+        for pos, workout in enumerate(workouts):
+            shape = tuple(workout)
+            code = shape_lookup.get(shape)
+            if code is None:
+                code = shape_lookup[shape] = len(shapes)
+                shapes.append(shape)
+            shape_codes.append(code)
+            for field, value in workout.items():
+                column = cells.get(field)
+                if column is None:
+                    column = cells[field] = [_MISSING] * pos
+                column.append(value)
+            for field, column in cells.items():
+                if len(column) == pos:
+                    column.append(_MISSING)
+
+        columns = {field: _column_for(field, col) for field, col in cells.items()}
+        return cls(len(shape_codes), shapes, _narrow(shape_codes, len(shapes)), columns)
+
+    def __len__(self) -> int:
+        return self.size
+
+    @overload
+    def __getitem__(self, pos: int) -> dict[str, Any]: ...
+
+    @overload
+    def __getitem__(self, pos: slice) -> list[dict[str, Any]]: ...
+
+    def __getitem__(self, pos: int | slice) -> Any:
+        if isinstance(pos, slice):
+            return [self[i] for i in range(*pos.indices(self.size))]
+        if pos < 0:
+            pos += self.size
+        if not 0 <= pos < self.size:
+            raise IndexError("workout index out of range")
+        columns = self.columns
+        return {
+            field: columns[field].get(pos)
+            for field in self.shapes[self.shape_codes[pos]]
+        }
+
+    def view(self, pos: int) -> RowView:
+        """Lazy mapping over row `pos` (no dict is materialized)."""
+        return RowView(self, pos)
+
+    def views(self) -> Iterator[RowView]:
+        return (RowView(self, pos) for pos in range(self.size))
+
+    def value_counts(self, field: str) -> dict[Any, int]:
+        """Row count per value of `field` (rows without it are skipped).
+
+        List values are counted as tuples.
+        """
+        column = self.columns.get(field)
+        if column is None:
+            return {}
+        if isinstance(column, (_DictColumn, _MultiColumn)):
+            return column.value_counts()
+        counts: Counter[Any] = Counter()
+        for view in self.views():
+            value = view.get(field, _MISSING)
+            if value is not _MISSING:
+                counts[tuple(value) if isinstance(value, list) else value] += 1
+        return dict(counts)
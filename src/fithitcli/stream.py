@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import codecs
+import json
+import re
+from collections.abc import Collection, Iterator
+from typing import IO, Any
+
+CHUNK_SIZE = 1 << 16
+
+_WS_RE = re.compile(r"[ \t\n\r]*")
+_STRUCT_RE = re.compile(r'["\[\]{}]')
+_STRING_SPECIAL_RE = re.compile(r'["\\]')
+_SCALAR_END_RE = re.compile(r"[ \t\n\r,\]}]")
+
+
+class StreamError(ValueError):
+    """Raised when the streamed JSON is malformed or truncated."""
+
+
+class JsonStream:
+    """Pull-style reader over a JSON document in a binary file object.
+
+    Only the part of the document between the start of the value currently
+    being decoded and the read position is kept in memory, so values that are
+    skipped are never materialized.
+    """
+
+    def __init__(self, fp: IO[bytes], chunk_size: int = CHUNK_SIZE) -> None:
+        self._fp = fp
+        self._chunk_size = chunk_size
+        self._decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        self._buf = ""
+        self._pos = 0
+        self._mark: int | None = None
+        self._eof = False
+
+    def _fill(self) -> bool:
+        if self._eof:
+            return False
+        drop = self._pos if self._mark is None else min(self._pos, self._mark)
+        if drop:
+            self._buf = self._buf[drop:]
+            self._pos -= drop
+            if self._mark is not None:
+                self._mark -= drop
+        chunk = self._fp.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+            self._buf += self._decoder.decode(b"", final=True)
+            return False
+        self._buf += self._decoder.decode(chunk)
+        return True
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character ('' at EOF)."""
+        while True:
+            self._pos = _WS_RE.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise StreamError(f"'{char}' erwartet, '{found or 'EOF'}' gefunden")
+        self._pos += 1
+
+    def _skip_string(self) -> None:
+        self._pos += 1  # opening quote
+        while True:
+            m = _STRING_SPECIAL_RE.search(self._buf, self._pos)
+            if m is None:
+                self._pos = len(self._buf)
+                if not self._fill():
+                    raise StreamError("unterminated string")
+                continue
+            if m.group() == '"':
+                self._pos = m.end()
+                return
+            if m.end() >= len(self._buf):
+                # Backslash is the last buffered char; need the escaped one too.
+                self._pos = m.start()
+                if not self._fill():
+                    raise StreamError("unterminated string")
+                continue
+            self._pos = m.end() + 1
+
+    def _skip_container(self) -> None:
+        depth = 0
+        while True:
+            m = _STRUCT_RE.search(self._buf, self._pos)
+            if m is None:
+                self._pos = len(self._buf)
+                if not self._fill():
+                    raise StreamError("unexpected end of document")
+                continue
+            char = m.group()
+            if char == '"':
+                self._pos = m.start()
+                self._skip_string()
+                continue
+            self._pos = m.end()
+            depth += 1 if char in "[{" else -1
+            if depth == 0:
+                return
+
+    def _skip_scalar(self) -> None:
+        while True:
+            m = _SCALAR_END_RE.search(self._buf, self._pos)
+            if m is not None:
+                self._pos = m.start()
+                return
+            self._pos = len(self._buf)
+            if not self._fill():
+                return
+
+    def skip_value(self) -> None:
+        char = self.peek()
+        if char == "":
+            raise StreamError("unexpected end of document")
+        if char == '"':
+            self._skip_string()
+        elif char in "[{":
+            self._skip_container()
+        else:
+            self._skip_scalar()
+
+    def read_value(self) -> Any:
+        self.peek()
+        self._mark = self._pos
+        try:
+            self.skip_value()
+            text = self._buf[self._mark : self._pos]
+        finally:
+            self._mark = None
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError as exc:
+            raise StreamError(str(exc)) from exc
+
+    def iter_object(self) -> Iterator[str]:
+        """Yield the keys of an object; the caller must consume each value."""
+        self.expect("{")
+        if self.peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            if self.peek() != '"':
+                raise StreamError("object key expected")
+            key = self.read_value()
+            self.expect(":")
+            yield key
+            char = self.peek()
+            self._pos += 1
+            if char == "}":
+                return
+            if char != ",":
+                raise StreamError(f"',' or '}}' expected, got '{char or 'EOF'}'")
+
+    def iter_array(self) -> Iterator[None]:
+        """Yield once per array item; the caller must consume each item."""
+        self.expect("[")
+        if self.peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield None
+            char = self.peek()
+            self._pos += 1
+            if char == "]":
+                return
+            if char != ",":
+                raise StreamError(f"',' or ']' expected, got '{char or 'EOF'}'")
+
+    def iter_values(self) -> Iterator[Any]:
+        """Decode the items of an array one at a time."""
+        for _ in self.iter_array():
+            yield self.read_value()
+
+
+def iter_tables(
+    fp: IO[bytes],
+    relevant: Collection[str],
+    *,
+    chunk_size: int = CHUNK_SIZE,
+) -> Iterator[tuple[str, list[dict[str, Any]], Iterator[Any]]]:
+    """Stream `(name, columns, rows)` for each relevant table of content.json.
+
+    `rows` decodes one row at a time and must be consumed before advancing to
+    the next table. Tables whose name is not in `relevant` are skipped without
+    being decoded. Should a table list its rows before its name or columns,
+    those rows are decoded up front as a fallback.
+    """
+    stream = JsonStream(fp, chunk_size)
+    for key in stream.iter_object():
+        if key != "tables" or stream.peek() != "[":
+            stream.skip_value()
+            continue
+        for _ in stream.iter_array():
+            if stream.peek() != "{":
+                stream.skip_value()
+                continue
+            yield from _iter_table(stream, relevant)
+
+
+def _iter_table(
+    stream: JsonStream, relevant: Collection[str]
+) -> Iterator[tuple[str, list[dict[str, Any]], Iterator[Any]]]:
+    name: Any = None
+    columns: Any = None
+    early_rows: list[Any] | None = None
+
+    for key in stream.iter_object():
+        known = name is not None
+        if key == "name":
+            name = stream.read_value()
+        elif key == "columns" and (not known or name in relevant):
+            columns = stream.read_value()
+        elif key == "rows" and (not known or name in relevant):
+            if stream.peek() != "[":
+                stream.skip_value()
+            elif known and columns is not None:
+                rows = stream.iter_values()
+                yield name, columns, rows
+                for _ in rows:
+                    pass
+            else:
+                early_rows = stream.read_value()
+        else:
+            stream.skip_value()
+
+    if early_rows is not None and name in relevant:
+        yield name, columns or [], iter(early_rows)
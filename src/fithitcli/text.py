@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import math
+import re
+from typing import Any
+
+# Workout fields searched by `--search`, with their BM25 term weight.
+TEXT_FIELDS = {
+    "name": 2.0,
+    "description": 1.0,
+    "detailed_moves": 1.0,
+    "workout_details": 1.0,
+    "notes": 1.0,
+}
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+STOPWORDS = frozenset(
+    {"a", "an", "and", "at", "by", "for", "in", "is", "of", "on", "the", "to"}
+    | {"with", "you", "your", "this", "that", "it", "or"}
+)
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_OR_RE = re.compile(r"\s+OR\s+|\s*\|\s*")
+_SUFFIXES = ("ings", "ing", "ers", "er", "ies", "es", "ed", "ly", "s")
+
+
+def stem(token: str) -> str:
+    """Light English suffix stripping, applied to index and query alike."""
+    for suffix in _SUFFIXES:
+        if not token.endswith(suffix):
+            continue
+        base = token[: -len(suffix)]
+        if len(base) < (3 if suffix in ("s", "es") else 4):
+            continue
+        if suffix == "ies":
+            return base + "y"
+        if suffix == "es":
+            if base.endswith(("s", "x", "z", "ch", "sh")):
+                return base
+            return token[:-1]
+        if suffix == "s" and base.endswith(("s", "u", "i")):
+            return token
+        if (
+            suffix in ("ing", "ings", "ed", "er", "ers")
+            and len(base) >= 4
+            and base[-1] == base[-2]
+            and base[-1] not in "lsz"
+        ):
+            return base[:-1]
+        return base
+    return token
+
+
+def tokenize(text: str) -> list[str]:
+    return [
+        stem(tok) for tok in _TOKEN_RE.findall(text.lower()) if tok not in STOPWORDS
+    ]
+
+
+def parse_query(query: str) -> list[list[str]]:
+    """Split a query into OR-ed clauses of AND-ed terms.
+
+    `hip opener` needs both terms, `hip OR shoulder` (or `hip | shoulder`)
+    needs either side.
+    """
+    clauses: list[list[str]] = []
+    for part in _OR_RE.split(query.strip()):
+        terms = list(dict.fromkeys(tokenize(part)))
+        if terms:
+            clauses.append(terms)
+    return clauses
+
+
+def _field_text(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        return " ".join(str(v) for v in value if v is not None)
+    return str(value)
+
+
+class TextIndex:
+    """Term postings over the workout text fields with BM25 scoring."""
+
+    def __init__(
+        self,
+        postings: dict[str, tuple[list[int], list[float]]],
+        doc_lengths: list[float],
+    ) -> None:
+        self.postings = postings
+        self.doc_lengths = doc_lengths
+        size = len(doc_lengths)
+        self._avg_length = (sum(doc_lengths) / size) if size else 0.0
+
+    @classmethod
+    def build(cls, workouts: list[dict[str, Any]]) -> TextIndex:
+        postings: dict[str, tuple[list[int], list[float]]] = {}
+        doc_lengths: list[float] = []
+
+        for pos, workout in enumerate(workouts):
+            freqs: dict[str, float] = {}
+            length = 0.0
+            for field, weight in TEXT_FIELDS.items():
+                for term in tokenize(_field_text(workout.get(field))):
+                    freqs[term] = freqs.get(term, 0.0) + weight
+                    length += weight
+            doc_lengths.append(length)
+            for term, freq in freqs.items():
+                docs, tfs = postings.setdefault(term, ([], []))
+                docs.append(pos)
+                tfs.append(freq)
+
+        return cls(postings, doc_lengths)
+
+    def to_state(self) -> dict[str, Any]:
+        return {
+            "postings": {t: [d, f] for t, (d, f) in self.postings.items()},
+            "doc_lengths": self.doc_lengths,
+        }
+
+    @classmethod
+    def from_state(cls, state: dict[str, Any]) -> TextIndex:
+        return cls(
+            {t: (d, f) for t, (d, f) in state["postings"].items()},
+            state["doc_lengths"],
+        )
+
+    def _term_scores(self, term: str) -> dict[int, float]:
+        entry = self.postings.get(term)
+        if entry is None:
+            return {}
+        docs, tfs = entry
+        size = len(self.doc_lengths)
+        idf = math.log(1.0 + (size - len(docs) + 0.5) / (len(docs) + 0.5))
+        avg = self._avg_length or 1.0
+        scores: dict[int, float] = {}
+        for pos, tf in zip(docs, tfs, strict=True):
+            norm = BM25_K1 * (1.0 - BM25_B + BM25_B * self.doc_lengths[pos] / avg)
+            scores[pos] = idf * tf * (BM25_K1 + 1.0) / (tf + norm)
+        return scores
+
+    def search(self, query: str) -> dict[int, float] | None:
+        """BM25 scores of all matching positions.
+
+        Returns None when the query has no searchable terms, so callers can fall
+        back to a plain substring test.
+        """
+        clauses = parse_query(query)
+        if not clauses:
+            return None
+
+        per_term = {
+            term: self._term_scores(term) for clause in clauses for term in clause
+        }
+        results: dict[int, float] = {}
+        for clause in clauses:
+            term_scores = sorted((per_term[t] for t in clause), key=len)
+            if not term_scores[0]:
+                continue
+            for pos in term_scores[0]:
+                if all(pos in other for other in term_scores[1:]):
+                    results[pos] = sum(per_term[t].get(pos, 0.0) for t in per_term)
+        return results
@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+TRACE_ENV = "FITHIT_TRACE"
+TRACE_VERSION = 1
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc: object) -> None:
+        return None
+
+
+_NO_SPAN = _NoSpan()
+
+
+class _Span:
+    __slots__ = ("_name", "_path", "_start", "_tracer")
+
+    def __init__(self, tracer: Tracer, name: str) -> None:
+        self._tracer = tracer
+        self._name = name
+
+    def __enter__(self) -> None:
+        stack = self._tracer._stack()
+        self._path = f"{stack[-1]}/{self._name}" if stack else self._name
+        stack.append(self._path)
+        self._start = time.perf_counter()
+
+    def __exit__(self, *exc: object) -> None:
+        elapsed = time.perf_counter() - self._start
+        self._tracer._stack().pop()
+        self._tracer._add(self._path, elapsed, 1)
+
+
+class Tracer:
+    """Wall time per stage and counters of one command.
+
+    Spans nest per thread (`parse/write/index`); repeated spans add up.
+    `report()` is the JSON object `--profile` writes.
+    """
+
+    def __init__(self, command: str) -> None:
+        self.command = command
+        self.started = time.perf_counter()
+        # span path -> [calls, total seconds, max seconds]
+        self.spans: dict[str, list[float]] = {}
+        self.counters: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self) -> list[str]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _add(self, path: str, seconds: float, calls: int) -> None:
+        with self._lock:
+            entry = self.spans.get(path)
+            if entry is None:
+                self.spans[path] = [calls, seconds, seconds / max(calls, 1)]
+            else:
+                entry[0] += calls
+                entry[1] += seconds
+                entry[2] = max(entry[2], seconds / max(calls, 1))
+
+    def span(self, name: str) -> _Span:
+        return _Span(self, name)
+
+    def record(self, name: str, seconds: float, calls: int = 1) -> None:
+        """Add time measured elsewhere as span `name` under the current one."""
+        stack = self._stack()
+        self._add(f"{stack[-1]}/{name}" if stack else name, seconds, calls)
+
+    def count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def report(self) -> dict[str, Any]:
+        def ms(seconds: float) -> float:
+            return round(seconds * 1000, 3)
+
+        return {
+            "version": TRACE_VERSION,
+            "command": self.command,
+            "total_ms": ms(time.perf_counter() - self.started),
+            "spans": [
+                {
+                    "name": path,
+                    "calls": int(calls),
+                    "total_ms": ms(total),
+                    "max_ms": ms(longest),
+                }
+                for path, (calls, total, longest) in self.spans.items()
+            ],
+            "counters": dict(self.counters),
+        }
+
+
+_tracer: Tracer | None = None
+_profiler: Any = None
+
+
+def span(name: str) -> _Span | _NoSpan:
+    """Time the block as stage `name`; a shared no-op unless tracing."""
+    tracer = _tracer
+    return _NO_SPAN if tracer is None else tracer.span(name)
+
+
+def count(name: str, n: int = 1) -> None:
+    tracer = _tracer
+    if tracer is not None:
+        tracer.count(name, n)
+
+
+def record(name: str, seconds: float, calls: int = 1) -> None:
+    tracer = _tracer
+    if tracer is not None:
+        tracer.record(name, seconds, calls)
+
+
+def enabled() -> bool:
+    return _tracer is not None
+
+
+def trace_target(profile: bool) -> str | None:
+    """Where the report goes: `FITHIT_TRACE` (`1`/`-` for stderr, else a
+    file the report is appended to as one JSON line), or stderr for
+    `--profile`; None if tracing is off."""
+    value = os.environ.get(TRACE_ENV, "").strip()
+    if value in ("", "0"):
+        return "-" if profile else None
+    return "-" if value in ("1", "-", "stderr") else value
+
+
+def start(command: str, *, pstats: str | None = None) -> Tracer:
+    """Trace `command`; with `pstats`, also run it under cProfile."""
+    global _tracer, _profiler
+    _tracer = Tracer(command)
+    if pstats:
+        import cProfile
+
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+    return _tracer
+
+
+def finish(target: str | None, *, pstats: str | None = None) -> None:
+    """Stop tracing, write the report to `target` and the profile to `pstats`."""
+    global _tracer, _profiler
+    tracer, profiler = _tracer, _profiler
+    _tracer = _profiler = None
+    if profiler is not None:
+        profiler.disable()
+        if pstats:
+            profiler.dump_stats(pstats)
+    if tracer is None or target is None:
+        return
+    line = json.dumps(tracer.report(), ensure_ascii=False)
+    if target == "-":
+        sys.stderr.write(line + "\n")
+        sys.stderr.flush()
+        return
+    path = Path(target).expanduser()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a", encoding="utf-8") as f:
+        f.write(line + "\n")
@@ -1,41 +1,21 @@
 from __future__ import annotations
 
-import json
-import os
+from collections.abc import Iterator, Mapping, Sequence
 from pathlib import Path
 from typing import Any
 
 import typer
-from rich.console import Console
-from rich.table import Table
 
+from . import tracing
+from .db import default_db_path, load_catalog
+from .output import console, print_json, print_json_lines
 from .schema import REQUIRED_FIELDS, SCHEMA_VERSION
+from .store import WorkoutStore
 
-console = Console()
 
-
-def _default_db_path() -> Path:
-    env = os.environ.get("FITHIT_DB_PATH")
-    if env:
-        return Path(env).expanduser()
-    xdg_data_home = os.environ.get("XDG_DATA_HOME")
-    base = (
-        Path(xdg_data_home).expanduser()
-        if xdg_data_home
-        else (Path.home() / ".local" / "share")
-    )
-    return base / "fithit" / "workouts.json"
-
-
-def _load(db_path: Path) -> list[dict[str, Any]]:
-    if not db_path.exists():
-        raise typer.BadParameter(
-            f"Datenbank nicht gefunden: {db_path}\n"
-            "Tipp: `fithit parse <dtable>` ausführen oder FITHIT_DB_PATH setzen."
-        )
-    with db_path.open("r", encoding="utf-8") as f:
-        data = json.load(f)
-    if not isinstance(data, list):
+def _load(db_path: Path) -> Sequence[Any]:
+    data = load_catalog(db_path).workouts
+    if isinstance(data, str) or not isinstance(data, Sequence):
         raise typer.BadParameter("workouts.json muss eine Liste von Workouts sein.")
     return data
 
@@ -58,7 +38,7 @@ def _validate_workout(
     errors: list[dict[str, Any]] = []
     warnings: list[dict[str, Any]] = []
 
-    if not isinstance(workout, dict):
+    if not isinstance(workout, Mapping):
         errors.append(
             {"index": index, "field": "*", "issue": "workout ist kein Objekt"}
         )
@@ -113,32 +93,65 @@ def _validate_workout(
     return errors, warnings
 
 
-def validate_cmd(*, format: str = "compact") -> None:
-    db_path = _default_db_path()
-    workouts = _load(db_path)
-
+def validate_workouts(workouts: Sequence[Any]) -> dict[str, Any]:
     errors: list[dict[str, Any]] = []
     warnings: list[dict[str, Any]] = []
-
-    for idx, workout in enumerate(workouts):
+    summary: dict[str, Any] = {}
+    for item in iter_validation(workouts):
+        level = item.pop("level", None)
+        if level == "error":
+            errors.append(item)
+        elif level == "warning":
+            warnings.append(item)
+        else:
+            summary = item
+    return {**summary, "errors": errors, "warnings": warnings}
+
+
+def iter_validation(workouts: Sequence[Any]) -> Iterator[dict[str, Any]]:
+    """`validate --format ndjson`: one line per issue, then a summary line.
+
+    Issues carry `level` ("error" or "warning"); the summary has the counts
+    in `errors`/`warnings`.
+    """
+    counts = {"error": 0, "warning": 0}
+    rows = workouts.views() if isinstance(workouts, WorkoutStore) else workouts
+    for idx, workout in enumerate(rows):
         err, warn = _validate_workout(workout, idx)
-        errors.extend(err)
-        warnings.extend(warn)
-
-    summary = {
+        for level, items in (("error", err), ("warning", warn)):
+            counts[level] += len(items)
+            for item in items:
+                yield {"level": level, **item}
+    yield {
         "schema_version": SCHEMA_VERSION,
         "total_workouts": len(workouts),
-        "errors": errors,
-        "warnings": warnings,
-        "ok": len(errors) == 0,
+        "errors": counts["error"],
+        "warnings": counts["warning"],
+        "ok": counts["error"] == 0,
     }
 
+
+def validate_cmd(*, format: str = "compact") -> None:
+    db_path = default_db_path()
+    with tracing.span("load"):
+        workouts = _load(db_path)
+
     fmt = (format or "compact").lower()
+    if fmt == "ndjson":
+        with tracing.span("validate"):
+            print_json_lines(iter_validation(workouts))
+        return
+    with tracing.span("validate"):
+        summary = validate_workouts(workouts)
+    errors = summary["errors"]
+    warnings = summary["warnings"]
     if fmt == "json":
-        console.print_json(json.dumps(summary, ensure_ascii=False, indent=2))
+        print_json(summary)
         return
     if fmt != "compact":
-        raise typer.BadParameter("--format muss 'compact' oder 'json' sein")
+        raise typer.BadParameter("--format muss 'compact', 'json' oder 'ndjson' sein")
+
+    from rich.table import Table
 
     console.print(f"DB: {db_path}")
     console.print(f"Schema: v{SCHEMA_VERSION}")
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+import typer
+
+import fithitcli.db as db_module
+from fithitcli.atomic import generation, writer_lock
+from fithitcli.parse import _write_db, parse_content
+
+FIXTURE_PATH = Path(__file__).parent / "fixtures" / "workouts.sample.json"
+
+
+def _workouts() -> list[dict]:
+    return json.loads(FIXTURE_PATH.read_text(encoding="utf-8"))
+
+
+def _write(workouts, out_path: Path) -> None:
+    with contextlib.redirect_stdout(io.StringIO()):
+        _write_db([dict(w) for w in workouts], {}, source="test", out_path=out_path)
+
+
+@pytest.mark.parametrize("name", ["workouts.json", "workouts.sqlite"])
+def test_summary_records_db_fingerprint(tmp_path: Path, name: str):
+    db_path = tmp_path / name
+    _write(_workouts(), db_path)
+    summary = json.loads((tmp_path / "summary.json").read_text(encoding="utf-8"))
+    assert summary["fingerprint"] == db_module.load_catalog(db_path).fingerprint
+    assert not list(tmp_path.glob(".*.tmp"))
+
+
+def test_failed_generation_keeps_previous_files(tmp_path: Path):
+    db_path = tmp_path / "workouts.json"
+    summary_path = tmp_path / "summary.json"
+    db_path.write_text("old db", encoding="utf-8")
+    summary_path.write_text("old summary", encoding="utf-8")
+
+    with pytest.raises(RuntimeError):
+        with generation(db_path) as gen:
+            with gen.open(summary_path, "w", encoding="utf-8") as f:
+                f.write("new summary")
+            with gen.open(db_path, "w", encoding="utf-8") as f:
+                f.write("new db")
+            raise RuntimeError("crash before publish")
+
+    assert db_path.read_text(encoding="utf-8") == "old db"
+    assert summary_path.read_text(encoding="utf-8") == "old summary"
+    assert not list(tmp_path.glob(".*.tmp"))
+
+
+def test_second_writer_is_refused(tmp_path: Path):
+    db_path = tmp_path / "workouts.json"
+    _write(_workouts(), db_path)
+    before = db_path.read_bytes()
+
+    with writer_lock(db_path):
+        with pytest.raises(typer.BadParameter, match="anderen Prozess"):
+            parse_content(content={"tables": []}, source="x", output=str(db_path))
+    assert db_path.read_bytes() == before
+
+    with writer_lock(db_path):
+        pass
+
+
+def _dead_pid() -> int:
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    return proc.pid
+
+
+def test_lock_holder_removes_stale_temp_files(tmp_path: Path):
+    db_path = tmp_path / "workouts.json"
+    dead = _dead_pid()
+    stale = [
+        tmp_path / f".workouts.json.{dead}.tmp",
+        tmp_path / f".workouts.json.idx.{dead}.tmp",
+        tmp_path / f".summary.json.{dead}.tmp",
+    ]
+    live = [
+        tmp_path / f".workouts.json.{os.getppid()}.tmp",
+        tmp_path / f".summary.json.{os.getpid()}.tmp",
+    ]
+    foreign = tmp_path / f".notes.txt.{dead}.tmp"
+    for path in [*stale, *live, foreign]:
+        path.write_text("x", encoding="utf-8")
+    with writer_lock(db_path, companions=("summary.json",)):
+        pass
+    assert not any(path.exists() for path in stale)
+    assert all(path.exists() for path in [*live, foreign])
+
+
+def test_lock_only_sweeps_its_own_companions(tmp_path: Path):
+    staged = tmp_path / f".summary.json.{_dead_pid()}.tmp"
+    staged.write_text("x", encoding="utf-8")
+    with writer_lock(tmp_path / "workouts.json.download"):
+        pass
+    assert staged.exists()
+
+
+def test_readers_never_see_a_torn_db(tmp_path: Path):
+    db_path = tmp_path / "workouts.json"
+    small, large = _workouts(), _workouts() * 200
+    _write(small, db_path)
+    sizes = {len(small), len(large)}
+    seen: list[int] = []
+    errors: list[Exception] = []
+    stop = threading.Event()
+
+    def read() -> None:
+        while not stop.is_set():
+            try:
+                seen.append(len(json.loads(db_path.read_bytes())))
+            except Exception as exc:
+                errors.append(exc)
+                return
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    try:
+        for i in range(20):
+            _write(large if i % 2 else small, db_path)
+    finally:
+        stop.set()
+        reader.join()
+    assert not errors
+    assert seen and set(seen) <= sizes
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import itertools
+import json
+import random
+from pathlib import Path
+
+import pytest
+
+from fithitcli.batch import BatchFilter
+from fithitcli.search import SearchArgs, matches
+from fithitcli.store import WorkoutStore
+
+FIXTURE_PATH = Path(__file__).parent / "fixtures" / "workouts.sample.json"
+
+
+def _backends() -> list:
+    backends = ["python"]
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        backends.append(
+            pytest.param("numpy", marks=pytest.mark.skip(reason="numpy missing"))
+        )
+    else:
+        backends.append("numpy")
+    return backends
+
+
+BACKENDS = _backends()
+
+
+def make_args(**overrides):
+    base = dict(
+        category=None,
+        categories=None,
+        duration=None,
+        max_duration=None,
+        equipment_free=False,
+        trainer=None,
+        body_focus=None,
+        flow_style=None,
+        search=None,
+    )
+    base.update(overrides)
+    return SearchArgs(**base)
+
+
+def random_catalog(rng: random.Random, size: int) -> list[dict[str, object]]:
+    categories = ["Yoga", "strength", "Core", "HIIT", None, 7]
+    durations = ["5 min", "10 Min", "20 min", "1h 30", "45", "", None, 30]
+    trainers = ["Dustin", "kim", " Sam ", ["Kim", "Sam"], ["", None], None]
+    focus = ["Upper Body", "Lower Body", ["Upper Body", "Core"], None]
+    equipment = ["Mat", ["Yoga Mat"], ["Dumbbells", "Mat"], "No Equipment", None, []]
+    words = ["Hip", "Opener", "burn", "İstanbul", "flow", "a\x00b", "Core"]
+    workouts = []
+    for _ in range(size):
+        workout: dict[str, object] = {}
+        for field, pool in (
+            ("category", categories),
+            ("duration", durations),
+            ("trainer", trainers),
+            ("body_focus", focus),
+            ("equipment", equipment),
+            ("flow_style", ["Slow", "Energetic", None]),
+            ("dumbbells", ["Light", "Bodyweight", None, None]),
+        ):
+            value = rng.choice(pool)
+            if value is not None or rng.random() < 0.2:
+                workout[field] = value
+        if rng.random() < 0.8:
+            workout["name"] = " ".join(rng.choices(words, k=rng.randint(0, 3)))
+        if rng.random() < 0.5:
+            workout["description"] = " ".join(rng.choices(words, k=rng.randint(0, 6)))
+        workouts.append(workout)
+    return workouts
+
+
+OPTIONS = {
+    "category": [None, "Yoga", "STRENGTH", "none", "7", "Missing"],
+    "categories": [None, "Yoga,HIIT", "core, , Pilates"],
+    "duration": [None, "20 MIN", "45", ""],
+    "max_duration": [None, 0, 10, 45, 130],
+    "equipment_free": [False, True],
+    "trainer": [None, "kim", "Sam", "dustin"],
+    "body_focus": [None, "upper body", "core"],
+    "flow_style": [None, "Slow"],
+    "search": [None, "hip", "BURN", "i̇stanbul", "n\x00", "w c", "x"],
+}
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_batch_matches_scan_on_random_catalogs(backend):
+    rng = random.Random(4321)
+    for size in (0, 1, 7, 8, 9, 300):
+        workouts = random_catalog(rng, size)
+        batch = BatchFilter.build(workouts, backend=backend)
+        assert batch.backend == backend
+        combos = list(itertools.product(*OPTIONS.values()))
+        for values in rng.sample(combos, 400):
+            args = make_args(**dict(zip(OPTIONS, values)))
+            expected = [w for w in workouts if matches(w, args)]
+            assert batch.select(workouts, args) == expected, args
+            assert batch.count(args) == len(expected)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_batch_matches_scan_on_fixture_and_store(backend):
+    workouts = json.loads(FIXTURE_PATH.read_text(encoding="utf-8"))
+    store = WorkoutStore.build(workouts)
+    batch = BatchFilter.build(store, backend=backend)
+    for values in itertools.islice(itertools.product(*OPTIONS.values()), 0, None, 11):
+        args = make_args(**dict(zip(OPTIONS, values)))
+        assert batch.select(store, args) == [w for w in workouts if matches(w, args)]
+
+
+def test_numpy_backend_is_optional():
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        assert BatchFilter.build([{}]).backend == "python"
+        with pytest.raises(ImportError):
+            BatchFilter.build([{}], backend="numpy")
+    else:
+        assert BatchFilter.build([{}]).backend == "numpy"
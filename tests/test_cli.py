@@ -3,6 +3,7 @@ from __future__ import annotations
 import json
 from pathlib import Path
 
+import pytest
 from typer.testing import CliRunner
 
 from fithitcli.cli import app
@@ -12,6 +13,15 @@ FIXTURE_PATH = Path(__file__).parent / "fixtures" / "workouts.sample.json"
 runner = CliRunner()
 
 
+@pytest.fixture()
+def sample_db(tmp_path: Path, monkeypatch) -> Path:
+    """A copy of the sample DB, so sidecars stay out of tests/fixtures."""
+    db_path = tmp_path / "workouts.json"
+    db_path.write_bytes(FIXTURE_PATH.read_bytes())
+    monkeypatch.setenv("FITHIT_DB_PATH", str(db_path))
+    return db_path
+
+
 def test_cli_no_args_shows_help():
     result = runner.invoke(app, [])
     assert result.exit_code == 0
@@ -19,8 +29,7 @@ def test_cli_no_args_shows_help():
     assert "fithit" in result.stdout
 
 
-def test_cli_info_json(monkeypatch):
-    monkeypatch.setenv("FITHIT_DB_PATH", str(FIXTURE_PATH))
+def test_cli_info_json(sample_db):
     result = runner.invoke(app, ["info", "--format", "json"])
     assert result.exit_code == 0
     data = json.loads(result.stdout)
@@ -28,10 +37,66 @@ def test_cli_info_json(monkeypatch):
     assert "schema_version" in data
 
 
-def test_cli_search_json(monkeypatch):
-    monkeypatch.setenv("FITHIT_DB_PATH", str(FIXTURE_PATH))
+def test_cli_search_json(sample_db):
     result = runner.invoke(app, ["search", "--format", "json", "--category", "Yoga"])
     assert result.exit_code == 0
     data = json.loads(result.stdout)
     assert len(data) == 1
     assert data[0]["category"] == "Yoga"
+
+
+def test_cli_search_batch_streams_one_line_per_query(tmp_path: Path, sample_db):
+    queries = [
+        {"id": "mon", "category": "Yoga"},
+        {"max_duration": 20},
+        {"id": "again", "category": "Yoga"},
+        {"trainer": 5},
+        ["Yoga"],
+    ]
+    stdin = "\n".join(json.dumps(q) for q in queries) + "\n\n"
+    result = runner.invoke(
+        app, ["search", "--batch", "-", "--stats", "--limit", "3"], input=stdin
+    )
+    assert result.exit_code == 0
+    lines = [json.loads(line) for line in result.stdout.splitlines()]
+    assert [line["id"] for line in lines] == ["mon", 2, "again", 4, 5]
+
+    single = runner.invoke(app, ["search", "--format", "json", "--category", "Yoga"])
+    assert lines[0]["results"] == json.loads(single.stdout)
+    assert len(lines[1]["results"]) == 3
+    assert lines[1]["stats"]["matches"] > 3
+    assert lines[2]["stats"]["cached"] is True
+    assert "error" in lines[3]
+    assert lines[4]["error"] == "Query muss ein JSON-Objekt sein"
+
+    path = tmp_path / "queries.jsonl"
+    path.write_text(stdin, encoding="utf-8")
+    from_file = runner.invoke(app, ["search", "--batch", str(path), "--limit", "3"])
+    assert [json.loads(line)["id"] for line in from_file.stdout.splitlines()] == [
+        "mon",
+        2,
+        "again",
+        4,
+        5,
+    ]
+
+
+def test_cli_search_ndjson_matches_json(sample_db):
+    args = ["search", "--max-duration", "60", "--limit", "2"]
+    ndjson = runner.invoke(app, [*args, "--format", "ndjson"])
+    assert ndjson.exit_code == 0
+    lines = ndjson.stdout.splitlines()
+    assert len(lines) == 2
+    assert all(": " not in line for line in lines)
+    full = runner.invoke(app, [*args, "--format", "json"])
+    assert [json.loads(line) for line in lines] == json.loads(full.stdout)
+
+
+def test_cli_validate_ndjson(sample_db):
+    ndjson = runner.invoke(app, ["validate", "--format", "ndjson"])
+    assert ndjson.exit_code == 0
+    *issues, summary = [json.loads(line) for line in ndjson.stdout.splitlines()]
+    full = json.loads(runner.invoke(app, ["validate", "--format", "json"]).stdout)
+    assert summary["ok"] == full["ok"]
+    assert summary["errors"] == len(full["errors"])
+    assert [i for i in issues if i.pop("level") == "warning"] == full["warnings"]
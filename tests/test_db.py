@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import errno
+import json
+import os
+from pathlib import Path
+
+import fithitcli.db as db_module
+from fithitcli.filters import public_fields
+
+FIXTURE_PATH = Path(__file__).parent / "fixtures" / "workouts.sample.json"
+
+
+def _copy_fixture(tmp_path: Path) -> Path:
+    db_path = tmp_path / "workouts.json"
+    db_path.write_bytes(FIXTURE_PATH.read_bytes())
+    return db_path
+
+
+def _public(catalog) -> list[dict]:
+    return [public_fields(w) for w in catalog.workouts]
+
+
+def _no_json(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("workouts.json should not be decoded")
+
+    monkeypatch.setattr(db_module.json, "loads", fail)
+
+
+def test_load_catalog_writes_and_uses_sidecar(tmp_path: Path, monkeypatch):
+    db_path = _copy_fixture(tmp_path)
+    expected = json.loads(db_path.read_text(encoding="utf-8"))
+
+    first = db_module.load_catalog(db_path)
+    assert _public(first) == expected
+    assert first.workouts[0]["_category_key"] == "yoga"
+    assert db_module.index_path_for(db_path).exists()
+
+    _no_json(monkeypatch)
+    second = db_module.load_catalog(db_path)
+    assert second.workouts == first.workouts
+    assert second.index.to_state() == first.index.to_state()
+
+
+def test_sidecar_survives_touch_with_same_content(tmp_path: Path, monkeypatch):
+    db_path = _copy_fixture(tmp_path)
+    db_module.load_catalog(db_path)
+
+    stat = db_path.stat()
+    os.utime(db_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    _no_json(monkeypatch)
+    assert len(db_module.load_catalog(db_path).workouts) == 6
+
+
+def test_stale_sidecar_is_rebuilt(tmp_path: Path):
+    db_path = _copy_fixture(tmp_path)
+    db_module.load_catalog(db_path)
+
+    workouts = json.loads(db_path.read_text(encoding="utf-8"))[:2]
+    db_path.write_text(json.dumps(workouts, indent=2), encoding="utf-8")
+
+    assert _public(db_module.load_catalog(db_path)) == workouts
+    assert _public(db_module._read_index(db_path)[0]) == workouts
+
+
+def test_corrupt_sidecar_falls_back_to_json(tmp_path: Path):
+    db_path = _copy_fixture(tmp_path)
+    db_module.index_path_for(db_path).write_bytes(b"garbage")
+
+    assert len(db_module.load_catalog(db_path).workouts) == 6
+
+
+def test_read_only_data_dir_skips_the_sidecar(tmp_path: Path, monkeypatch):
+    db_path = _copy_fixture(tmp_path)
+
+    def read_only(path, *args, **kwargs):
+        raise OSError(errno.EROFS, "Read-only file system", str(path))
+
+    monkeypatch.setattr(db_module, "atomic_open", read_only)
+    catalog = db_module.load_catalog(db_path)
+    assert len(catalog.workouts) == 6
+    assert catalog.fingerprint is not None
+    assert not db_module.index_path_for(db_path).exists()
+    assert list(tmp_path.iterdir()) == [db_path]
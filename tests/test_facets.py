@@ -0,0 +1,266 @@
+from __future__ import annotations
+
+import contextlib
+import copy
+import io
+import itertools
+import json
+import random
+from collections import Counter
+from pathlib import Path
+
+import pytest
+from typer.testing import CliRunner
+
+import fithitcli.info as info_module
+import fithitcli.parse as parse_module
+from fithitcli.cli import app
+from fithitcli.facets import FacetStore, facets_path_for, load_facets
+from fithitcli.filters import _to_str_list, is_equipment_free
+from fithitcli.info import _compute_summary
+from fithitcli.search import SearchArgs, matches
+
+FIXTURE_PATH = Path(__file__).parent / "fixtures" / "workouts.sample.json"
+
+runner = CliRunner()
+
+
+def make_args(**overrides):
+    base = dict(
+        category=None,
+        categories=None,
+        duration=None,
+        max_duration=None,
+        equipment_free=False,
+        trainer=None,
+        body_focus=None,
+        flow_style=None,
+        search=None,
+    )
+    base.update(overrides)
+    return SearchArgs(**base)
+
+
+def random_catalog(rng: random.Random, size: int) -> list[dict[str, object]]:
+    categories = ["Yoga", "strength", "Core", "HIIT", None, 7]
+    durations = ["5 min", "10 Min", "20 min", "1h 30", "45", "", None]
+    trainers = ["Dustin", "kim", " Sam ", ["Kim", "Sam"], ["", None], None]
+    focus = ["Upper Body", "Lower Body", ["Upper Body", "Core"], None]
+    equipment = ["Mat", ["Yoga Mat"], ["Dumbbells", "Mat"], "No Equipment", None]
+    dates = ["2024-12-31", "2025-01-02", "2025-03-04", "", None]
+    workouts = []
+    for _ in range(size):
+        workout: dict[str, object] = {}
+        for field, pool in (
+            ("category", categories),
+            ("duration", durations),
+            ("trainer", trainers),
+            ("body_focus", focus),
+            ("equipment", equipment),
+            ("date", dates),
+        ):
+            value = rng.choice(pool)
+            if value is not None or rng.random() < 0.2:
+                workout[field] = value
+        workouts.append(workout)
+    return workouts
+
+
+OPTIONS = {
+    "category": [None, "Yoga", "STRENGTH", "7", "none"],
+    "categories": [None, "Yoga,HIIT", "core, , Pilates"],
+    "duration": [None, "20 MIN", "45"],
+    "max_duration": [None, 10, 45, 130],
+    "equipment_free": [False, True],
+    "trainer": [None, "kim", "Sam"],
+    "body_focus": [None, "upper body"],
+}
+FIELDS = ["category", "duration", "trainer", "body_focus", "equipment_free"]
+
+
+def _scan_counts(workouts, args) -> dict[str, Counter]:
+    counts = {field: Counter() for field in FIELDS}
+    for workout in workouts:
+        if not matches(workout, args):
+            continue
+        counts["equipment_free"][json.dumps(is_equipment_free(workout))] += 1
+        for field in FIELDS[:-1]:
+            for value in set(_to_str_list(workout.get(field))):
+                counts[field][value] += 1
+    return counts
+
+
+def test_facets_match_summary_and_scan_on_random_catalogs(tmp_path: Path):
+    rng = random.Random(2020)
+    combos = list(itertools.product(*OPTIONS.values()))
+    for size in (0, 1, 50, 400):
+        workouts = random_catalog(rng, size)
+        store = FacetStore.build(workouts)
+        assert store.summary() == _compute_summary(workouts)
+
+        db_path = tmp_path / f"{size}.json"
+        db_path.write_text(json.dumps(workouts), encoding="utf-8")
+        store.save(facets_path_for(db_path), db_path)
+        loaded = load_facets(db_path)
+        assert loaded is not None and loaded.cells == store.cells
+
+        for values in rng.sample(combos, 150):
+            args = make_args(**dict(zip(OPTIONS, values)))
+            counts = loaded.counts(FIELDS, args)
+            assert counts == _scan_counts(workouts, args), args
+    assert store.counts(FIELDS, make_args(search="x")) is None
+
+
+def test_add_remove_is_exact_inverse():
+    rng = random.Random(7)
+    workouts = random_catalog(rng, 200)
+    store = FacetStore.build(workouts)
+    for workout in workouts[:120]:
+        store.remove(workout)
+    assert store.summary() == FacetStore.build(workouts[120:]).summary()
+    assert store.cells == FacetStore.build(workouts[120:]).cells
+
+
+def test_info_reads_facets_without_loading_the_db(monkeypatch, tmp_path: Path):
+    db_path = tmp_path / "workouts.json"
+    workouts = json.loads(FIXTURE_PATH.read_text(encoding="utf-8"))
+    with contextlib.redirect_stdout(io.StringIO()):
+        parse_module._write_db(workouts, {}, source="t", out_path=db_path)
+    monkeypatch.setenv("FITHIT_DB_PATH", str(db_path))
+    expected = runner.invoke(app, ["info", "--format", "json"]).stdout
+
+    def no_scan(db_path):
+        raise AssertionError("DB loaded")
+
+    monkeypatch.setattr(info_module, "_load", no_scan)
+    result = runner.invoke(app, ["info", "--format", "json"])
+    assert result.exit_code == 0
+    assert result.stdout == expected
+
+    # A DB changed behind the store's back is scanned again.
+    db_path.write_text(json.dumps(workouts[:2]), encoding="utf-8")
+    assert load_facets(db_path) is None
+
+
+def _row(idx: int, trainer: str, mtime: str = "2025-01-01T00:00:00") -> dict:
+    return {
+        "_id": f"row{idx}",
+        "_mtime": mtime,
+        "c_date": f"2025-01-{idx + 1:02d}",
+        "c_link": f"https://ok.test/{idx}",
+        "c_trainer": trainer,
+        "c_duration": f"{10 + idx} min",
+    }
+
+
+def _content(rows: list[dict]) -> dict:
+    return {
+        "tables": [
+            {
+                "name": "Yoga",
+                "columns": [
+                    {"key": "c_date", "name": "Date"},
+                    {"key": "c_link", "name": "Link"},
+                    {"key": "c_trainer", "name": "Trainer"},
+                    {"key": "c_duration", "name": "Duration"},
+                ],
+                "rows": rows,
+            }
+        ]
+    }
+
+
+def _parse(rows: list[dict], output: Path, *, incremental: bool) -> None:
+    content = _content(rows)
+    with contextlib.redirect_stdout(io.StringIO()):
+        parse_module.parse_stream(
+            io.BytesIO(json.dumps(content).encode()),
+            source="test",
+            output=str(output),
+            incremental=incremental,
+        )
+
+
+def test_incremental_parse_updates_facets_in_place(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(
+        parse_module,
+        "_validate_links",
+        lambda links, timeout, checker: {u: "broken" not in u for u in links},
+    )
+    output = tmp_path / "workouts.json"
+    rows = [_row(i, "Kim" if i % 2 else "Sam") for i in range(6)]
+    _parse(rows, output, incremental=True)
+
+    changed = copy.deepcopy(rows)
+    changed[1].update(c_trainer="Dustin", _mtime="2025-02-01T00:00:00")
+    changed[2].update(c_link="https://broken.test/2", _mtime="2025-02-01T00:00:00")
+    del changed[3]
+    changed.append(_row(9, "Dustin"))
+
+    applied = []
+    original = parse_module._updated_facets
+    monkeypatch.setattr(
+        parse_module,
+        "_updated_facets",
+        lambda *a: applied.append(original(*a)) or applied[-1],
+    )
+    _parse(changed, output, incremental=True)
+    assert applied and applied[0] is not None
+
+    rebuilt = FacetStore.build(json.loads(output.read_bytes()))
+    stored = load_facets(output)
+    assert stored is not None
+    assert stored.cells == rebuilt.cells and stored.dates == rebuilt.dates
+    assert stored.counts(["trainer"])["trainer"] == {"Dustin": 2, "Sam": 2, "Kim": 1}
+
+    # parse_content keeps no row state, so the stored one is stale afterwards.
+    with contextlib.redirect_stdout(io.StringIO()):
+        parse_module.parse_content(
+            content=_content(rows), source="test", output=str(output)
+        )
+    applied.clear()
+    _parse(changed, output, incremental=True)
+    assert applied == [None]
+    assert load_facets(output).cells == rebuilt.cells
+
+
+def test_search_facets_cli(monkeypatch, tmp_path: Path):
+    db_path = tmp_path / "workouts.json"
+    workouts = json.loads(FIXTURE_PATH.read_text(encoding="utf-8"))
+    with contextlib.redirect_stdout(io.StringIO()):
+        parse_module._write_db(workouts, {}, source="t", out_path=db_path)
+    monkeypatch.setenv("FITHIT_DB_PATH", str(db_path))
+
+    args = ["search", "--limit", "1", "--facets", "category,equipment_free"]
+    data = json.loads(runner.invoke(app, [*args, "--format", "json"]).stdout)
+    assert len(data["results"]) == 1
+    assert sum(data["facets"]["category"].values()) == len(workouts)
+
+    text = runner.invoke(app, [*args, "--search", "flow", "--format", "ndjson"])
+    *_, last = text.stdout.splitlines()
+    facets = json.loads(last)["facets"]
+    assert facets == {
+        field: dict(counts)
+        for field, counts in FacetStore.build(
+            w for w in workouts if matches(w, make_args(search="flow"))
+        )
+        .counts(["category", "equipment_free"])
+        .items()
+    }
+
+    compact = runner.invoke(app, args)
+    assert compact.exit_code == 0 and "equipment_free" in compact.stdout
+
+    bad = runner.invoke(app, ["search", "--facets", "mood"])
+    assert bad.exit_code != 0
+
+
+@pytest.mark.parametrize("name", ["workouts.json", "workouts.sqlite"])
+def test_parse_writes_facets_for_both_backends(tmp_path: Path, name: str):
+    db_path = tmp_path / name
+    workouts = json.loads(FIXTURE_PATH.read_text(encoding="utf-8"))
+    with contextlib.redirect_stdout(io.StringIO()):
+        fingerprint = parse_module._write_db(workouts, {}, source="t", out_path=db_path)
+    store = load_facets(db_path)
+    assert store is not None and store.fingerprint == fingerprint
+    assert store.summary() == _compute_summary(workouts)
@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import hashlib
+import http.server
+import io
+import json
+import os
+import threading
+import zipfile
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+import typer
+
+import fithitcli.fetch as fetch_module
+from fithitcli import tracing
+from fithitcli.fetch import (
+    DownloadState,
+    download_path_for,
+    download_state_path,
+    fetch_cmd,
+)
+from fithitcli.incremental import source_path_for
+
+
+def _dtable(name: str) -> bytes:
+    content = {
+        "tables": [
+            {
+                "name": "Yoga",
+                "columns": [
+                    {"key": "c_date", "name": "Date"},
+                    {"key": "c_desc", "name": "Description"},
+                ],
+                "rows": [
+                    {"_id": f"r{i}", "c_date": f"2025-01-0{i}", "c_desc": name}
+                    for i in range(1, 4)
+                ],
+            }
+        ]
+    }
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        zf.writestr("content.json", json.dumps(content) + " " * 4000)
+    return buf.getvalue()
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):  # noqa: A002
+        pass
+
+    def do_GET(self) -> None:
+        server = self.server
+        server.requests.append(dict(self.headers))
+        body, etag = server.body, server.etag
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        start = 0
+        wanted = self.headers.get("Range")
+        if wanted and self.headers.get("If-Range") == etag:
+            start = int(wanted.removeprefix("bytes=").rstrip("-"))
+            self.send_response(206)
+            self.send_header(
+                "Content-Range", f"bytes {start}-{len(body) - 1}/{len(body)}"
+            )
+        else:
+            self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body) - start))
+        self.end_headers()
+        if server.drops:
+            server.drops -= 1
+            self.wfile.write(body[start : start + server.drop_after])
+            self.close_connection = True
+            return
+        self.wfile.write(body[start:])
+
+
+@pytest.fixture()
+def server() -> Iterator[http.server.ThreadingHTTPServer]:
+    srv = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    srv.daemon_threads = True
+    srv.requests = []
+    srv.body = _dtable("First")
+    srv.etag = '"v1"'
+    srv.drops = 0
+    srv.drop_after = 0
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    srv.url = f"http://127.0.0.1:{srv.server_address[1]}/download-zip/"
+    try:
+        yield srv
+    finally:
+        srv.shutdown()
+        srv.server_close()
+
+
+@pytest.fixture()
+def parses(monkeypatch) -> list[bytes]:
+    calls: list[bytes] = []
+    original = fetch_module.parse_dtable
+
+    def counting(fp, **kwargs):
+        calls.append(fp.read())
+        fp.seek(0)
+        return original(fp, **kwargs)
+
+    monkeypatch.setattr(fetch_module, "parse_dtable", counting)
+    return calls
+
+
+def _names(db_path: Path) -> set[str]:
+    return {w["description"] for w in json.loads(db_path.read_text(encoding="utf-8"))}
+
+
+def test_unchanged_export_stops_at_304(server, parses, tmp_path: Path):
+    db_path = tmp_path / "workouts.json"
+    fetch_cmd(url=server.url, output=str(db_path))
+    assert parses == [server.body] and _names(db_path) == {"First"}
+    spool = download_path_for(db_path)
+    state = DownloadState.load(download_state_path(spool))
+    assert state.complete and state.etag == '"v1"'
+    assert state.sha256 == state.parsed == hashlib.sha256(server.body).hexdigest()
+
+    fetch_cmd(url=server.url, output=str(db_path))
+    assert server.requests[-1]["If-None-Match"] == '"v1"'
+    assert len(parses) == 1
+
+    server.body, server.etag = _dtable("Second"), '"v2"'
+    fetch_cmd(url=server.url, output=str(db_path))
+    assert len(parses) == 2 and _names(db_path) == {"Second"}
+    assert spool.read_bytes() == server.body
+
+
+def test_304_reparses_when_the_last_parse_dropped_rows(server, parses, tmp_path):
+    db_path = tmp_path / "workouts.json"
+    fetch_cmd(url=server.url, output=str(db_path))
+    # What a parse that removed rows for unreachable links leaves behind.
+    source_path_for(db_path).unlink()
+
+    fetch_cmd(url=server.url, output=str(db_path))
+    assert server.requests[-1]["If-None-Match"] == '"v1"'
+    assert len(parses) == 2
+    assert source_path_for(db_path).exists()
+
+
+def test_dropped_connection_resumes_with_range(server, parses, tmp_path: Path):
+    db_path = tmp_path / "workouts.json"
+    server.drops, server.drop_after = 2, 700
+    fetch_cmd(url=server.url, output=str(db_path))
+
+    ranges = [r.get("Range") for r in server.requests]
+    assert ranges == [None, "bytes=700-", "bytes=1400-"]
+    assert all(r.get("If-Range") == '"v1"' for r in server.requests[1:])
+    assert parses == [server.body]
+    assert _names(db_path) == {"First"}
+
+
+def test_trace_counts_only_received_bytes(server, tmp_path: Path):
+    db_path = tmp_path / "workouts.json"
+    trace = tmp_path / "trace.jsonl"
+    server.drops, server.drop_after = 1, 700
+    tracing.start("fetch")
+    try:
+        fetch_cmd(url=server.url, output=str(db_path))
+    finally:
+        tracing.finish(str(trace))
+
+    report = json.loads(trace.read_text())
+    assert report["counters"]["download.bytes"] == len(server.body)
+    spans = {span["name"] for span in report["spans"]}
+    assert {"download", "parse", "parse/unzip", "parse/write"} <= spans
+
+
+def test_fetch_keeps_temp_files_a_running_parse_staged(server, tmp_path: Path):
+    db_path = tmp_path / "workouts.json"
+    parse_pid = os.getppid()  # any live process other than this one
+    staged = [
+        tmp_path / f".summary.json.{parse_pid}.tmp",
+        tmp_path / f".workouts.json.{parse_pid}.tmp",
+    ]
+    for path in staged:
+        path.write_text("staged", encoding="utf-8")
+    fetch_cmd(url=server.url, output=str(db_path))
+    assert _names(db_path) == {"First"}
+    assert all(path.read_text(encoding="utf-8") == "staged" for path in staged)
+
+
+def test_partial_spool_from_earlier_run_is_continued(server, parses, tmp_path):
+    db_path = tmp_path / "workouts.json"
+    server.drops, server.drop_after = 4, 500
+    with pytest.raises(typer.BadParameter, match="Download fehlgeschlagen"):
+        fetch_cmd(url=server.url, output=str(db_path))
+    assert not parses and not db_path.exists()
+    state = DownloadState.load(download_state_path(download_path_for(db_path)))
+    assert not state.complete and state.size == 2000
+
+    fetch_cmd(url=server.url, output=str(db_path))
+    assert server.requests[-1]["Range"] == "bytes=2000-"
+    assert parses == [server.body]
+
+
+def test_changed_export_restarts_instead_of_appending(server, parses, tmp_path):
+    db_path = tmp_path / "workouts.json"
+    server.drops, server.drop_after = 4, 500
+    with pytest.raises(typer.BadParameter):
+        fetch_cmd(url=server.url, output=str(db_path))
+
+    server.body, server.etag = _dtable("Second"), '"v2"'
+    fetch_cmd(url=server.url, output=str(db_path))
+    assert parses == [server.body] and _names(db_path) == {"Second"}
+
+
+def test_non_zip_download_is_rejected(server, tmp_path: Path):
+    server.body = b"<html>login</html>"
+    with pytest.raises(typer.BadParameter, match="keine .dtable"):
+        fetch_cmd(url=server.url, output=str(tmp_path / "workouts.json"))
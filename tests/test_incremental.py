@@ -0,0 +1,263 @@
+from __future__ import annotations
+
+import copy
+import io
+import json
+from pathlib import Path
+
+import pytest
+
+import fithitcli.parse as parse_module
+from fithitcli.incremental import load_source_stamp, row_state_path
+
+
+def _row(idx: int, mtime: str = "2025-01-01T00:00:00") -> dict:
+    return {
+        "_id": f"row{idx}",
+        "_mtime": mtime,
+        "c_date": f"2025-01-{idx + 1:02d}",
+        "c_link": f"https://ok.test/{idx}",
+        "c_desc": {"text": f"Workout {idx}"},
+    }
+
+
+def _content(rows: list[dict]) -> dict:
+    return {
+        "tables": [
+            {
+                "name": "Yoga",
+                "columns": [
+                    {"key": "c_date", "name": "Date"},
+                    {"key": "c_link", "name": "Link"},
+                    {"key": "c_desc", "name": "Description"},
+                ],
+                "rows": rows,
+            }
+        ]
+    }
+
+
+def _parse(content: dict, output: Path, *, incremental: bool) -> None:
+    parse_module.parse_stream(
+        io.BytesIO(json.dumps(content).encode()),
+        source="test",
+        output=str(output),
+        incremental=incremental,
+    )
+
+
+def test_incremental_reparses_only_changed_rows(tmp_path: Path, monkeypatch):
+    checked: list[set[str]] = []
+
+    def fake_validate(links, timeout, checker):
+        checked.append(set(links))
+        return {link: "broken" not in link for link in links}
+
+    monkeypatch.setattr(parse_module, "_validate_links", fake_validate)
+
+    rows = [_row(i) for i in range(5)]
+    output = tmp_path / "inc" / "workouts.json"
+    _parse(_content(rows), output, incremental=True)
+    assert len(checked[-1]) == 5
+    assert row_state_path(output).exists()
+
+    changed = copy.deepcopy(rows)
+    changed[1]["_mtime"] = "2025-02-01T00:00:00"
+    changed[1]["c_desc"] = {"text": "Updated"}
+    changed[2]["c_link"] = "https://broken.test/2"
+    changed[2]["_mtime"] = "2025-02-01T00:00:00"
+    del changed[3]
+    changed.append(_row(9))
+
+    parse_calls: list[str] = []
+    original_parse_row = parse_module.parse_row
+
+    def counting_parse_row(row, *args):
+        parse_calls.append(row["_id"])
+        return original_parse_row(row, *args)
+
+    monkeypatch.setattr(parse_module, "parse_row", counting_parse_row)
+    _parse(_content(changed), output, incremental=True)
+
+    assert sorted(parse_calls) == ["row1", "row2", "row9"]
+    assert checked[-1] == {
+        "https://ok.test/1",
+        "https://broken.test/2",
+        "https://ok.test/9",
+    }
+
+    full = tmp_path / "full" / "workouts.json"
+    _parse(_content(changed), full, incremental=False)
+    assert output.read_bytes() == full.read_bytes()
+
+    workouts = json.loads(output.read_text(encoding="utf-8"))
+    assert "Updated" in {w["description"] for w in workouts}
+    assert all("broken" not in w["link"] for w in workouts)
+
+
+def test_column_change_invalidates_cached_rows(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(
+        parse_module,
+        "_validate_links",
+        lambda links, timeout, checker: {link: True for link in links},
+    )
+    output = tmp_path / "workouts.json"
+    content = _content([_row(0), _row(1)])
+    _parse(content, output, incremental=True)
+
+    content["tables"][0]["columns"][2]["name"] = "Preview"
+    parse_calls: list[str] = []
+    original_parse_row = parse_module.parse_row
+    monkeypatch.setattr(
+        parse_module,
+        "parse_row",
+        lambda row, *args: (
+            parse_calls.append(row["_id"]) or original_parse_row(row, *args)
+        ),
+    )
+    _parse(content, output, incremental=True)
+
+    assert sorted(parse_calls) == ["row0", "row1"]
+
+
+def test_incremental_parallel_parse_matches_serial(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(
+        parse_module,
+        "_validate_links",
+        lambda links, timeout, checker: {link: True for link in links},
+    )
+    monkeypatch.setattr(parse_module, "PARSE_CHUNK_ROWS", 3)
+    rows = [_row(i) for i in range(10)]
+    changed = copy.deepcopy(rows)
+    for idx in (0, 4, 5, 9):
+        changed[idx]["_mtime"] = "2025-02-01T00:00:00"
+        changed[idx]["c_desc"] = {"text": f"Updated {idx}"}
+    changed.append(_row(10))
+
+    outputs = []
+    for jobs in (1, 2):
+        output = tmp_path / f"jobs{jobs}" / "workouts.json"
+        for content in (_content(rows), _content(changed)):
+            parse_module.parse_stream(
+                io.BytesIO(json.dumps(content).encode()),
+                source="test",
+                output=str(output),
+                incremental=True,
+                jobs=jobs,
+            )
+        outputs.append(output)
+
+    serial, parallel = outputs
+    assert parallel.read_bytes() == serial.read_bytes()
+    assert row_state_path(parallel).read_bytes() == row_state_path(serial).read_bytes()
+    assert "Updated 4" in serial.read_text(encoding="utf-8")
+
+
+def _with_noise(content: dict, noise: str) -> dict:
+    """`content` with reversed keys plus an irrelevant table."""
+    tables = [
+        {key: table[key] for key in reversed(table)} for table in content["tables"]
+    ]
+    tables.append({"name": "Notes", "columns": [], "rows": [{"_id": noise}]})
+    return {"tables": tables}
+
+
+@pytest.mark.parametrize("name", ["workouts.json", "workouts.sqlite"])
+def test_unchanged_content_skips_the_pipeline(tmp_path: Path, monkeypatch, name):
+    checked: list[set[str]] = []
+
+    def fake_validate(links, timeout, checker):
+        checked.append(set(links))
+        return {link: True for link in links}
+
+    monkeypatch.setattr(parse_module, "_validate_links", fake_validate)
+    output = tmp_path / name
+    rows = [_row(i) for i in range(3)]
+    _parse(_content(rows), output, incremental=False)
+    assert len(checked) == 1
+    before = output.stat().st_mtime_ns
+    summary_before = (tmp_path / "summary.json").stat().st_mtime_ns
+
+    _parse(_with_noise(_content(rows), "a"), output, incremental=False)
+    parse_module.parse_content(
+        content=_with_noise(_content(rows), "b"), source="test", output=str(output)
+    )
+    assert len(checked) == 1
+    assert output.stat().st_mtime_ns == before
+    assert (tmp_path / "summary.json").stat().st_mtime_ns == summary_before
+
+    parse_module.parse_stream(
+        io.BytesIO(json.dumps(_content(rows)).encode()),
+        source="test",
+        output=str(output),
+        force=True,
+    )
+    assert len(checked) == 2
+
+    changed = copy.deepcopy(rows)
+    changed[0]["c_desc"] = {"text": "Renamed"}
+    _parse(_content(changed), output, incremental=False)
+    assert len(checked) == 3
+
+
+@pytest.mark.parametrize("entry", ["stream", "content"])
+def test_link_outage_does_not_stamp_the_export(tmp_path: Path, monkeypatch, entry):
+    down = {"value": True}
+
+    def fake_validate(links, timeout, checker):
+        return {link: not (down["value"] and link.endswith("/1")) for link in links}
+
+    monkeypatch.setattr(parse_module, "_validate_links", fake_validate)
+    output = tmp_path / "workouts.json"
+    content = _content([_row(i) for i in range(3)])
+
+    def parse() -> int:
+        if entry == "stream":
+            _parse(content, output, incremental=False)
+        else:
+            parse_module.parse_content(
+                content=content, source="test", output=str(output)
+            )
+        return len(json.loads(output.read_text(encoding="utf-8")))
+
+    assert parse() == 2
+    assert load_source_stamp(output) is None
+    down["value"] = False
+    assert parse() == 3
+    assert load_source_stamp(output) is not None
+
+
+def test_db_changed_behind_the_stamp_is_rebuilt(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(
+        parse_module,
+        "_validate_links",
+        lambda links, timeout, checker: {link: True for link in links},
+    )
+    output = tmp_path / "workouts.json"
+    content = _content([_row(i) for i in range(3)])
+    _parse(content, output, incremental=False)
+    stamp = load_source_stamp(output)
+    assert stamp is not None and stamp["raw"] and stamp["content"]
+
+    output.write_text("[]", encoding="utf-8")
+    assert load_source_stamp(output) is None
+    _parse(content, output, incremental=False)
+    assert len(json.loads(output.read_text(encoding="utf-8"))) == 3
+    assert load_source_stamp(output)["content"] == stamp["content"]
+
+
+def test_byte_identical_export_is_not_decoded(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(
+        parse_module,
+        "_validate_links",
+        lambda links, timeout, checker: {link: True for link in links},
+    )
+    output = tmp_path / "workouts.json"
+    content = _content([_row(i) for i in range(3)])
+    _parse(content, output, incremental=False)
+
+    def no_decode(fp, relevant):
+        raise AssertionError("export decoded")
+
+    monkeypatch.setattr(parse_module, "iter_tables", no_decode)
+    _parse(content, output, incremental=False)
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import itertools
+import json
+import random
+from pathlib import Path
+
+from fithitcli.index import SearchIndex
+from fithitcli.search import SearchArgs, matches
+
+FIXTURE_PATH = Path(__file__).parent / "fixtures" / "workouts.sample.json"
+
+
+def load_fixture() -> list[dict[str, object]]:
+    with FIXTURE_PATH.open("r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def make_args(**overrides):
+    base = dict(
+        category=None,
+        categories=None,
+        duration=None,
+        max_duration=None,
+        equipment_free=False,
+        trainer=None,
+        body_focus=None,
+        flow_style=None,
+        search=None,
+    )
+    base.update(overrides)
+    return SearchArgs(**base)
+
+
+def random_catalog(rng: random.Random, size: int) -> list[dict[str, object]]:
+    categories = ["Yoga", "Strength", "Core", "HIIT", "Pilates"]
+    durations = ["5 min", "10 min", "20 min", "30 min", "45 min", "", None]
+    trainers = ["Dustin", "Kim", "Sam", ["Kim", "Sam"], None]
+    focus = ["Upper Body", "Lower Body", ["Upper Body", "Core"], None]
+    equipment = ["Mat", ["Yoga Mat"], ["Dumbbells", "Mat"], "No Equipment", None, []]
+    workouts = []
+    for i in range(size):
+        workout: dict[str, object] = {"category": rng.choice(categories)}
+        for field, pool in (
+            ("duration", durations),
+            ("trainer", trainers),
+            ("body_focus", focus),
+            ("equipment", equipment),
+            ("flow_style", ["Slow", "Energetic", None]),
+            ("dumbbells", ["Light", "Bodyweight", None, None]),
+        ):
+            value = rng.choice(pool)
+            if value is not None:
+                workout[field] = value
+        workout["name"] = f"Workout {i} {rng.choice(['Flow', 'Burn', 'Hip Opener'])}"
+        workouts.append(workout)
+    return workouts
+
+
+def assert_equivalent(workouts, args):
+    expected = [w for w in workouts if matches(w, args)]
+    assert SearchIndex.build(workouts).select(workouts, args) == expected
+
+
+def test_index_matches_scan_on_fixture():
+    workouts = load_fixture()
+    for args in (
+        make_args(),
+        make_args(category="yoga"),
+        make_args(categories="Yoga, Core"),
+        make_args(duration="20 MIN"),
+        make_args(max_duration=20),
+        make_args(equipment_free=True),
+        make_args(trainer="dustin", max_duration=10),
+        make_args(body_focus="Upper Body"),
+        make_args(flow_style="Slow", search="hip"),
+        make_args(category="Strength", equipment_free=True),
+    ):
+        assert_equivalent(workouts, args)
+
+
+def test_index_matches_scan_on_random_catalogs():
+    rng = random.Random(1234)
+    options = {
+        "category": [None, "Yoga", "core", "Missing"],
+        "categories": [None, "Yoga,HIIT", "strength, , Pilates"],
+        "duration": [None, "20 min", "5 MIN"],
+        "max_duration": [None, 0, 10, 30],
+        "equipment_free": [False, True],
+        "trainer": [None, "kim", "Dustin"],
+        "body_focus": [None, "upper body"],
+        "flow_style": [None, "Slow"],
+        "search": [None, "hip", "burn"],
+    }
+    for _ in range(5):
+        workouts = random_catalog(rng, 200)
+        index = SearchIndex.build(workouts)
+        for values in itertools.islice(
+            itertools.product(*options.values()), 0, None, 7
+        ):
+            args = make_args(**dict(zip(options, values)))
+            expected = [w for w in workouts if matches(w, args)]
+            assert index.select(workouts, args) == expected
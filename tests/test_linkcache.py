@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import io
+import json
+import time
+import urllib.error
+from email.message import Message
+from pathlib import Path
+
+import fithitcli.parse as parse_module
+from fithitcli.linkcache import LinkCache, LinkResult, link_cache_path_for
+
+
+def _content(links: list[str]) -> dict:
+    return {
+        "tables": [
+            {
+                "name": "Yoga",
+                "columns": [
+                    {"key": "c_date", "name": "Date"},
+                    {"key": "c_link", "name": "Link"},
+                ],
+                "rows": [
+                    {"c_date": f"2025-01-{i + 1:02d}", "c_link": link}
+                    for i, link in enumerate(links)
+                ],
+            }
+        ]
+    }
+
+
+def _parse(links: list[str], output: Path, ttl: float = 1.0) -> None:
+    parse_module.parse_stream(
+        io.BytesIO(json.dumps(_content(links)).encode()),
+        source="test",
+        output=str(output),
+        link_cache_ttl=ttl,
+        force=True,
+    )
+
+
+def _fake_network(monkeypatch) -> tuple[list[str], list[str]]:
+    probed: list[str] = []
+    revalidated: list[str] = []
+
+    def probe(link, timeout):
+        probed.append(link)
+        if "broken" in link:
+            return LinkResult(ok=False, status=404)
+        return LinkResult(True, 200, etag=f'"{link[-1]}"')
+
+    def revalidate(link, timeout, entry):
+        revalidated.append(link)
+        return LinkResult(True, 304, entry.get("etag"), entry.get("last_modified"))
+
+    monkeypatch.setattr(parse_module, "_make_checker", parse_module._threaded_checker)
+    monkeypatch.setattr(parse_module, "_probe_link", probe)
+    monkeypatch.setattr(parse_module, "_revalidate_link", revalidate)
+    return probed, revalidated
+
+
+def test_fresh_links_skip_the_network(tmp_path: Path, monkeypatch):
+    probed, revalidated = _fake_network(monkeypatch)
+    output = tmp_path / "workouts.json"
+    links = ["https://ok.test/1", "https://ok.test/2", "https://broken.test/3"]
+
+    _parse(links, output)
+    assert sorted(probed) == sorted(links)
+    assert link_cache_path_for(output).exists()
+
+    probed.clear()
+    _parse(links, output)
+    # Broken links are never served from the cache.
+    assert probed == ["https://broken.test/3"]
+    assert revalidated == []
+    assert len(json.loads(output.read_text(encoding="utf-8"))) == 2
+
+
+def test_stale_links_are_revalidated(tmp_path: Path, monkeypatch):
+    probed, revalidated = _fake_network(monkeypatch)
+    output = tmp_path / "workouts.json"
+    _parse(["https://ok.test/1"], output)
+
+    cache_path = link_cache_path_for(output)
+    data = json.loads(cache_path.read_text(encoding="utf-8"))
+    data["links"]["https://ok.test/1"]["checked_at"] = time.time() - 7200
+    cache_path.write_text(json.dumps(data), encoding="utf-8")
+
+    probed.clear()
+    _parse(["https://ok.test/1"], output)
+    assert probed == []
+    assert revalidated == ["https://ok.test/1"]
+
+    entry = LinkCache.load(cache_path, 3600).entries["https://ok.test/1"]
+    assert entry["status"] == 304
+    assert entry["etag"] == '"1"'
+    assert time.time() - entry["checked_at"] < 60
+
+
+def test_revalidate_sends_conditional_head(monkeypatch):
+    seen = {}
+
+    def fake_urlopen(req, timeout):
+        seen["method"] = req.get_method()
+        seen["headers"] = dict(req.header_items())
+        raise urllib.error.HTTPError(req.full_url, 304, "Not Modified", Message(), None)
+
+    monkeypatch.setattr(parse_module.urllib.request, "urlopen", fake_urlopen)
+    result = parse_module._revalidate_link(
+        "https://example.com",
+        timeout=1,
+        entry={"ok": True, "etag": '"abc"', "last_modified": "Mon, 01 Jan 2024"},
+    )
+
+    assert seen["method"] == "HEAD"
+    assert seen["headers"]["If-none-match"] == '"abc"'
+    assert seen["headers"]["If-modified-since"] == "Mon, 01 Jan 2024"
+    assert result == LinkResult(True, 304, '"abc"', "Mon, 01 Jan 2024")
@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import http.server
+import threading
+import time
+from collections.abc import Iterator
+
+import pytest
+
+import fithitcli.linkcheck as linkcheck_module
+from fithitcli.linkcache import LinkCache
+from fithitcli.linkcheck import AsyncLinkChecker
+from fithitcli.parse import _make_checker
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):  # noqa: A002
+        pass
+
+    def _reply(self, status: int, headers: dict[str, str] | None = None, body=b""):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _handle(self) -> None:
+        server = self.server
+        with server.lock:
+            server.requests.append((self.command, self.path, dict(self.headers)))
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+        try:
+            time.sleep(0.01)
+            path = self.path
+            if path.startswith("/ok"):
+                self._reply(200, {"ETag": '"v1"'}, b"x" * 100)
+            elif path == "/cond":
+                if self.headers.get("If-None-Match") == '"v1"':
+                    self._reply(304, {"ETag": '"v1"'})
+                else:
+                    self._reply(200, {"ETag": '"v1"'})
+            elif path == "/nohead":
+                if self.command == "HEAD":
+                    self._reply(405)
+                else:
+                    self._reply(206, body=b"x")
+            elif path == "/short":
+                if self.command == "HEAD":
+                    self._reply(405)
+                else:
+                    # Promise 100 bytes, send 10, hang up.
+                    self.send_response(200)
+                    self.send_header("Content-Length", "100")
+                    self.end_headers()
+                    self.wfile.write(b"x" * 10)
+                    self.close_connection = True
+            elif path == "/redirect":
+                self._reply(302, {"Location": "/ok/target"})
+            elif path.startswith("/busy"):
+                with server.lock:
+                    server.busy += 1
+                    busy = server.busy <= 2
+                self._reply(503 if busy else 200)
+            elif path == "/limited":
+                with server.lock:
+                    server.limited += 1
+                    first = server.limited == 1
+                if first:
+                    self._reply(429, {"Retry-After": "1"})
+                else:
+                    self._reply(200)
+            else:
+                self._reply(404, body=b"missing")
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    do_HEAD = _handle
+    do_GET = _handle
+
+
+@pytest.fixture()
+def server() -> Iterator[http.server.ThreadingHTTPServer]:
+    srv = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    srv.daemon_threads = True
+    srv.lock = threading.Lock()
+    srv.requests = []
+    srv.active = 0
+    srv.max_active = 0
+    srv.limited = 0
+    srv.busy = 0
+    srv.connections = 0
+    original = srv.process_request
+
+    def counting(request, client_address):
+        srv.connections += 1
+        original(request, client_address)
+
+    srv.process_request = counting
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+def _url(srv, path: str) -> str:
+    host, port = srv.server_address[:2]
+    return f"http://{host}:{port}{path}"
+
+
+def test_reuses_connections_and_caps_per_host(server):
+    links = [_url(server, f"/ok/{i}") for i in range(30)]
+    checker = AsyncLinkChecker(per_host=3, rate=None, retries=0)
+
+    results = checker.check_all(links, timeout=5)
+
+    assert all(results[link] for link in links)
+    assert {method for method, _, _ in server.requests} == {"HEAD"}
+    assert server.max_active <= 3
+    assert checker.connections_opened <= 3
+    assert server.connections <= 3
+
+
+def test_head_fallback_redirect_and_missing(server):
+    checker = AsyncLinkChecker(rate=None, retries=0)
+    results = checker.check_all(
+        [_url(server, "/nohead"), _url(server, "/redirect"), _url(server, "/gone")],
+        timeout=5,
+    )
+
+    assert results == {
+        _url(server, "/nohead"): True,
+        _url(server, "/redirect"): True,
+        _url(server, "/gone"): False,
+    }
+    ranged = [h for m, p, h in server.requests if m == "GET" and p == "/nohead"]
+    assert ranged and ranged[0]["Range"] == "bytes=0-0"
+
+
+def test_truncated_body_counts_as_broken_link(server):
+    checker = AsyncLinkChecker(rate=None, retries=1)
+    link = _url(server, "/short")
+    assert checker.check_all([link], timeout=5) == {link: False}
+    # The short read is a transient failure and gets retried like a reset.
+    assert [m for m, p, h in server.requests].count("HEAD") == 2
+
+
+def test_retry_after_pauses_host(server):
+    checker = AsyncLinkChecker(rate=None, retries=2)
+    started = time.monotonic()
+    assert checker(_url(server, "/limited"), 5) is True
+    assert time.monotonic() - started >= 0.9
+    assert server.limited == 2
+
+
+def test_conditional_head_with_cache(server, tmp_path):
+    link = _url(server, "/cond")
+    cache = LinkCache(tmp_path / "links", ttl_seconds=0)
+    checker = AsyncLinkChecker(rate=None, retries=0, cache=cache)
+
+    assert checker.check_all([link], timeout=5) == {link: True}
+    assert cache.entries[link]["etag"] == '"v1"'
+
+    assert checker.check_all([link], timeout=5) == {link: True}
+    assert server.requests[-1][2]["If-None-Match"] == '"v1"'
+    assert cache.entries[link]["status"] == 304
+
+
+def test_non_http_links_pass_without_request(server):
+    checker = AsyncLinkChecker()
+    assert checker.check_all(["mailto:coach@example.com"], timeout=1) == {
+        "mailto:coach@example.com": True
+    }
+    assert server.requests == []
+
+
+def test_default_checker_is_not_rate_limited(server):
+    links = [_url(server, f"/ok/{i}") for i in range(200)]
+    started = time.monotonic()
+    results = _make_checker().check_all(links, timeout=5)
+    # 20 starts/s per host would need 10 s for these.
+    assert time.monotonic() - started < 5
+    assert all(results.values())
+
+
+def test_throttle_replies_space_out_the_host(server):
+    checker = AsyncLinkChecker(retries=2)
+    started = time.monotonic()
+    assert checker(_url(server, "/busy"), 5) is True
+    assert server.busy == 3
+    # Two 503s: 0.05 s and then 0.1 s between starts, plus the retry sleeps.
+    assert time.monotonic() - started >= 0.15
+
+
+def test_host_backoff_doubles_and_recovers():
+    host = linkcheck_module._Host(semaphore=None, interval=0.0)  # type: ignore[arg-type]
+    host.slow_down()
+    host.slow_down()
+    assert host.backoff == 2 * linkcheck_module.LINK_CHECK_BACKOFF_SECONDS
+    for _ in range(10):
+        host.slow_down()
+    assert host.backoff == linkcheck_module.LINK_CHECK_MAX_BACKOFF_SECONDS
+    while host.backoff:
+        host.recover()
+    assert host.backoff == 0.0
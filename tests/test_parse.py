@@ -1,11 +1,16 @@
 from __future__ import annotations
 
 import json
+import random
 import zipfile
 from pathlib import Path
+from typing import Any
 
 import fithitcli.parse as parse_module
-from fithitcli.parse import parse_cmd
+from fithitcli.db import load_catalog
+from fithitcli.parse import ROW_FIELDS, RowDecoder, build_option_map, parse_cmd
+from fithitcli.parse import extract_text as _text
+from fithitcli.parse import resolve_value as _resolve
 
 
 def _fake_dtable(path: Path) -> Path:
@@ -61,8 +66,8 @@ def _fake_dtable(path: Path) -> Path:
 def test_parse_cmd_outputs_json(tmp_path: Path, monkeypatch):
     monkeypatch.setattr(
         parse_module,
-        "_filter_unreachable_link_rows",
-        lambda content: (0, 0),
+        "_validate_links",
+        lambda links, timeout, checker: {link: True for link in links},
     )
     dtable_path = _fake_dtable(tmp_path)
     output_path = tmp_path / "workouts.json"
@@ -75,6 +80,11 @@ def test_parse_cmd_outputs_json(tmp_path: Path, monkeypatch):
     assert len(workouts) == 2
     assert workouts[0]["date"] == "2025-01-02"
     assert workouts[0]["duration"] == "20 min"
+    # Normalized companions live in the sidecar, not in the public DB.
+    assert not [k for w in workouts for k in w if k.startswith("_")]
+    catalog = load_catalog(output_path)
+    assert catalog.workouts[0]["_duration_minutes"] == 20
+    assert catalog.workouts[0]["_category_key"] == "yoga"
 
     summary_path = output_path.parent / "summary.json"
     with summary_path.open("r", encoding="utf-8") as f:
@@ -82,3 +92,172 @@ def test_parse_cmd_outputs_json(tmp_path: Path, monkeypatch):
 
     assert summary["total_workouts"] == 2
     assert summary["categories"]["Yoga"] == 2
+
+
+def _reference_parse_row(
+    row: dict[str, Any],
+    col_map: dict[str, str],
+    opt_map: dict[str, str],
+    table_name: str,
+):
+    """The original if-chain `parse_row`, kept as the decoder's oracle."""
+    mapped: dict[str, Any] = {}
+    for key, val in row.items():
+        if key.startswith("_") or val is None or val == "" or val == []:
+            continue
+        col_name = col_map.get(key, key)
+        # Skip internal/test columns
+        if (
+            col_name.startswith("~")
+            or col_name.startswith("TEST")
+            or "(copy)" in col_name
+        ):
+            continue
+        mapped[col_name] = val
+
+    workout: dict[str, Any] = {"category": table_name}
+
+    # Date
+    if "Date" in mapped:
+        workout["date"] = mapped["Date"]
+
+    # Duration — resolve from option
+    if "Duration" in mapped:
+        dur = _resolve(mapped["Duration"], opt_map, "Duration")
+        workout["duration"] = str(dur) if dur else None
+
+    # Trainer
+    if "Trainer" in mapped:
+        workout["trainer"] = _resolve(mapped["Trainer"], opt_map, "Trainer")
+
+    # Episode
+    if "Ep" in mapped:
+        workout["episode"] = mapped["Ep"]
+
+    # Music genre
+    if "Music" in mapped:
+        workout["music"] = _resolve(mapped["Music"], opt_map, "Music")
+
+    # Link
+    if "Link" in mapped:
+        workout["link"] = mapped["Link"]
+
+    # Playlist
+    if "Playlist" in mapped:
+        workout["playlist"] = mapped["Playlist"]
+
+    # Description
+    for field in ["Description", "Preview"]:
+        if field in mapped:
+            text = _text(mapped[field])
+            if text:
+                workout["description"] = text
+                break
+
+    # Detailed moves
+    if "Detailed Moves" in mapped:
+        workout["detailed_moves"] = _text(mapped["Detailed Moves"])
+
+    # Notes
+    if "Notes" in mapped:
+        workout["notes"] = _text(mapped["Notes"])
+
+    # Format
+    if "Format" in mapped:
+        workout["format"] = _text(mapped["Format"])
+
+    # Category-specific fields
+    # Strength
+    if "Body Focus" in mapped:
+        workout["body_focus"] = _resolve(
+            mapped["Body Focus"], opt_map, "Body Focus"
+        )
+    if "Equipment" in mapped:
+        workout["equipment"] = _resolve(mapped["Equipment"], opt_map, "Equipment")
+    if "Dumbbells" in mapped:
+        workout["dumbbells"] = _resolve(mapped["Dumbbells"], opt_map, "Dumbbells")
+    if "Muscle Groups" in mapped:
+        workout["muscle_groups"] = _resolve(
+            mapped["Muscle Groups"], opt_map, "Muscle Groups"
+        )
+    if "Types of Moves" in mapped:
+        workout["move_types"] = _resolve(
+            mapped["Types of Moves"], opt_map, "Types of Moves"
+        )
+
+    # Yoga
+    if "Flow Style" in mapped:
+        workout["flow_style"] = _resolve(
+            mapped["Flow Style"], opt_map, "Flow Style"
+        )
+
+    # HIIT / Kickboxing
+    if "Workout Details" in mapped:
+        workout["workout_details"] = _text(mapped["Workout Details"])
+    if "Strikes" in mapped:
+        workout["strikes"] = _resolve(mapped["Strikes"], opt_map, "Strikes")
+
+    # Pilates
+    if "Resistance Band" in mapped:
+        workout["resistance_band"] = _resolve(
+            mapped["Resistance Band"], opt_map, "Resistance Band"
+        )
+
+    # Meditation
+    if "Theme" in mapped:
+        workout["theme"] = _resolve(mapped["Theme"], opt_map, "Theme")
+    if "Topic/Theme" in mapped:
+        workout["topic"] = _resolve(mapped["Topic/Theme"], opt_map, "Topic/Theme")
+
+    # Prenatal
+    if mapped.get("Prenatal"):
+        workout["prenatal"] = True
+
+    # Workout Type (sub-type within category)
+    if "Workout Type" in mapped:
+        workout["workout_type"] = _resolve(
+            mapped["Workout Type"], opt_map, "Workout Type"
+        )
+
+    # Name
+    if "Name" in mapped:
+        workout["name"] = _text(mapped["Name"])
+
+    return workout
+
+
+def _random_table(rng: random.Random) -> tuple[list[dict], list[dict]]:
+    names = [name for name, _, _ in ROW_FIELDS]
+    names += ["~Hidden", "TEST Date", "Link (copy)", "Other", "Date", "Name"]
+    options = [{"id": i, "name": f"opt{i}"} for i in range(4)]
+    options += [{"id": "x", "name": "ex"}, {"id": "7", "name": "seven"}]
+    columns = []
+    for i, name in enumerate(rng.sample(names, rng.randint(5, len(names)))):
+        column = {"key": rng.choice([f"c{i}", f"_c{i}", name]), "name": name}
+        if rng.random() < 0.5:
+            column["data"] = {"options": rng.sample(options, rng.randint(0, 6))}
+        columns.append(column)
+    values = [
+        None, "", [], 0, 1, 2.0, 7, "x", "7", "plain", " pad ", True, False,
+        [1], [1, "x", 9], ["7"], {"text": " rich "}, {"preview": "pv"},
+        {"text": ""}, {"text": None, "preview": "p"}, {},
+    ]  # fmt: skip
+    keys = [column["key"] for column in columns] + ["Date", "Prenatal", "_id"]
+    rows = []
+    for _ in range(200):
+        row = {key: rng.choice(values) for key in rng.sample(keys, len(keys) // 2)}
+        rows.append(row)
+    return columns, rows
+
+
+def test_row_decoder_matches_reference_parse_row():
+    rng = random.Random(24)
+    for _ in range(300):
+        columns, rows = _random_table(rng)
+        col_map, opt_map = build_option_map(columns)
+        decoder = RowDecoder(col_map, opt_map, "Yoga")
+        for row in rows:
+            expected = _reference_parse_row(row, col_map, opt_map, "Yoga")
+            assert list(decoder(row).items()) == list(expected.items()), (columns, row)
+            assert parse_module.parse_row(row, col_map, opt_map, "Yoga") == expected
+
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import contextlib
+import io
+import json
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+import fithitcli.parse as parse_module
+from fithitcli.linkcache import LinkResult
+from fithitcli.linkcheck import AsyncLinkChecker
+from fithitcli.pipeline import LinkCheckStage, LinkFeed
+
+
+def _content(links: list[str]) -> dict:
+    return {
+        "tables": [
+            {
+                "name": "Yoga",
+                "columns": [
+                    {"key": "c_date", "name": "Date"},
+                    {"key": "c_link", "name": "Link"},
+                ],
+                "rows": [
+                    {"_id": f"r{i}", "c_date": f"2025-01-{i + 1:02d}", "c_link": link}
+                    for i, link in enumerate(links)
+                ],
+            }
+        ]
+    }
+
+
+def test_feed_batches_and_replays():
+    feed = LinkFeed(maxsize=8)
+    for link in ["a", "b", "c"]:
+        feed.put(link)
+    feed.close()
+    assert list(feed) == ["a", "b", "c"]
+    assert set(feed) == {"a", "b", "c"}
+    assert feed.take() == []
+
+
+def test_full_feed_blocks_until_the_consumer_takes():
+    feed = LinkFeed(maxsize=1)
+    feed.put("a")
+    done = threading.Event()
+
+    def produce() -> None:
+        feed.put("b")
+        done.set()
+
+    producer = threading.Thread(target=produce)
+    producer.start()
+    assert not done.wait(0.2)
+    assert feed.take() == ["a"]
+    assert done.wait(2)
+    producer.join()
+
+
+def test_failed_checker_does_not_block_the_parser():
+    def check(links):
+        raise RuntimeError("checker down")
+
+    with pytest.raises(RuntimeError, match="checker down"):
+        with LinkCheckStage(check, maxsize=1) as stage:
+            for i in range(50):
+                stage.put(f"https://x.test/{i}")
+            stage.result()
+
+
+def test_threaded_checks_start_before_the_feed_closes():
+    started: dict[str, threading.Event] = {"a": threading.Event()}
+
+    def checker(link: str, timeout: int) -> bool:
+        started.setdefault(link, threading.Event()).set()
+        return link == "a"
+
+    stage = LinkCheckStage(
+        lambda links: parse_module._validate_links(links, timeout=1, checker=checker)
+    )
+    with stage:
+        stage.put("a")
+        assert started["a"].wait(2)
+        stage.put("b")
+        assert stage.result() == {"a": True, "b": False}
+
+
+def test_async_checks_start_before_the_feed_closes():
+    started = threading.Event()
+
+    class Recording(AsyncLinkChecker):
+        async def _probe(self, link: str, timeout: float) -> LinkResult:
+            started.set()
+            return LinkResult(ok="ok" in link)
+
+    checker = Recording()
+    with LinkCheckStage(lambda links: checker.check_all(links, 1)) as stage:
+        stage.put("https://ok.test/1")
+        assert started.wait(2)
+        stage.put("https://bad.test/2")
+        result = stage.result()
+    assert result == {"https://ok.test/1": True, "https://bad.test/2": False}
+
+
+@pytest.mark.parametrize("streamed", [False, True])
+def test_links_are_checked_while_rows_are_parsed(tmp_path: Path, monkeypatch, streamed):
+    events: list[str] = []
+    original = parse_module.parse_row
+
+    def slow_parse_row(row, *args):
+        time.sleep(0.005)
+        events.append("parse")
+        return original(row, *args)
+
+    def validate(links, timeout, checker):
+        verdicts = {}
+        for link in links:
+            events.append("check")
+            verdicts[link] = "broken" not in link
+        return verdicts
+
+    monkeypatch.setattr(parse_module, "parse_row", slow_parse_row)
+    monkeypatch.setattr(parse_module, "_validate_links", validate)
+    links = [f"https://{'broken' if i % 3 == 0 else 'ok'}.test/{i}" for i in range(30)]
+    output = tmp_path / "workouts.json"
+    with contextlib.redirect_stdout(io.StringIO()):
+        if streamed:
+            parse_module.parse_stream(
+                io.BytesIO(json.dumps(_content(links)).encode()),
+                source="test",
+                output=str(output),
+            )
+        else:
+            parse_module.parse_content(
+                content=_content(links), source="test", output=str(output)
+            )
+
+    assert events.index("check") < len(events) - 1 - events[::-1].index("parse")
+    workouts = json.loads(output.read_text(encoding="utf-8"))
+    expected = [link for link in links if "broken" not in link]
+    assert [w["link"] for w in workouts] == expected[::-1]
@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import json
+import random
+import threading
+import time
+from pathlib import Path
+
+from typer.testing import CliRunner
+
+import fithitcli.db as db_module
+import fithitcli.querycache as querycache_module
+from fithitcli.cli import app
+from fithitcli.parse import _write_db
+from fithitcli.querycache import (
+    QueryCache,
+    canonical_query,
+    query_cache_dir_for,
+    read_query_cache_stats,
+)
+from fithitcli.search import SearchArgs, find_workouts, public_fields, run_search
+
+FIXTURE_PATH = Path(__file__).parent / "fixtures" / "workouts.sample.json"
+
+runner = CliRunner()
+
+
+def make_args(**overrides):
+    base = dict(
+        category=None,
+        categories=None,
+        duration=None,
+        max_duration=None,
+        equipment_free=False,
+        trainer=None,
+        body_focus=None,
+        flow_style=None,
+        search=None,
+    )
+    base.update(overrides)
+    return SearchArgs(**base)
+
+
+def _db(tmp_path: Path) -> Path:
+    db_path = tmp_path / "workouts.json"
+    db_path.write_bytes(FIXTURE_PATH.read_bytes())
+    return db_path
+
+
+def test_canonical_query_folds_equivalent_filters():
+    assert canonical_query(make_args(categories="Yoga, Core")) == canonical_query(
+        make_args(categories="core,yoga,Yoga")
+    )
+    assert canonical_query(make_args(trainer="KIM", max_duration=0)) == (
+        canonical_query(make_args(trainer="kim"))
+    )
+    assert canonical_query(make_args(), rank=True) == canonical_query(make_args())
+    # matches() does not strip --category, so neither may the key.
+    assert canonical_query(make_args(category=" yoga")) != canonical_query(
+        make_args(category="yoga")
+    )
+    assert canonical_query(make_args(search="a OR b")) != canonical_query(
+        make_args(search="a or b")
+    )
+
+
+def test_cache_version_is_part_of_the_key(tmp_path: Path, monkeypatch):
+    directory = tmp_path / "cache"
+    args = make_args(search="flow")
+    QueryCache(directory).put("db", args, False, [0, 2])
+    assert QueryCache(directory).get("db", args, False) == [0, 2]
+
+    key = canonical_query(args)
+    monkeypatch.setattr(querycache_module, "QUERY_CACHE_VERSION", 3)
+    assert canonical_query(args) != key
+    assert QueryCache(directory).get("db", args, False) is None
+
+
+def test_memory_then_disk_hits(tmp_path: Path):
+    catalog = db_module.load_catalog(_db(tmp_path))
+    directory = tmp_path / "cache"
+    args = make_args(equipment_free=True)
+    expected = [public_fields(w) for w in find_workouts(catalog, args)]
+
+    cache = QueryCache(directory)
+    assert run_search(catalog, args, limit=99, cache=cache) == expected
+    assert run_search(catalog, args, limit=99, cache=cache) == expected
+    assert cache.stats == {"memory_hits": 1, "disk_hits": 0, "misses": 1}
+
+    fresh = QueryCache(directory)
+    calls = []
+    positions, hit = fresh.positions(
+        catalog.fingerprint, args, False, lambda: calls.append(1) or []
+    )
+    assert hit and not calls
+    assert [public_fields(catalog.workouts[p]) for p in positions] == expected
+    assert fresh.stats["disk_hits"] == 1
+
+
+def test_random_shuffles_cached_list_without_mutating_it(tmp_path: Path):
+    catalog = db_module.load_catalog(_db(tmp_path))
+    cache = QueryCache(None)
+    args = make_args()
+    ordered = run_search(catalog, args, limit=99, cache=cache)
+    random.seed(3)
+    picks = {
+        json.dumps(run_search(catalog, args, limit=1, randomize=True, cache=cache))
+        for _ in range(30)
+    }
+    assert len(picks) > 1
+    assert run_search(catalog, args, limit=99, cache=cache) == ordered
+
+
+def test_fingerprint_change_and_parse_invalidate(tmp_path: Path):
+    db_path = _db(tmp_path)
+    directory = query_cache_dir_for(db_path)
+    args = make_args(category="Yoga")
+    catalog = db_module.load_catalog(db_path)
+    run_search(catalog, args, limit=5, cache=QueryCache(directory))
+    assert list(directory.glob("*.bin"))
+
+    workouts = json.loads(db_path.read_text(encoding="utf-8"))
+    workouts[0]["category"] = "Yoga"
+    _write_db(workouts, {}, source="test", out_path=db_path)
+    assert not list(directory.glob("*.bin"))
+
+    reloaded = db_module.load_catalog(db_path)
+    assert reloaded.fingerprint != catalog.fingerprint
+    cache = QueryCache(directory)
+    results = run_search(reloaded, args, limit=99, cache=cache)
+    assert cache.stats["misses"] == 1
+    assert results == [public_fields(w) for w in find_workouts(reloaded, args)]
+
+
+def test_tiers_are_bounded(tmp_path: Path):
+    directory = tmp_path / "cache"
+    cache = QueryCache(directory, memory_entries=2, disk_entries=3)
+    for minutes in range(1, 8):
+        cache.positions("fp", make_args(max_duration=minutes), False, lambda: [1, 2])
+    assert len(cache._memory) == 2
+    assert len(list(directory.glob("*.bin"))) == 3
+
+    small = QueryCache(tmp_path / "small", disk_bytes=1)
+    small.positions("fp", make_args(), False, lambda: list(range(100)))
+    assert not list((tmp_path / "small").glob("*.bin"))
+
+
+def test_info_json_reports_counters(monkeypatch, tmp_path: Path):
+    db_path = _db(tmp_path)
+    monkeypatch.setenv("FITHIT_DB_PATH", str(db_path))
+    for _ in range(3):
+        result = runner.invoke(app, ["search", "--format", "json", "--trainer", "x"])
+        assert result.exit_code == 0
+    runner.invoke(app, ["search", "--format", "json", "--no-cache"])
+    assert read_query_cache_stats(query_cache_dir_for(db_path))["misses"] == 1
+
+    data = json.loads(runner.invoke(app, ["info", "--format", "json"]).stdout)
+    cache = data["query_cache"]
+    assert (cache["misses"], cache["disk_hits"], cache["hits"]) == (1, 2, 2)
+    assert cache["hit_rate"] == round(2 / 3, 4)
+
+
+def test_concurrent_flushes_keep_every_count(tmp_path: Path, monkeypatch):
+    directory = tmp_path / "workouts.json.qcache"
+    original = querycache_module.read_query_cache_stats
+
+    def slow_read(path: Path) -> dict[str, int]:
+        stats = original(path)
+        time.sleep(0.002)  # widen the read-modify-write window
+        return stats
+
+    monkeypatch.setattr(querycache_module, "read_query_cache_stats", slow_read)
+
+    def agent() -> None:
+        cache = QueryCache(directory)
+        for _ in range(10):
+            cache.stats["misses"] += 1
+            cache.flush_stats()
+
+    threads = [threading.Thread(target=agent) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert read_query_cache_stats(directory)["misses"] == 60
+    assert not [p for p in directory.iterdir() if p.name.endswith(".tmp")]
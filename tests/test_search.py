@@ -1,9 +1,15 @@
 from __future__ import annotations
 
 import json
+import random
+from collections import Counter
 from pathlib import Path
 
-from fithitcli.search import SearchArgs, matches
+import fithitcli.search as search_module
+from fithitcli.db import Catalog
+from fithitcli.filters import normalized
+from fithitcli.querycache import QueryCache
+from fithitcli.search import SearchArgs, matches, run_search, sample_positions
 
 FIXTURE_PATH = Path(__file__).parent / "fixtures" / "workouts.sample.json"
 
@@ -83,3 +89,77 @@ def test_text_search():
     workouts = load_fixture()
     results = apply(workouts, search="hip opener")
     assert {w["category"] for w in results} == {"Yoga"}
+
+
+def test_matches_uses_precomputed_fields():
+    workouts = load_fixture()
+    enriched = [{**w, **normalized(w)} for w in workouts]
+    for kwargs in (
+        dict(category="yoga"),
+        dict(categories="Yoga, Core"),
+        dict(duration="20 MIN", equipment_free=True),
+        dict(max_duration=20, trainer="dustin"),
+        dict(body_focus="upper body", flow_style="slow"),
+    ):
+        assert apply(enriched, **kwargs) == [
+            {**w, **normalized(w)} for w in apply(workouts, **kwargs)
+        ]
+
+    # The companion fields win over the public ones when present.
+    assert apply([{"category": "Yoga", "_category_key": "core"}], category="core")
+
+
+def test_run_search_strips_private_fields(tmp_path: Path):
+    workouts = [{**w, **normalized(w)} for w in load_fixture()]
+    results = run_search(Catalog(tmp_path, workouts), make_args(), limit=10)
+    assert results == load_fixture()
+
+
+def test_sample_positions_is_uniform_and_seeded():
+    counts: Counter[int] = Counter()
+    for seed in range(6000):
+        sample = sample_positions(range(20), 3, random.Random(seed))
+        assert len(set(sample)) == 3
+        counts.update(sample)
+    assert set(counts) == set(range(20))
+    assert all(abs(n - 900) < 135 for n in counts.values())
+
+    stream = sample_positions(iter(range(500)), 4, random.Random(7))
+    assert sample_positions(list(range(500)), 4, random.Random(7)) == stream
+    assert sorted(sample_positions([3, 1], 5, random.Random(1))) == [1, 3]
+    assert sample_positions([1, 2], 0, random.Random(1)) == []
+
+
+def test_search_stops_after_limit(tmp_path: Path, monkeypatch):
+    workouts = [{"category": "Yoga", "name": f"Flow {i}"} for i in range(1000)]
+    catalog = Catalog(tmp_path, workouts)
+    monkeypatch.setattr(catalog.text, "search", lambda query: None)
+    checked = []
+
+    def counting_matches_text(workout, query):
+        checked.append(workout)
+        return True
+
+    monkeypatch.setattr(search_module, "matches_text", counting_matches_text)
+    results = run_search(catalog, make_args(search="flow"), limit=3)
+    assert [w["name"] for w in results] == ["Flow 0", "Flow 1", "Flow 2"]
+    assert len(checked) == 3
+
+
+def test_seeded_random_is_reproducible(tmp_path: Path):
+    workouts = [{"category": "Yoga", "name": f"Flow {i}"} for i in range(200)]
+    catalog = Catalog(tmp_path, workouts, fingerprint="fp")
+    args = make_args(category="yoga")
+    cache = QueryCache(None)
+
+    def pick(seed, cache=None):
+        return run_search(
+            catalog, args, limit=3, randomize=True, seed=seed, cache=cache
+        )
+
+    first = pick(5)
+    assert pick(5) == first
+    assert pick(5, cache) == first  # miss: computes and stores
+    assert pick(5, cache) == first  # hit: samples the cached list
+    assert cache.stats["memory_hits"] == 1
+    assert pick(6) != first
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import json
+import os
+import socket
+import threading
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+import pytest
+import typer
+from typer.testing import CliRunner
+
+from fithitcli.cli import app
+from fithitcli.serve import CatalogHolder, make_server
+
+FIXTURE_PATH = Path(__file__).parent / "fixtures" / "workouts.sample.json"
+
+runner = CliRunner()
+
+
+@pytest.fixture
+def db_path(tmp_path: Path) -> Path:
+    path = tmp_path / "workouts.json"
+    path.write_bytes(FIXTURE_PATH.read_bytes())
+    return path
+
+
+@pytest.fixture
+def base_url(db_path: Path):
+    server = make_server(CatalogHolder(db_path), port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def _get(url: str):
+    with urllib.request.urlopen(url, timeout=5) as resp:
+        return json.loads(resp.read())
+
+
+def _cli_json(monkeypatch, db_path: Path, *args: str):
+    monkeypatch.setenv("FITHIT_DB_PATH", str(db_path))
+    result = runner.invoke(app, [*args, "--format", "json"])
+    assert result.exit_code == 0
+    return json.loads(result.stdout)
+
+
+def test_serve_payloads_match_cli(base_url, db_path, monkeypatch):
+    assert _get(f"{base_url}/search?category=Yoga") == _cli_json(
+        monkeypatch, db_path, "search", "--category", "Yoga"
+    )
+    assert _get(f"{base_url}/search?max_duration=20&equipment_free=1&limit=10") == (
+        _cli_json(
+            monkeypatch,
+            db_path,
+            "search",
+            "--max-duration",
+            "20",
+            "--equipment-free",
+            "--limit",
+            "10",
+        )
+    )
+    assert _get(f"{base_url}/info") == _cli_json(monkeypatch, db_path, "info")
+    assert _get(f"{base_url}/validate") == _cli_json(monkeypatch, db_path, "validate")
+
+
+def test_serve_hot_reloads_changed_db(base_url, db_path):
+    assert _get(f"{base_url}/info")["total_workouts"] == 6
+
+    workouts = json.loads(db_path.read_text(encoding="utf-8"))[:2]
+    db_path.write_text(json.dumps(workouts), encoding="utf-8")
+    stat = db_path.stat()
+    os.utime(db_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    assert _get(f"{base_url}/info")["total_workouts"] == 2
+
+
+def test_serve_rejects_bad_requests(base_url):
+    with pytest.raises(urllib.error.HTTPError) as exc:
+        _get(f"{base_url}/search?limit=many")
+    assert exc.value.code == 400
+
+    with pytest.raises(urllib.error.HTTPError) as exc:
+        _get(f"{base_url}/nope")
+    assert exc.value.code == 404
+
+
+def test_serve_only_binds_loopback(db_path):
+    with pytest.raises(typer.BadParameter, match="Loopback"):
+        make_server(CatalogHolder(db_path), host="0.0.0.0", port=0)
+    with pytest.raises(typer.BadParameter, match="Loopback"):
+        make_server(CatalogHolder(db_path), host="example.com", port=0)
+    make_server(CatalogHolder(db_path), host="localhost", port=0).server_close()
+
+
+def test_serve_socket_keeps_regular_files(db_path, tmp_path: Path):
+    path = tmp_path / "notes.txt"
+    path.write_text("keep me", encoding="utf-8")
+    with pytest.raises(typer.BadParameter, match="kein Unix-Socket"):
+        make_server(CatalogHolder(db_path), socket_path=str(path))
+    assert path.read_text(encoding="utf-8") == "keep me"
+
+    stale = tmp_path / "fithit.sock"
+    with socket.socket(socket.AF_UNIX) as sock:
+        sock.bind(str(stale))
+    server = make_server(CatalogHolder(db_path), socket_path=str(stale))
+    server.server_close()
@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import contextlib
+import io
+import itertools
+import json
+import random
+from pathlib import Path
+
+import pytest
+import typer
+from typer.testing import CliRunner
+
+import fithitcli.db as db_module
+from fithitcli.cli import app
+from fithitcli.export import write_json_export
+from fithitcli.filters import matches_text
+from fithitcli.parse import _write_db
+from fithitcli.search import SearchArgs, find_positions, public_fields, run_search
+from fithitcli.sqlitedb import SqliteCatalog, compile_search
+
+FIXTURE_PATH = Path(__file__).parent / "fixtures" / "workouts.sample.json"
+
+runner = CliRunner()
+
+
+def make_args(**overrides):
+    base = dict(
+        category=None,
+        categories=None,
+        duration=None,
+        max_duration=None,
+        equipment_free=False,
+        trainer=None,
+        body_focus=None,
+        flow_style=None,
+        search=None,
+    )
+    base.update(overrides)
+    return SearchArgs(**base)
+
+
+def random_catalog(rng: random.Random, size: int) -> list[dict[str, object]]:
+    categories = ["Yoga", "strength", "Core", "HIIT", None, 7]
+    durations = ["5 min", "10 Min", "20 min", "1h 30", "45", "", None]
+    trainers = ["Dustin", "kim", " Sam ", ["Kim", "Sam"], ["", None], None]
+    focus = ["Upper Body", "Lower Body", ["Upper Body", "Core"], None]
+    equipment = ["Mat", ["Yoga Mat"], ["Dumbbells", "Mat"], "No Equipment", None, []]
+    words = ["Hip", "Opener", "burn", "İstanbul", "flow", "Flows", "Core", "o'clock"]
+    workouts = []
+    for _ in range(size):
+        workout: dict[str, object] = {}
+        for field, pool in (
+            ("category", categories),
+            ("duration", durations),
+            ("trainer", trainers),
+            ("body_focus", focus),
+            ("equipment", equipment),
+            ("flow_style", ["Slow", "Energetic", None]),
+        ):
+            value = rng.choice(pool)
+            if value is not None or rng.random() < 0.2:
+                workout[field] = value
+        if rng.random() < 0.8:
+            workout["name"] = " ".join(rng.choices(words, k=rng.randint(0, 3)))
+        if rng.random() < 0.5:
+            workout["description"] = " ".join(rng.choices(words, k=rng.randint(0, 6)))
+        workouts.append(workout)
+    return workouts
+
+
+OPTIONS = {
+    "category": [None, "Yoga", "STRENGTH", "7", "Missing"],
+    "categories": [None, "Yoga,HIIT", "core, , Pilates"],
+    "duration": [None, "20 MIN", "45"],
+    "max_duration": [None, 10, 45, 130],
+    "equipment_free": [False, True],
+    "trainer": [None, "kim", "Sam"],
+    "body_focus": [None, "upper body"],
+    "flow_style": [None, "Slow"],
+    "search": [None, "hip", "FLOW", "istanbul", "hip OR burn", "core opener", "'", "x"],
+}
+
+
+def _write(workouts, out_path: Path) -> None:
+    with contextlib.redirect_stdout(io.StringIO()):
+        _write_db([dict(w) for w in workouts], {}, source="test", out_path=out_path)
+
+
+def _pair(tmp_path: Path, workouts):
+    _write(workouts, tmp_path / "workouts.json")
+    _write(workouts, tmp_path / "workouts.sqlite")
+    return (
+        db_module.load_catalog(tmp_path / "workouts.json"),
+        db_module.load_catalog(tmp_path / "workouts.sqlite"),
+    )
+
+
+def test_sqlite_search_matches_json_backend(tmp_path: Path):
+    rng = random.Random(1818)
+    combos = list(itertools.product(*OPTIONS.values()))
+    for size in (0, 1, 40, 300):
+        target = tmp_path / str(size)
+        target.mkdir()
+        json_catalog, sqlite_catalog = _pair(target, random_catalog(rng, size))
+        assert isinstance(sqlite_catalog, SqliteCatalog)
+        assert list(sqlite_catalog.workouts) == [
+            public_fields(w) for w in json_catalog.workouts
+        ]
+        for values in rng.sample(combos, 300):
+            args = make_args(**dict(zip(OPTIONS, values)))
+            expected = find_positions(json_catalog, args)
+            assert find_positions(sqlite_catalog, args) == expected, args
+            ranked = find_positions(sqlite_catalog, args, rank=True)
+            assert sorted(ranked) == expected, args
+
+
+def test_search_is_a_substring_test_on_both_backends(tmp_path: Path):
+    workouts = [
+        {"name": "Ganzkörper-Workout", "category": "Strength"},
+        {"name": "Yoga Flow", "description": "Hips and shoulders"},
+        {"name": "Hip Opener", "description": "Yoga for the hips"},
+    ]
+    json_catalog, sqlite_catalog = _pair(tmp_path, workouts)
+    for needle, names in (
+        ("körper", ["Ganzkörper-Workout"]),
+        ("yog", ["Yoga Flow", "Hip Opener"]),
+        ("hip", ["Yoga Flow", "Hip Opener"]),
+        ("Flow OR Hip", []),
+    ):
+        args = make_args(search=needle)
+        expected = [
+            p
+            for p, w in enumerate(json_catalog.workouts)
+            if matches_text(w, needle)
+        ]
+        assert [json_catalog.workouts[p]["name"] for p in expected] == names
+        for catalog in (json_catalog, sqlite_catalog):
+            assert find_positions(catalog, args) == expected, (catalog, needle)
+            ranked = find_positions(catalog, args, rank=True)
+            assert sorted(ranked) == expected, (catalog, needle)
+
+    # `--rank` only reorders: "hip" is in the name of the second match.
+    args = make_args(search="hip")
+    for catalog in (json_catalog, sqlite_catalog):
+        ranked = find_positions(catalog, args, rank=True)
+        assert [catalog.workouts[p]["name"] for p in ranked] == [
+            "Hip Opener",
+            "Yoga Flow",
+        ]
+
+
+def test_sqlite_catalog_serves_search_info_and_validate(monkeypatch, tmp_path: Path):
+    workouts = json.loads(FIXTURE_PATH.read_text(encoding="utf-8"))
+    json_catalog, sqlite_catalog = _pair(tmp_path, workouts)
+    assert sqlite_catalog.fingerprint
+    args = make_args(search="flow")
+    assert run_search(sqlite_catalog, args, limit=99) == run_search(
+        json_catalog, args, limit=99
+    )
+    assert sqlite_catalog.workouts[-1] == public_fields(json_catalog.workouts[-1])
+    assert sqlite_catalog.workouts[1:3] == [
+        public_fields(w) for w in json_catalog.workouts[1:3]
+    ]
+
+    outputs = {}
+    for name in ("workouts.json", "workouts.sqlite"):
+        monkeypatch.setenv("FITHIT_DB_PATH", str(tmp_path / name))
+        for command in (["info"], ["validate"], ["search", "--equipment-free"]):
+            result = runner.invoke(app, [*command, "--format", "json"])
+            assert result.exit_code == 0, result.stdout
+            outputs.setdefault(command[0], []).append(result.stdout)
+    assert all(a == b for a, b in outputs.values())
+
+
+def test_export_round_trips_to_public_json(monkeypatch, tmp_path: Path):
+    workouts = json.loads(FIXTURE_PATH.read_text(encoding="utf-8"))
+    _, sqlite_catalog = _pair(tmp_path, workouts)
+    out = io.StringIO()
+    assert write_json_export(sqlite_catalog.workouts, out) == len(workouts)
+    public = [
+        public_fields(w)
+        for w in db_module.load_catalog(tmp_path / "workouts.json").workouts
+    ]
+    assert out.getvalue() == json.dumps(public, indent=2, ensure_ascii=False) + "\n"
+
+    monkeypatch.setenv("FITHIT_DB_PATH", str(tmp_path / "workouts.sqlite"))
+    target = tmp_path / "export.json"
+    result = runner.invoke(app, ["export", "--output", str(target)])
+    assert result.exit_code == 0
+    assert json.loads(target.read_text(encoding="utf-8")) == public
+
+
+def test_backend_option_selects_default_db(monkeypatch, tmp_path: Path):
+    monkeypatch.delenv("FITHIT_DB_PATH", raising=False)
+    monkeypatch.setenv("XDG_DATA_HOME", str(tmp_path))
+    (tmp_path / "fithit").mkdir()
+    _write(
+        json.loads(FIXTURE_PATH.read_text(encoding="utf-8")),
+        tmp_path / "fithit" / "workouts.sqlite",
+    )
+    result = runner.invoke(app, ["--backend", "sqlite", "info", "--format", "json"])
+    assert result.exit_code == 0
+    assert json.loads(result.stdout)["total_workouts"] == 6
+    assert db_module.default_db_path().suffix == ".json"
+
+    result = runner.invoke(app, ["--backend", "xml", "info"])
+    assert result.exit_code != 0
+
+
+def test_compile_search_keeps_values_out_of_sql():
+    sql, params = compile_search(
+        make_args(category="x' OR 1=1 --", trainer="kim", search="hip"), rank=True
+    )
+    assert "1=1" not in sql and "kim" not in sql and "hip" not in sql
+    assert "x' or 1=1 --" in params and '("hip")' in params
+
+
+def test_invalid_sqlite_file_is_reported(tmp_path: Path):
+    db_path = tmp_path / "workouts.sqlite"
+    db_path.write_text("not a database", encoding="utf-8")
+    with pytest.raises(typer.BadParameter, match="SQLite"):
+        db_module.load_catalog(db_path)
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+FIXTURE_PATH = Path(__file__).parent / "fixtures" / "workouts.sample.json"
+
+# Modules only needed by parse/fetch/serve or by rich output.
+HEAVY_MODULES = (
+    "rich",
+    "rich.console",
+    "rich.table",
+    "zipfile",
+    "urllib.request",
+    "concurrent.futures",
+    "http.server",
+)
+# Self time of fithitcli's own modules while importing the CLI (microseconds).
+IMPORT_BUDGET_US = 50_000
+
+_PROBE = """
+import json, sys
+from fithitcli.cli import app
+app(sys.argv[1:], standalone_mode=False)
+sys.stdout.flush()
+sys.stderr.write(json.dumps(sorted(sys.modules)))
+"""
+
+
+def _sample_db(tmp_path: Path) -> Path:
+    db_path = tmp_path / "workouts.json"
+    db_path.write_bytes(FIXTURE_PATH.read_bytes())
+    return db_path
+
+
+def _run(
+    *args: str, db_path: Path = FIXTURE_PATH, **kwargs
+) -> subprocess.CompletedProcess[str]:
+    env = dict(os.environ, FITHIT_DB_PATH=str(db_path))
+    return subprocess.run(
+        [sys.executable, *args],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=env,
+        **kwargs,
+    )
+
+
+def test_json_search_does_not_load_heavy_modules(tmp_path: Path):
+    result = _run(
+        "-c",
+        _PROBE,
+        "search",
+        "--format",
+        "json",
+        "--category",
+        "Yoga",
+        db_path=_sample_db(tmp_path),
+    )
+    assert json.loads(result.stdout)[0]["category"] == "Yoga"
+    loaded = set(json.loads(result.stderr))
+    assert loaded.isdisjoint(HEAVY_MODULES)
+
+
+def test_ndjson_search_does_not_load_heavy_modules(tmp_path: Path):
+    db_path = _sample_db(tmp_path)
+    result = _run(
+        "-c", _PROBE, "search", "--format", "ndjson", "--limit", "3", db_path=db_path
+    )
+    assert len(result.stdout.splitlines()) == 3
+    assert set(json.loads(result.stderr)).isdisjoint(HEAVY_MODULES)
+
+
+def test_info_json_does_not_load_rich(tmp_path: Path):
+    result = _run(
+        "-c", _PROBE, "info", "--format", "json", db_path=_sample_db(tmp_path)
+    )
+    assert json.loads(result.stdout)["total_workouts"] == 6
+    assert "rich" not in set(json.loads(result.stderr))
+
+
+def test_cli_import_budget():
+    result = _run("-X", "importtime", "-c", "import fithitcli.cli")
+    own_us = 0
+    for line in result.stderr.splitlines():
+        match = re.match(r"import time:\s+(\d+) \|\s+\d+ \|\s+(\S+)", line)
+        if match and match.group(2).startswith("fithitcli"):
+            own_us += int(match.group(1))
+    assert 0 < own_us < IMPORT_BUDGET_US
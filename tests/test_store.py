@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import fithitcli.db as db_module
+from fithitcli.info import _compute_summary
+from fithitcli.search import SearchArgs, find_workouts
+from fithitcli.store import WorkoutStore
+from fithitcli.validate import validate_workouts
+
+FIXTURE_PATH = Path(__file__).parent / "fixtures" / "workouts.sample.json"
+
+ODD_WORKOUTS = [
+    {
+        "category": "Yoga",
+        "episode": 12,
+        "prenatal": True,
+        "equipment": "Mat",
+        "description": "Flow ☀",
+    },
+    {"episode": "12", "category": "Yoga", "equipment": ["Mat", "Block"], "x": {}},
+    {"category": None, "trainer": ["A", "B"], "description": ""},
+    {"episode": 1.0, "prenatal": 1, "link": 5},
+    {},
+]
+
+
+def make_args(**overrides):
+    base = dict(
+        category=None,
+        categories=None,
+        duration=None,
+        max_duration=None,
+        equipment_free=False,
+        trainer=None,
+        body_focus=None,
+        flow_style=None,
+        search=None,
+    )
+    base.update(overrides)
+    return SearchArgs(**base)
+
+
+def _fixture() -> list[dict]:
+    return json.loads(FIXTURE_PATH.read_text(encoding="utf-8"))
+
+
+def test_store_round_trips_rows_exactly():
+    for workouts in (_fixture(), ODD_WORKOUTS):
+        store = WorkoutStore.build(workouts)
+        assert len(store) == len(workouts)
+        for pos, workout in enumerate(workouts):
+            row = store[pos]
+            assert json.dumps(row) == json.dumps(workout)
+            assert [type(v) for v in row.values()] == [
+                type(v) for v in workout.values()
+            ]
+            assert dict(store.view(pos)) == workout
+        assert store[-1] == workouts[-1]
+        assert store[1:3] == workouts[1:3]
+
+
+def test_store_dictionary_encodes_repeated_values():
+    workouts = [{"category": "Yoga", "trainer": "Jess"} for _ in range(1000)]
+    store = WorkoutStore.build(workouts)
+    column = store.columns["category"]
+    assert column.codes.typecode == "B"
+    assert column.values[1:] == ["Yoga"]
+    assert store.value_counts("trainer") == {"Jess": 1000}
+
+
+def test_info_and_validate_on_store_match_list():
+    for workouts in (_fixture(), ODD_WORKOUTS):
+        store = WorkoutStore.build(workouts)
+        assert validate_workouts(store) == validate_workouts(workouts)
+    workouts = _fixture()
+    assert _compute_summary(WorkoutStore.build(workouts)) == _compute_summary(workouts)
+
+
+def test_columnar_catalog_search_matches_list(tmp_path: Path):
+    db_path = tmp_path / "workouts.json"
+    db_path.write_bytes(FIXTURE_PATH.read_bytes())
+    plain = db_module.load_catalog(db_path)
+    columnar = db_module.load_catalog(db_path, columnar=True)
+    assert isinstance(columnar.workouts, WorkoutStore)
+
+    for args in (
+        make_args(),
+        make_args(category="yoga"),
+        make_args(equipment_free=True, max_duration=30),
+        make_args(search="flow"),
+    ):
+        assert find_workouts(columnar, args) == find_workouts(plain, args)
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import copy
+import io
+import json
+from pathlib import Path
+
+import pytest
+import typer
+
+import fithitcli.parse as parse_module
+from fithitcli.stream import JsonStream, StreamError, iter_tables
+
+
+def _content() -> dict:
+    return {
+        "version": 7,
+        "tables": [
+            {
+                "_id": "0000",
+                "name": "Attachments",
+                "columns": [{"key": "a", "name": "Blob"}],
+                "rows": [{"a": 'x"}]{[\\' * 50} for _ in range(20)],
+            },
+            {
+                "_id": "0001",
+                "name": "Yoga",
+                "columns": [
+                    {"key": "c_date", "name": "Date"},
+                    {
+                        "key": "c_dur",
+                        "name": "Duration",
+                        "data": {"options": [{"id": 1, "name": "20 min"}]},
+                    },
+                    {"key": "c_link", "name": "Link"},
+                    {"key": "c_desc", "name": "Description"},
+                    {"key": "c_name", "name": "Name"},
+                ],
+                "rows": [
+                    {
+                        "_id": "r1",
+                        "c_date": "2025-01-02",
+                        "c_dur": 1,
+                        "c_link": "https://ok.test/1",
+                        "c_desc": {"text": 'Üben \\ mit "Zitat" ☀'},
+                        "c_name": "Flow",
+                    },
+                    {
+                        "_id": "r2",
+                        "c_date": "2025-01-03",
+                        "c_link": "https://bad.test/2",
+                        "c_desc": {"text": "Broken"},
+                    },
+                    {"_id": "r3", "c_date": "2024-12-01", "c_name": "No text"},
+                    {
+                        "_id": "r4",
+                        "c_date": "2024-11-01",
+                        "c_desc": "Plain",
+                        "n": 1.5e3,
+                    },
+                ],
+                "views": [{"name": "Default", "filters": []}],
+            },
+            {
+                "rows": [{"c": "late name"}],
+                "name": "Core",
+                "columns": [{"key": "c", "name": "Description"}],
+            },
+        ],
+        "links": [],
+        "settings": {"nested": [1, [2, [3, {"a": None, "b": True}]]]},
+    }
+
+
+def _stream(content: dict) -> io.BytesIO:
+    return io.BytesIO(json.dumps(content, ensure_ascii=False, indent=1).encode())
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 64, 1 << 16])
+def test_iter_tables_yields_relevant_tables_only(chunk_size: int):
+    content = _content()
+    seen = [
+        (name, columns, list(rows))
+        for name, columns, rows in iter_tables(
+            _stream(content), ["Yoga", "Core"], chunk_size=chunk_size
+        )
+    ]
+
+    assert [name for name, _, _ in seen] == ["Yoga", "Core"]
+    assert seen[0][1] == content["tables"][1]["columns"]
+    assert seen[0][2] == content["tables"][1]["rows"]
+    assert seen[1][2] == [{"c": "late name"}]
+
+
+def test_iter_tables_drains_unconsumed_rows():
+    tables = list(iter_tables(_stream(_content()), ["Yoga", "Core"], chunk_size=5))
+    assert [name for name, _, _ in tables] == ["Yoga", "Core"]
+
+
+def test_json_stream_rejects_truncated_input():
+    stream = JsonStream(io.BytesIO(b'{"tables": [{"name": "Yo'), chunk_size=4)
+    with pytest.raises(StreamError):
+        for _ in stream.iter_object():
+            stream.skip_value()
+
+
+def test_parse_stream_matches_parse_content(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(
+        parse_module,
+        "_validate_links",
+        lambda links, timeout, checker: {link: "ok.test" in link for link in links},
+    )
+    content = _content()
+    content["tables"][0]["name"] = "Strength"  # relevant, but without links
+
+    full_out = tmp_path / "full" / "workouts.json"
+    parse_module.parse_content(
+        content=copy.deepcopy(content), source="test", output=str(full_out)
+    )
+
+    stream_out = tmp_path / "stream" / "workouts.json"
+    parse_module.parse_stream(_stream(content), source="test", output=str(stream_out))
+
+    assert stream_out.read_bytes() == full_out.read_bytes()
+    assert (stream_out.parent / "summary.json").read_bytes() == (
+        full_out.parent / "summary.json"
+    ).read_bytes()
+
+
+def test_parallel_parse_is_byte_identical(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(
+        parse_module,
+        "_validate_links",
+        lambda links, timeout, checker: {link: "ok.test" in link for link in links},
+    )
+    monkeypatch.setattr(parse_module, "PARSE_CHUNK_ROWS", 2)
+    content = _content()
+    content["tables"][0]["name"] = "Strength"
+
+    outputs = []
+    for jobs in (1, 2):
+        out = tmp_path / f"stream{jobs}" / "workouts.json"
+        parse_module.parse_stream(
+            _stream(content), source="test", output=str(out), jobs=jobs
+        )
+        outputs.append(out)
+        out = tmp_path / f"full{jobs}" / "workouts.json"
+        parse_module.parse_content(
+            content=copy.deepcopy(content), source="test", output=str(out), jobs=jobs
+        )
+        outputs.append(out)
+
+    assert len({out.read_bytes() for out in outputs}) == 1
+    assert len({(out.parent / "summary.json").read_bytes() for out in outputs}) == 1
+
+
+def test_parse_rejects_non_positive_jobs(tmp_path: Path):
+    with pytest.raises(typer.BadParameter):
+        parse_module.parse_stream(
+            _stream(_content()), source="test", output=str(tmp_path / "w.json"), jobs=0
+        )
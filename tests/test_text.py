@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from fithitcli.db import Catalog
+from fithitcli.search import SearchArgs, find_workouts
+from fithitcli.text import TextIndex, parse_query, tokenize
+
+WORKOUTS = [
+    {"category": "Yoga", "name": "Hip Opener Flow", "description": "Open your hips"},
+    {
+        "category": "Strength",
+        "name": "Upper Body",
+        "description": "Shoulder presses",
+        "detailed_moves": "Overhead press, lateral raises",
+    },
+    {
+        "category": "Yoga",
+        "name": "Morning Stretch",
+        "description": "Gentle stretching for hips and shoulders",
+        "notes": "Hip openers at the end",
+    },
+    {"category": "Core", "name": "Quick Core", "description": "Fast core burn"},
+]
+
+
+def make_args(**overrides):
+    base = dict(
+        category=None,
+        categories=None,
+        duration=None,
+        max_duration=None,
+        equipment_free=False,
+        trainer=None,
+        body_focus=None,
+        flow_style=None,
+        search=None,
+    )
+    base.update(overrides)
+    return SearchArgs(**base)
+
+
+def test_tokenize_lowercases_stems_and_drops_stopwords():
+    assert tokenize("The Hip Openers, stretching & presses") == [
+        "hip",
+        "open",
+        "stretch",
+        "press",
+    ]
+
+
+def test_parse_query_splits_or_clauses():
+    assert parse_query("hip opener OR arms | core") == [
+        ["hip", "open"],
+        ["arm"],
+        ["core"],
+    ]
+    assert parse_query("the of") == []
+
+
+def test_and_or_matching():
+    index = TextIndex.build(WORKOUTS)
+    assert set(index.search("hip opener")) == {0, 2}
+    assert set(index.search("hip shoulder")) == {2}
+    assert set(index.search("press OR core")) == {1, 3}
+    assert index.search("missing") == {}
+    assert index.search("...") is None
+
+
+def test_bm25_prefers_denser_matches():
+    scores = TextIndex.build(WORKOUTS).search("hip")
+    assert scores[0] > scores[2]
+
+
+def test_state_roundtrip():
+    index = TextIndex.build(WORKOUTS)
+    restored = TextIndex.from_state(index.to_state())
+    assert restored.search("hip OR press") == index.search("hip OR press")
+
+
+def test_find_workouts_rank_orders_by_relevance():
+    catalog = Catalog(Path("unused"), list(reversed(WORKOUTS)))
+    args = make_args(search="hip")
+
+    in_db_order = find_workouts(catalog, args)
+    assert [w["name"] for w in in_db_order] == ["Morning Stretch", "Hip Opener Flow"]
+
+    ranked = find_workouts(catalog, args, rank=True)
+    assert [w["name"] for w in ranked] == ["Hip Opener Flow", "Morning Stretch"]
+
+    yoga_only = find_workouts(catalog, make_args(search="shoulder", category="Yoga"))
+    assert [w["name"] for w in yoga_only] == ["Morning Stretch"]
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import json
+import pstats
+import time
+import zipfile
+from pathlib import Path
+
+import pytest
+from typer.testing import CliRunner
+
+from fithitcli import tracing
+from fithitcli.cli import app
+
+FIXTURE_PATH = Path(__file__).parent / "fixtures" / "workouts.sample.json"
+
+runner = CliRunner()
+
+
+@pytest.fixture()
+def sample_db(tmp_path: Path, monkeypatch) -> Path:
+    """A copy of the sample DB, so sidecars stay out of tests/fixtures."""
+    db_path = tmp_path / "workouts.json"
+    db_path.write_bytes(FIXTURE_PATH.read_bytes())
+    monkeypatch.setenv("FITHIT_DB_PATH", str(db_path))
+    return db_path
+
+
+def _spans(report: dict) -> dict[str, dict]:
+    return {span["name"]: span for span in report["spans"]}
+
+
+def test_disabled_span_is_a_shared_no_op():
+    assert not tracing.enabled()
+    assert tracing.span("a") is tracing.span("b")
+    with tracing.span("a"):
+        tracing.count("n")
+        tracing.record("x", 1.0)
+    assert not tracing.enabled()
+
+
+def test_spans_nest_and_add_up():
+    tracer = tracing.Tracer("test")
+    for _ in range(2):
+        with tracer.span("outer"):
+            with tracer.span("inner"):
+                time.sleep(0.001)
+            tracer.record("rows", 0.5, calls=10)
+    tracer.count("rows.parsed", 10)
+    tracer.count("rows.parsed", 5)
+
+    report = tracer.report()
+    spans = _spans(report)
+    assert list(spans) == ["outer/inner", "outer/rows", "outer"]
+    assert spans["outer"]["calls"] == 2
+    assert spans["outer/rows"] == {
+        "name": "outer/rows",
+        "calls": 20,
+        "total_ms": 1000.0,
+        "max_ms": 50.0,
+    }
+    assert spans["outer"]["total_ms"] >= spans["outer/inner"]["total_ms"] >= 2
+    assert report["counters"] == {"rows.parsed": 15}
+    assert report["command"] == "test" and report["version"] == tracing.TRACE_VERSION
+
+
+def test_trace_target(monkeypatch):
+    monkeypatch.delenv(tracing.TRACE_ENV, raising=False)
+    assert tracing.trace_target(False) is None
+    assert tracing.trace_target(True) == "-"
+    monkeypatch.setenv(tracing.TRACE_ENV, "1")
+    assert tracing.trace_target(False) == "-"
+    monkeypatch.setenv(tracing.TRACE_ENV, "trace.jsonl")
+    assert tracing.trace_target(True) == "trace.jsonl"
+
+
+def test_profile_writes_report_to_stderr(monkeypatch, sample_db):
+    monkeypatch.delenv(tracing.TRACE_ENV, raising=False)
+    result = runner.invoke(
+        app, ["--profile", "search", "--format", "json", "--category", "Yoga"]
+    )
+    assert result.exit_code == 0
+    assert json.loads(result.stdout)[0]["category"] == "Yoga"
+
+    report = json.loads(result.stderr.strip().splitlines()[-1])
+    assert report["command"] == "search"
+    assert {"load", "match"} <= set(_spans(report))
+    assert not tracing.enabled()
+
+
+def test_trace_file_collects_one_line_per_command(
+    monkeypatch, tmp_path: Path, sample_db
+):
+    trace = tmp_path / "trace.jsonl"
+    monkeypatch.setenv(tracing.TRACE_ENV, str(trace))
+    for args in (["info", "--format", "json"], ["validate", "--format", "json"]):
+        result = runner.invoke(app, args)
+        assert result.exit_code == 0
+        assert result.stderr == ""
+
+    reports = [json.loads(line) for line in trace.read_text().splitlines()]
+    assert [r["command"] for r in reports] == ["info", "validate"]
+    assert {"load", "validate"} <= set(_spans(reports[1]))
+
+
+def test_parse_reports_stages_and_counters(monkeypatch, tmp_path: Path):
+    content = {
+        "tables": [
+            {
+                "name": "Yoga",
+                "columns": [
+                    {"key": "c_date", "name": "Date"},
+                    {"key": "c_desc", "name": "Description"},
+                ],
+                "rows": [
+                    {"_id": f"r{i}", "c_date": f"2025-01-0{i}", "c_desc": "Flow"}
+                    for i in range(1, 4)
+                ],
+            }
+        ]
+    }
+    dtable = tmp_path / "export.dtable"
+    with zipfile.ZipFile(dtable, "w") as zf:
+        zf.writestr("content.json", json.dumps(content))
+    trace = tmp_path / "trace.jsonl"
+    monkeypatch.setenv(tracing.TRACE_ENV, str(trace))
+    result = runner.invoke(
+        app, ["parse", str(dtable), "--output", str(tmp_path / "workouts.json")]
+    )
+    assert result.exit_code == 0, result.output
+
+    report = json.loads(trace.read_text())
+    spans = _spans(report)
+    for stage in ("unzip", "hash", "rows", "rows/decode", "link_check", "write"):
+        assert stage in spans, stage
+    assert spans["rows/decode"]["calls"] == 3
+    assert {"write/publish", "write/publish/encode"} <= set(spans)
+    assert report["counters"]["rows.parsed"] == 3
+    assert report["counters"]["workouts"] == 3
+
+
+def test_pstats_dump(monkeypatch, tmp_path: Path, sample_db):
+    monkeypatch.delenv(tracing.TRACE_ENV, raising=False)
+    dump = tmp_path / "search.pstats"
+    result = runner.invoke(app, ["--pstats", str(dump), "search", "--format", "json"])
+    assert result.exit_code == 0
+    assert result.stderr == ""
+    stats = pstats.Stats(str(dump))
+    assert any(func[2] == "search_cmd" for func in stats.stats)